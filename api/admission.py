@@ -0,0 +1,154 @@
+"""Admission control for search pipelines.
+
+At most max_active searches run at once per worker; further searches wait
+in a bounded FIFO queue and are told their position over SSE, and requests
+arriving when the queue is full are rejected upfront with 503. Within
+running searches, ETG fetches and LLM scoring calls are additionally
+limited by process-wide stage semaphores, so a burst of searches does not
+all hit the same upstream at once.
+"""
+
+import asyncio
+import contextlib
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator
+
+from config import (
+    ETG_STAGE_CONCURRENCY,
+    LLM_STAGE_CONCURRENCY,
+    MAX_ACTIVE_SEARCHES,
+    MAX_QUEUED_SEARCHES,
+)
+
+from .events import ErrorEvent, QueuePositionEvent, SSEBaseEvent
+
+# Concurrent ETG content/review fetch phases across all searches
+etg_stage = asyncio.Semaphore(ETG_STAGE_CONCURRENCY)
+# Concurrent LLM scoring calls (whole batches or pipelined shards)
+llm_stage = asyncio.Semaphore(LLM_STAGE_CONCURRENCY)
+
+
+class AdmissionRejectedError(Exception):
+    """All search slots are busy and the wait queue is full."""
+
+    def __init__(self) -> None:
+        """Initialize with default message."""
+        super().__init__("Too many searches in progress, try again later")
+
+
+class AdmissionTicket:
+    """Place of one search in an admission controller's queue or slots."""
+
+    def __init__(self) -> None:
+        """Initialize a ticket that is neither queued nor admitted."""
+        self._updates: asyncio.Queue[int] = asyncio.Queue()
+        self.position = 0
+        self.admitted = False
+        self.released = False
+
+    def move_to(self, position: int) -> None:
+        """Record a new queue position; called by the controller."""
+        if position != self.position:
+            self.position = position
+            self._updates.put_nowait(position)
+
+    def admit(self) -> None:
+        """Mark the search as running; called by the controller."""
+        self.admitted = True
+        self.move_to(0)
+
+    async def positions(self) -> AsyncIterator[int]:
+        """Yield queue positions (1 = next) as they change, until admitted."""
+        while not self.admitted:
+            position = await self._updates.get()
+            if position:
+                yield position
+
+
+class AdmissionController:
+    """Concurrency limit for search pipelines with a bounded wait queue.
+
+    Args:
+        max_active: Maximum number of searches running at once.
+        max_queued: Maximum number of searches waiting for a slot.
+    """
+
+    def __init__(
+        self,
+        max_active: int = MAX_ACTIVE_SEARCHES,
+        max_queued: int = MAX_QUEUED_SEARCHES,
+    ) -> None:
+        """Initialize with no running searches."""
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.active = 0
+        self._queue: deque[AdmissionTicket] = deque()
+
+    @property
+    def queued(self) -> int:
+        """Return the number of searches waiting for a slot."""
+        return len(self._queue)
+
+    def check(self) -> None:
+        """Fail fast if a new search could be neither started nor queued.
+
+        Raises:
+            AdmissionRejectedError: If all slots and queue places are taken.
+        """
+        if self.active >= self.max_active and len(self._queue) >= self.max_queued:
+            raise AdmissionRejectedError
+
+    def enqueue(self) -> AdmissionTicket:
+        """Take a slot, or a place at the end of the queue.
+
+        Raises:
+            AdmissionRejectedError: If all slots and queue places are taken.
+        """
+        self.check()
+        ticket = AdmissionTicket()
+        if self.active < self.max_active and not self._queue:
+            self.active += 1
+            ticket.admit()
+        else:
+            self._queue.append(ticket)
+            ticket.move_to(len(self._queue))
+        return ticket
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Free the ticket's slot or queue place; safe to call more than once."""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.admitted:
+            self.active -= 1
+        else:
+            self._queue.remove(ticket)
+        while self._queue and self.active < self.max_active:
+            self.active += 1
+            self._queue.popleft().admit()
+        for position, waiting in enumerate(self._queue, start=1):
+            waiting.move_to(position)
+
+
+async def admitted_events(
+    controller: AdmissionController,
+    events: AsyncGenerator[SSEBaseEvent],
+) -> AsyncIterator[SSEBaseEvent]:
+    """Run a search pipeline once admitted, reporting queue positions meanwhile.
+
+    The slot or queue place is released when the pipeline finishes or the
+    stream is closed, including while still waiting in the queue.
+    """
+    async with contextlib.aclosing(events):
+        try:
+            ticket = controller.enqueue()
+        except AdmissionRejectedError as e:
+            yield ErrorEvent(error_type="AdmissionRejectedError", error_message=str(e))
+            return
+        try:
+            async for position in ticket.positions():
+                yield QueuePositionEvent(position=position)
+            async for event in events:
+                yield event
+        finally:
+            controller.release(ticket)
@@ -1,16 +1,60 @@
 """FastAPI application factory."""
 
+import logging
 from typing import Annotated, Any
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 
-from config import CORS_ORIGINS, ETG_API_KEY, ETG_KEY_ID, ETG_REQUEST_TIMEOUT
+from config import (
+    COMPRESSION_MIN_SIZE,
+    CORS_ORIGINS,
+    ETG_API_KEY,
+    ETG_KEY_ID,
+    ETG_REQUEST_TIMEOUT,
+    SSE_HEARTBEAT_INTERVAL,
+)
 from etg import ETGClient, Region
-
-from .schemas import HotelSearchRequest, RegionItem, RegionSuggestResponse
-from .search import search_stream
+from services import (
+    RegionSuggestCache,
+    close_agents,
+    get_shared_cache,
+    open_region_index,
+    start_cache_eviction,
+    stop_cache_eviction,
+    warm_up_scoring_agent,
+)
+from utils import with_heartbeat
+
+from .admission import AdmissionController, AdmissionRejectedError, admitted_events
+from .compression import CompressionMiddleware
+from .jobs import SearchJobLimitError, SearchJobRegistry
+from .schemas import (
+    HotelSearchRequest,
+    RegionItem,
+    RegionSuggestResponse,
+    SearchJobResponse,
+)
+from .search import search_events, search_stream
+
+logger = logging.getLogger(__name__)
+
+
+async def _warm_up_agents() -> None:
+    """Create shared LLM agents so the first search does not pay for it."""
+    try:
+        await warm_up_scoring_agent()
+    except Exception:
+        logger.exception("Failed to warm up scoring agent")
+
+
+def _check_admission(admission: AdmissionController) -> None:
+    """Reject a new search with 503 if it could not even be queued."""
+    try:
+        admission.check()
+    except AdmissionRejectedError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)) from e
 
 
 def create_app() -> FastAPI:
@@ -24,12 +68,25 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
 
     etg_client = ETGClient(ETG_KEY_ID, ETG_API_KEY, timeout=ETG_REQUEST_TIMEOUT)
+    search_jobs = SearchJobRegistry(cache=get_shared_cache())
+    admission = AdmissionController()
+    region_index = open_region_index()
+    region_suggest = RegionSuggestCache(etg_client, index=region_index)
+
+    app.on_event("startup")(_warm_up_agents)
+    app.on_event("startup")(start_cache_eviction)
 
     @app.on_event("shutdown")
     async def shutdown_event() -> None:
+        stop_cache_eviction()
+        await search_jobs.close()
+        await close_agents()
         await etg_client.close()
+        if region_index is not None:
+            region_index.close()
 
     @app.get("/")
     async def root() -> dict[str, Any]:
@@ -41,7 +98,7 @@ def create_app() -> FastAPI:
         language: Annotated[str, Query(pattern=r"^[a-z]{2}$", description="Код языка")] = "ru",
     ) -> RegionSuggestResponse:
         """Поиск региона по названию."""
-        raw_regions: list[Region] = await etg_client.suggest_region(query, language)
+        raw_regions: list[Region] = await region_suggest.suggest(query, language)
 
         regions = [
             RegionItem(
@@ -62,9 +119,53 @@ def create_app() -> FastAPI:
         )
 
     @app.post("/hotels/search/stream")
-    async def stream_hotels_search(request: HotelSearchRequest) -> StreamingResponse:
+    async def stream_hotels_search(
+        request: HotelSearchRequest, http_request: Request
+    ) -> StreamingResponse:
+        _check_admission(admission)
+        return StreamingResponse(
+            with_heartbeat(
+                search_stream(request, etg_client, admission),
+                SSE_HEARTBEAT_INTERVAL,
+                http_request.is_disconnected,
+            ),
+            media_type="text/event-stream",
+        )
+
+    @app.post("/hotels/search", status_code=status.HTTP_202_ACCEPTED)
+    async def start_hotels_search(request: HotelSearchRequest) -> SearchJobResponse:
+        """Запуск фонового поиска отелей."""
+        _check_admission(admission)
+        try:
+            job = await search_jobs.start(
+                admitted_events(admission, search_events(request, etg_client))
+            )
+        except SearchJobLimitError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+            ) from e
+        return SearchJobResponse(
+            job_id=job.id,
+            events_url=f"/hotels/search/{job.id}/events",
+        )
+
+    @app.get("/hotels/search/{job_id}/events")
+    async def stream_search_job_events(
+        job_id: str,
+        http_request: Request,
+        last_event_id: Annotated[int | None, Header(description="ID последнего события")] = None,
+    ) -> StreamingResponse:
+        """SSE-поток событий фонового поиска с возобновлением по Last-Event-ID."""
+        job = await search_jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Поиск не найден")
+        # Only stops listening on disconnect; the job itself keeps running
         return StreamingResponse(
-            search_stream(request, etg_client),
+            with_heartbeat(
+                job.stream(last_event_id),
+                SSE_HEARTBEAT_INTERVAL,
+                http_request.is_disconnected,
+            ),
             media_type="text/event-stream",
         )
 
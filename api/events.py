@@ -6,16 +6,27 @@ from typing import Any, ClassVar
 
 from pydantic import BaseModel
 
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:  # optional "speedups" extra
+    HAS_ORJSON = False
+
 from etg import GuestRoom
-from utils import SSEMessage
+from utils import SSEMessage, sse_prefix
 
 
 class EventType(str, Enum):
     """Event types for SSE streaming."""
 
+    # Admission: waiting for a free search slot
+    QUEUE_POSITION = "queue_position"
+
     # Phase 1: Search
     HOTEL_SEARCH_START = "hotel_search_start"
     HOTEL_SEARCH_DONE = "hotel_search_done"
+    HOTEL_SEARCH_REGION_DONE = "hotel_search_region_done"
 
     # Phase 2: Content
     BATCH_GET_CONTENT_START = "batch_get_content_start"
@@ -32,20 +43,69 @@ class EventType(str, Enum):
     SCORING_START = "scoring_start"
     SCORING_DONE = "scoring_done"
 
+    # Pipelined mode: phases 2-5 overlap
+    PIPELINE_BATCH_DONE = "pipeline_batch_done"
+    SCORING_SHARD_START = "scoring_shard_start"
+    SCORING_SHARD_DONE = "scoring_shard_done"
+    SCORING_FALLBACK = "scoring_fallback"
+
+    # Progressive results (stream_results mode), before the terminal done
+    HOTEL_RESULT = "hotel_result"
+
     # Terminal
     ERROR = "error"
     DONE = "done"
 
 
 class SSEBaseEvent(BaseModel):
-    """Base class for SSE payloads with bound event names."""
+    """Base class for SSE payloads with bound event names.
+
+    Events with plain_payload set hold only JSON-native values (dicts, lists,
+    strings, numbers), so encode_event may serialize them with orjson.
+    """
 
     event_type: ClassVar[EventType]
+    plain_payload: ClassVar[bool] = False
 
 
-def sse_message(payload: "SSEBaseEvent") -> SSEMessage:
+def sse_message(payload: "SSEBaseEvent", event_id: str | None = None) -> SSEMessage:
     """Wrap payload into SSE message using its bound event type."""
-    return SSEMessage(event=payload.event_type.value, data=payload)
+    return SSEMessage(event=payload.event_type.value, data=payload, id=event_id)
+
+
+_EVENT_PREFIXES: dict[EventType, bytes] = {
+    event_type: sse_prefix(event_type.value).encode() for event_type in EventType
+}
+
+
+def encode_event(payload: "SSEBaseEvent", event_id: str | None = None) -> bytes:
+    """Format payload as an UTF-8 SSE frame without the SSEMessage round-trip.
+
+    Produces the bytes of sse_event(sse_message(payload, event_id)) without
+    building an intermediate str: the payload is serialized with its
+    compiled pydantic serializer directly, or with orjson for plain payloads
+    (several times faster on large dict[str, Any] fields; identical output
+    for finite floats below 1e16).
+    """
+    data: bytes | None = None
+    if HAS_ORJSON and payload.plain_payload:
+        try:
+            data = orjson.dumps(payload.__dict__)
+        except TypeError:  # e.g. integers beyond 64 bits
+            data = None
+    if data is None:
+        data = payload.__pydantic_serializer__.to_json(payload)
+    prefix = _EVENT_PREFIXES[payload.event_type]
+    if event_id is not None:
+        return b"".join((b"id: ", event_id.encode(), b"\n", prefix, data, b"\n\n"))
+    return b"".join((prefix, data, b"\n\n"))
+
+
+class QueuePositionEvent(SSEBaseEvent):
+    """Search is waiting for a free slot; position 1 starts next."""
+
+    event_type: ClassVar[EventType] = EventType.QUEUE_POSITION
+    position: int
 
 
 class HotelSearchStartEvent(SSEBaseEvent):
@@ -73,6 +133,16 @@ class HotelSearchDoneEvent(SSEBaseEvent):
     sampled: int | None = None
 
 
+class HotelSearchRegionDoneEvent(SSEBaseEvent):
+    """Search of one region completed in a multi-region search."""
+
+    event_type: ClassVar[EventType] = EventType.HOTEL_SEARCH_REGION_DONE
+    region_id: int
+    total_available: int
+    new_hotels: int
+    total_after_filter: int
+
+
 class BatchGetContentStartEvent(SSEBaseEvent):
     """Content fetching started."""
 
@@ -111,6 +181,7 @@ class PresortDoneEvent(SSEBaseEvent):
     event_type: ClassVar[EventType] = EventType.PRESORT_DONE
     input_hotels: int
     output_hotels: int
+    dropped_by_requirements: int = 0
 
 
 class ScoringStartEvent(SSEBaseEvent):
@@ -127,6 +198,41 @@ class ScoringDoneEvent(SSEBaseEvent):
     scored_count: int
 
 
+class PipelineBatchDoneEvent(SSEBaseEvent):
+    """Content and reviews fetched for one batch in pipelined mode."""
+
+    event_type: ClassVar[EventType] = EventType.PIPELINE_BATCH_DONE
+    batch: int
+    total_batches: int
+    hotels_with_content: int
+    hotels_with_reviews: int
+    candidates: int
+
+
+class ScoringShardStartEvent(SSEBaseEvent):
+    """Scoring of a candidate shard started in pipelined mode."""
+
+    event_type: ClassVar[EventType] = EventType.SCORING_SHARD_START
+    shard: int
+    total_hotels: int
+
+
+class ScoringShardDoneEvent(SSEBaseEvent):
+    """Scoring of a candidate shard completed in pipelined mode."""
+
+    event_type: ClassVar[EventType] = EventType.SCORING_SHARD_DONE
+    shard: int
+    scored_count: int
+    error_message: str | None = None
+
+
+class ScoringFallbackEvent(SSEBaseEvent):
+    """LLM scoring failed; hotels are ranked locally instead."""
+
+    event_type: ClassVar[EventType] = EventType.SCORING_FALLBACK
+    error_message: str
+
+
 class ErrorEvent(SSEBaseEvent):
     """Error event."""
 
@@ -136,17 +242,29 @@ class ErrorEvent(SSEBaseEvent):
     batch: int | None = None
 
 
+class HotelResultEvent(SSEBaseEvent):
+    """One scored hotel, sent in rank order in stream_results mode."""
+
+    event_type: ClassVar[EventType] = EventType.HOTEL_RESULT
+    plain_payload: ClassVar[bool] = True
+    rank: int
+    hotel: dict[str, Any]
+
+
 class DoneEvent(SSEBaseEvent):
-    """Search completed with scored hotels."""
+    """Search completed with scored hotels (empty if already sent as hotel_result)."""
 
     event_type: ClassVar[EventType] = EventType.DONE
+    plain_payload: ClassVar[bool] = True
     total_scored: int
     hotels: list[dict[str, Any]]
 
 
 SSEEvent = (
-    HotelSearchStartEvent
+    QueuePositionEvent
+    | HotelSearchStartEvent
     | HotelSearchDoneEvent
+    | HotelSearchRegionDoneEvent
     | BatchGetContentStartEvent
     | BatchGetContentDoneEvent
     | BatchGetReviewsStartEvent
@@ -154,6 +272,11 @@ SSEEvent = (
     | PresortDoneEvent
     | ScoringStartEvent
     | ScoringDoneEvent
+    | PipelineBatchDoneEvent
+    | ScoringShardStartEvent
+    | ScoringShardDoneEvent
+    | ScoringFallbackEvent
     | ErrorEvent
+    | HotelResultEvent
     | DoneEvent
 )
@@ -0,0 +1,276 @@
+"""Background search jobs with resumable SSE event buffers.
+
+A job runs the search pipeline as a background task, detached from the
+HTTP connection that started it. Every event is numbered and kept in a
+bounded per-job buffer, so a client that reconnects with Last-Event-ID
+continues from where it stopped instead of restarting the pipeline.
+
+A job runs in the worker process that created it. With the shared cache
+enabled, every frame and the job's progress are also written there, so a
+resume request that lands on another uvicorn worker streams the same
+events by polling the cache.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator
+from functools import partial
+from typing import Any
+
+from services import SharedCache
+
+from .events import ErrorEvent, SSEBaseEvent, encode_event
+
+logger = logging.getLogger(__name__)
+
+JOB_EVENT_BUFFER_SIZE = 256
+JOB_TTL_SECONDS = 600.0
+MAX_JOBS = 100
+# Shared cache namespace with job progress and frames, for other workers
+JOBS_NAMESPACE = "search_jobs"
+# Seconds between shared cache reads when streaming another worker's job
+JOB_POLL_INTERVAL = 0.25
+
+
+class SearchJobLimitError(Exception):
+    """Too many search jobs are running at once."""
+
+    def __init__(self) -> None:
+        """Initialize with default message."""
+        super().__init__("Too many search jobs in progress")
+
+
+class SearchJob:
+    """Search pipeline running in the background with a bounded event buffer.
+
+    Args:
+        job_id: Unique job identifier.
+        buffer_size: Maximum number of events kept for resumption.
+        cache: Shared cache to publish frames to for other workers, if any.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        buffer_size: int = JOB_EVENT_BUFFER_SIZE,
+        cache: SharedCache | None = None,
+    ) -> None:
+        """Initialize an empty job."""
+        self.id = job_id
+        self._cache = cache
+        self.created_at = time.monotonic()
+        self.finished_at: float | None = None
+        self._frames: deque[tuple[int, bytes]] = deque(maxlen=buffer_size)
+        self._next_event_id = 1
+        self._condition = asyncio.Condition()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def done(self) -> bool:
+        """Return True once the pipeline has emitted its last event."""
+        return self.finished_at is not None
+
+    async def start(self, events: AsyncIterator[SSEBaseEvent]) -> None:
+        """Register the job in the shared cache and run the pipeline in a background task."""
+        await self._share({self.id: {"last_event_id": 0, "done": False}})
+        self._task = asyncio.create_task(self._run(events), name=f"search-job-{self.id}")
+
+    async def cancel(self) -> None:
+        """Cancel the pipeline task if it is still running."""
+        if self._task is None or self._task.done():
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+    async def _run(self, events: AsyncIterator[SSEBaseEvent]) -> None:
+        try:
+            async for payload in events:
+                await self._publish(payload)
+        except Exception as e:
+            logger.exception("[jobs] search job %s failed", self.id)
+            # End the stream with an error frame, so resuming clients are
+            # not left waiting for a done event that never comes
+            await self._publish(ErrorEvent(error_type=type(e).__name__, error_message=str(e)))
+        finally:
+            async with self._condition:
+                self.finished_at = time.monotonic()
+                self._condition.notify_all()
+            await self._share({self.id: {"last_event_id": self._next_event_id - 1, "done": True}})
+
+    async def _publish(self, payload: SSEBaseEvent) -> None:
+        event_id = self._next_event_id
+        self._next_event_id += 1
+        frame = encode_event(payload, event_id=str(event_id))
+        async with self._condition:
+            self._frames.append((event_id, frame))
+            self._condition.notify_all()
+        await self._share(
+            {
+                f"{self.id}:{event_id}": frame.decode(),
+                self.id: {"last_event_id": event_id, "done": False},
+            }
+        )
+
+    async def _share(self, items: dict[str, Any]) -> None:
+        """Write job entries to the shared cache, if there is one."""
+        if self._cache is not None:
+            await asyncio.to_thread(self._cache.set_many, JOBS_NAMESPACE, items)
+
+    def _ready_after(self, event_id: int) -> bool:
+        has_new_frames = bool(self._frames) and self._frames[-1][0] > event_id
+        return has_new_frames or self.done
+
+    async def stream(self, last_event_id: int | None = None) -> AsyncIterator[bytes]:
+        """Yield SSE frames with ids greater than last_event_id.
+
+        If the requested position has already been evicted from the buffer,
+        streaming continues from the oldest event still available.
+        """
+        cursor = last_event_id or 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(partial(self._ready_after, cursor))
+                frames = [(i, frame) for i, frame in self._frames if i > cursor]
+            if not frames:
+                return
+            for event_id, frame in frames:
+                cursor = event_id
+                yield frame
+
+
+class SharedSearchJob:
+    """Job running in another worker process, streamed from the shared cache.
+
+    Args:
+        job_id: Job identifier.
+        cache: Shared cache the owning worker publishes frames to.
+        buffer_size: Number of most recent events available for resumption.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        cache: SharedCache,
+        buffer_size: int = JOB_EVENT_BUFFER_SIZE,
+    ) -> None:
+        """Initialize a reader of the job's shared frames."""
+        self.id = job_id
+        self._cache = cache
+        self._buffer_size = buffer_size
+
+    async def stream(self, last_event_id: int | None = None) -> AsyncIterator[bytes]:
+        """Yield SSE frames with ids greater than last_event_id.
+
+        Polls the shared cache until the job is done or its entries expire.
+        Frames already evicted from the cache are skipped.
+        """
+        cursor = last_event_id or 0
+        while True:
+            status = await _read_job_status(self._cache, self.id)
+            if status is None:
+                return
+            last_event_id = status["last_event_id"]
+            if last_event_id > cursor:
+                first = max(cursor + 1, last_event_id - self._buffer_size + 1)
+                keys = [f"{self.id}:{i}" for i in range(first, last_event_id + 1)]
+                frames = await asyncio.to_thread(self._cache.get_many, JOBS_NAMESPACE, keys)
+                for key in keys:
+                    if (frame := frames.get(key)) is not None:
+                        yield frame.encode()
+                cursor = last_event_id
+            elif status["done"]:
+                return
+            else:
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+async def _read_job_status(cache: SharedCache, job_id: str) -> dict[str, Any] | None:
+    """Return {"last_event_id", "done"} of a job published to the shared cache."""
+    entries = await asyncio.to_thread(cache.get_many, JOBS_NAMESPACE, [job_id])
+    return entries.get(job_id)
+
+
+class SearchJobRegistry:
+    """Registry of background search jobs of this worker process.
+
+    Jobs of other workers are found through the shared cache, if given.
+
+    Args:
+        buffer_size: Per-job event buffer size.
+        ttl: Seconds to keep a finished job available for resumption.
+        max_jobs: Maximum number of jobs kept at once.
+        cache: Shared cache that makes jobs resumable from any worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        buffer_size: int = JOB_EVENT_BUFFER_SIZE,
+        ttl: float = JOB_TTL_SECONDS,
+        max_jobs: int = MAX_JOBS,
+        cache: SharedCache | None = None,
+    ) -> None:
+        """Initialize an empty registry."""
+        self._buffer_size = buffer_size
+        self._ttl = ttl
+        self._max_jobs = max_jobs
+        self._cache = cache
+        self._jobs: dict[str, SearchJob] = {}
+
+    async def start(self, events: AsyncIterator[SSEBaseEvent]) -> SearchJob:
+        """Register a new job and start its pipeline in the background.
+
+        The job is visible to other workers once this returns.
+
+        Raises:
+            SearchJobLimitError: If max_jobs jobs are still running.
+        """
+        self._prune()
+        if len(self._jobs) >= self._max_jobs:
+            raise SearchJobLimitError
+
+        job = SearchJob(uuid.uuid4().hex, self._buffer_size, self._cache)
+        self._jobs[job.id] = job
+        await job.start(events)
+        return job
+
+    async def get(self, job_id: str) -> SearchJob | SharedSearchJob | None:
+        """Return the job by id, or None if it is unknown or expired.
+
+        Jobs of other workers are looked up in the shared cache.
+        """
+        self._prune()
+        job = self._jobs.get(job_id)
+        if job is not None or self._cache is None:
+            return job
+        if await _read_job_status(self._cache, job_id) is None:
+            return None
+        return SharedSearchJob(job_id, self._cache, self._buffer_size)
+
+    async def close(self) -> None:
+        """Cancel all running jobs and forget them."""
+        jobs = list(self._jobs.values())
+        self._jobs.clear()
+        for job in jobs:
+            await job.cancel()
+
+    def _prune(self) -> None:
+        """Drop expired jobs, then the oldest finished ones if over the limit."""
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self._ttl:
+                del self._jobs[job_id]
+
+        if len(self._jobs) < self._max_jobs:
+            return
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_at is not None),
+            key=lambda job: job.created_at,
+        )
+        for job in finished[: len(self._jobs) - self._max_jobs + 1]:
+            del self._jobs[job.id]
@@ -1,11 +1,14 @@
 """API request and response schemas."""
 
 from datetime import date
+from typing import Annotated
 
 from pydantic import BaseModel, Field, model_validator
 
 from etg import GuestRoom
 
+MAX_ADDITIONAL_REGIONS = 4
+
 
 class RegionItem(BaseModel):
     """Регион из результатов поиска."""
@@ -28,6 +31,11 @@ class HotelSearchRequest(BaseModel):
     """Запрос на поиск отелей."""
 
     region_id: int = Field(gt=0, description="ID региона поиска")
+    additional_region_ids: list[Annotated[int, Field(gt=0)]] = Field(
+        default_factory=list,
+        max_length=MAX_ADDITIONAL_REGIONS,
+        description="Дополнительные регионы (например, аэропорт), ищутся параллельно",
+    )
     checkin: date = Field(description="Дата заезда")
     checkout: date = Field(description="Дата выезда")
     guests: list[GuestRoom] = Field(min_length=1, description="Количество гостей")
@@ -57,6 +65,22 @@ class HotelSearchRequest(BaseModel):
     top_hotels: int = Field(
         default=10, ge=1, le=12, description="Количество отелей в результате (макс. 12)"
     )
+    pipelined: bool = Field(
+        default=False,
+        description="Конвейерный режим: скоринг начинается до загрузки всех отелей",
+    )
+    fast_mode: bool = Field(
+        default=False,
+        description="Быстрый режим: локальное ранжирование без AI-скоринга",
+    )
+    stream_results: bool = Field(
+        default=False,
+        description="Присылать отели по одному (события hotel_result), done без списка отелей",
+    )
+    seed: int | None = Field(
+        default=None,
+        description="Seed для воспроизводимой выборки отелей",
+    )
 
     @model_validator(mode="after")
     def validate_checkout_after_checkin(self) -> "HotelSearchRequest":
@@ -72,3 +96,10 @@ class HotelSearchRequest(BaseModel):
             msg = "Минимальная цена за ночь не может быть больше максимальной цены"
             raise ValueError(msg)
         return self
+
+
+class SearchJobResponse(BaseModel):
+    """Ответ на запуск фонового поиска отелей."""
+
+    job_id: str = Field(description="ID фонового поиска")
+    events_url: str = Field(description="URL SSE-потока событий поиска")
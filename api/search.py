@@ -1,27 +1,49 @@
 """Hotel search streaming pipeline."""
 
-from collections.abc import AsyncIterator
-from typing import Any, cast
+import asyncio
+import contextlib
+import logging
+import math
+from collections.abc import AsyncGenerator, AsyncIterator, Iterator
+from typing import Any
 
 import httpx
 from pydantic import ValidationError
 
-from etg import ETGAPIError, ETGClient, ETGNetworkError
+from config import REVIEW_DIGESTS_ENABLED, SEARCH_MEMORY_DEBUG
+from etg import ETGAPIError, ETGClient, ETGNetworkError, Hotel, HotelContent
 from services import (
     CONTENT_BATCH_SIZE,
     REVIEWS_BATCH_SIZE,
+    HotelFull,
+    HotelReviews,
+    HotelScored,
+    HotelScoreDict,
+    ScoringResultDict,
+    aggregate_reviews,
     batch_get_content,
     batch_get_reviews,
     combine_hotels_data,
+    fetch_content_batch,
+    fetch_reviews_batch,
     filter_hotels_by_price,
     filter_reviews,
-    finalize_scored_hotels,
+    get_preference_ranker,
+    get_region_amenity_index,
+    get_review_languages,
+    iter_scored_hotels,
+    iter_search_regions_cached,
+    load_review_digests,
     presort_hotels,
+    rank_hotels_locally,
+    required_preferences,
     sample_hotels,
+    schedule_digest_summaries,
     score_hotels,
 )
-from utils import sse_event
+from utils import MemoryProbe, start_memory_tracing
 
+from .admission import AdmissionController, admitted_events, etg_stage, llm_stage
 from .events import (
     BatchGetContentDoneEvent,
     BatchGetContentStartEvent,
@@ -29,27 +51,209 @@ from .events import (
     BatchGetReviewsStartEvent,
     DoneEvent,
     ErrorEvent,
+    HotelResultEvent,
     HotelSearchDoneEvent,
+    HotelSearchRegionDoneEvent,
     HotelSearchStartEvent,
+    PipelineBatchDoneEvent,
     PresortDoneEvent,
     ScoringDoneEvent,
+    ScoringFallbackEvent,
+    ScoringShardDoneEvent,
+    ScoringShardStartEvent,
     ScoringStartEvent,
-    sse_message,
+    SSEBaseEvent,
+    encode_event,
 )
 from .schemas import HotelSearchRequest
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_PREFERENCES = "Лучшее соотношение цены и качества, хорошие отзывы, удобное расположение"
 HOTELS_SEARCH_LIMIT = 800
 PRESORT_LIMIT = 100
 MAX_REVIEWS_PER_HOTEL = 30
 REVIEW_TEXT_MAX_LENGTH = 512
 
+# Pipelined mode
+PIPELINE_BATCH_SIZE = 50
+PIPELINE_MAX_CONCURRENT_BATCHES = 4
+SCORING_SHARD_SIZE = 25
+
+
+async def _preference_similarities(
+    request: HotelSearchRequest,
+    hotels: list[HotelFull],
+) -> dict[int, float] | None:
+    """Embedding similarity of hotels to user preferences, if available."""
+    if not request.user_preferences:
+        return None
+    try:
+        ranker = await get_preference_ranker()
+        if ranker is None:
+            return None
+        return await ranker.similarities(hotels, request.user_preferences)
+    except (OSError, RuntimeError, ValueError) as e:
+        logger.warning("[embeddings] pre-ranking skipped: %s: %s", type(e).__name__, e)
+        return None
+
+
+def _drop_unmet_requirements(
+    request: HotelSearchRequest,
+    hotels: list[HotelFull],
+    hotel_regions: dict[int, int],
+) -> list[HotelFull]:
+    """Drop hotels that certainly lack amenities required in preferences.
+
+    Each hotel is indexed in the amenity index of the region it was found
+    in: hotel_regions maps hids from additional regions to their region,
+    other hotels belong to request.region_id. All hotels are kept if fewer
+    than top_hotels would remain.
+    """
+    requirements = required_preferences(request.user_preferences)
+    if not requirements:
+        return hotels
+    by_region: dict[int, list[HotelFull]] = {}
+    for hotel in hotels:
+        region_id = hotel_regions.get(hotel["hid"], request.region_id)
+        by_region.setdefault(region_id, []).append(hotel)
+    kept_hids: set[int] = set()
+    for region_id, region_hotels in by_region.items():
+        index = get_region_amenity_index(region_id)
+        index.add_hotels(region_hotels)
+        kept_hids.update(hotel["hid"] for hotel in index.filter_hotels(region_hotels, requirements))
+    kept = [hotel for hotel in hotels if hotel["hid"] in kept_hids]
+    if len(kept) < request.top_hotels:
+        return hotels
+    return kept
+
+
+def _rank_locally(
+    request: HotelSearchRequest,
+    hotels: list[HotelFull],
+) -> ScoringResultDict:
+    """Rank hotels without LLM, in the shape of a scoring result."""
+    results = rank_hotels_locally(
+        hotels,
+        request.user_preferences,
+        min_price=request.min_price_per_night,
+        max_price=request.max_price_per_night,
+        top_count=request.top_hotels,
+    )
+    return {"results": results, "error": None, "estimated_tokens": 0, "rate_aliases": {}}
+
+
+def _client_hotel(hotel: HotelScored) -> dict[str, Any]:
+    """Return a scored hotel with its reviews in the ETG review shape clients expect."""
+    reviews = hotel["reviews"]
+    return {
+        **hotel,
+        "reviews": {**reviews, "reviews": [record.to_review() for record in reviews["reviews"]]},
+    }
+
+
+def _result_events(
+    request: HotelSearchRequest,
+    hotels: list[HotelFull],
+    results: list[HotelScoreDict],
+    rate_aliases: dict[str, dict[str, str]],
+) -> Iterator[SSEBaseEvent]:
+    """Yield final results: one DoneEvent, or hotel_result events and a bare done.
+
+    Events are built from our own data, so model_construct skips
+    re-validating the large hotel payloads.
+    """
+    scored_hotels = map(_client_hotel, iter_scored_hotels(hotels, results, rate_aliases))
+    if not request.stream_results:
+        hotels_list = list(scored_hotels)
+        yield DoneEvent.model_construct(total_scored=len(hotels_list), hotels=hotels_list)
+        return
+
+    total_scored = 0
+    for rank, hotel in enumerate(scored_hotels, start=1):
+        yield HotelResultEvent.model_construct(rank=rank, hotel=hotel)
+        total_scored = rank
+    yield DoneEvent.model_construct(total_scored=total_scored, hotels=[])
+
+
+async def _score_hotels(
+    request: HotelSearchRequest,
+    hotels: list[HotelFull],
+) -> ScoringResultDict:
+    """Run LLM scoring for hotels with the request's preferences and filters.
+
+    Cached review digests replace raw reviews where available; digests for
+    the remaining hotels are summarized in the background after scoring.
+    In fast mode hotels are ranked locally instead.
+    """
+    if request.fast_mode:
+        return _rank_locally(request, hotels)
+
+    review_digests = await load_review_digests(hotels) if REVIEW_DIGESTS_ENABLED else {}
+    async with llm_stage:
+        scoring_result = await score_hotels(
+            hotels,
+            request.user_preferences or DEFAULT_PREFERENCES,
+            guests=request.guests,
+            max_reviews=MAX_REVIEWS_PER_HOTEL,
+            review_text_max_length=REVIEW_TEXT_MAX_LENGTH,
+            min_price=request.min_price_per_night,
+            max_price=request.max_price_per_night,
+            currency=request.currency,
+            top_count=request.top_hotels,
+            review_digests=review_digests,
+        )
+    if REVIEW_DIGESTS_ENABLED and len(review_digests) < len(hotels):
+        schedule_digest_summaries(hotels)
+    return scoring_result
+
 
-async def search_stream(  # noqa: PLR0915
+async def _fetch_filtered_reviews(
+    etg_client: ETGClient,
+    hotel_ids: list[int],
+    language: str,
+) -> dict[int, HotelReviews]:
+    """Fetch reviews and keep the filtered ones; the raw payload is dropped on return."""
+    async with etg_stage:
+        reviews_payload = await batch_get_reviews(etg_client, hotel_ids, language)
+    return filter_reviews(reviews_payload)
+
+
+async def _presort(
+    request: HotelSearchRequest,
+    hotels: list[Hotel],
+    content_map: dict[int, HotelContent],
+    reviews_map: dict[int, HotelReviews],
+    hotel_regions: dict[int, int],
+) -> tuple[list[HotelFull], PresortDoneEvent]:
+    """Combine hotel data and keep the presorted top for scoring.
+
+    Combined data of the other hotels is dropped on return.
+    """
+    combined_hotels = combine_hotels_data(hotels, content_map, reviews_map)
+    eligible_hotels = _drop_unmet_requirements(request, combined_hotels, hotel_regions)
+    similarities = await _preference_similarities(request, eligible_hotels)
+    top_hotels = presort_hotels(
+        eligible_hotels, reviews_map, limit=PRESORT_LIMIT, similarities=similarities
+    )
+    return top_hotels, PresortDoneEvent(
+        input_hotels=len(combined_hotels),
+        output_hotels=len(top_hotels),
+        dropped_by_requirements=len(combined_hotels) - len(eligible_hotels),
+    )
+
+
+async def _pipeline_events(  # noqa: C901, PLR0915
     request: HotelSearchRequest,
     etg_client: ETGClient,
-) -> AsyncIterator[str]:
-    """Execute the full hotel search pipeline, yielding SSE events."""
+) -> AsyncGenerator[SSEBaseEvent]:
+    """Execute the full hotel search pipeline, yielding event payloads.
+
+    Each phase hands only what the next one needs over to it, and the
+    generator drops its references to earlier data, so raw search results,
+    content and reviews of hotels that did not make the presort are not
+    kept alive through the LLM scoring wait.
+    """
     # Extract request fields
     region_id = request.region_id
     checkin = request.checkin
@@ -61,11 +265,10 @@ async def search_stream(  # noqa: PLR0915
     min_price_per_night = request.min_price_per_night
     max_price_per_night = request.max_price_per_night
     user_preferences = request.user_preferences
-    top_hotels_count = request.top_hotels
 
     try:
         # Phase 1: Search hotels
-        yield sse_event(sse_message(HotelSearchStartEvent(
+        yield HotelSearchStartEvent(
             region_id=region_id,
             checkin=checkin,
             checkout=checkout,
@@ -76,11 +279,17 @@ async def search_stream(  # noqa: PLR0915
             min_price_per_night=min_price_per_night,
             max_price_per_night=max_price_per_night,
             user_preferences=user_preferences,
-        )))
+        )
 
-        # Search hotels in region
-        search_results = await etg_client.search_hotels_by_region(
-            region_id=region_id,
+        # Search hotels in regions, filtering by price as each region arrives
+        region_ids = [region_id, *request.additional_region_ids]
+        total_available = 0
+        filtered_hotels: list[Hotel] = []
+        # Region of hotels found in additional regions, for amenity indexes
+        hotel_regions: dict[int, int] = {}
+        async for region_results in iter_search_regions_cached(
+            etg_client,
+            region_ids=region_ids,
             checkin=checkin.isoformat(),
             checkout=checkout.isoformat(),
             residency=residency,
@@ -88,118 +297,357 @@ async def search_stream(  # noqa: PLR0915
             currency=currency,
             language=language,
             hotels_limit=HOTELS_SEARCH_LIMIT,
-        )
-        all_hotels = search_results.get("hotels", [])
-        total_available = search_results.get("total_hotels", len(all_hotels))
-
-        # Filter by price
-        filtered_hotels = filter_hotels_by_price(
-            all_hotels, min_price_per_night, max_price_per_night
-        )
+        ):
+            total_available += region_results["total_hotels"]
+            region_hotels = filter_hotels_by_price(
+                region_results["hotels"], min_price_per_night, max_price_per_night
+            )
+            if region_results["region_id"] != region_id:
+                hotel_regions.update(
+                    (hotel["hid"], region_results["region_id"]) for hotel in region_hotels
+                )
+            filtered_hotels.extend(region_hotels)
+            if len(region_ids) > 1:
+                yield HotelSearchRegionDoneEvent(
+                    region_id=region_results["region_id"],
+                    total_available=region_results["total_hotels"],
+                    new_hotels=len(region_results["hotels"]),
+                    total_after_filter=len(filtered_hotels),
+                )
+            # Loop variables would otherwise keep the last region's results
+            del region_results, region_hotels
         total_after_filter = len(filtered_hotels)
 
-        sample_result = sample_hotels(filtered_hotels)
+        sample_result = sample_hotels(
+            filtered_hotels,
+            min_price=min_price_per_night,
+            max_price=max_price_per_night,
+            seed=request.seed,
+        )
         hotels = sample_result["hotels"]
         sampled = sample_result["sampled"]
-        yield sse_event(sse_message(HotelSearchDoneEvent(
+        del filtered_hotels, sample_result
+        hotel_regions = {
+            hotel["hid"]: hotel_regions[hotel["hid"]]
+            for hotel in hotels
+            if hotel["hid"] in hotel_regions
+        }
+        yield HotelSearchDoneEvent(
             total_available=total_available,
             total_after_filter=total_after_filter,
             sampled=sampled,
-        )))
+        )
 
         # Early exit if no hotels found
         if not hotels:
-            yield sse_event(sse_message(DoneEvent(total_scored=0, hotels=[])))
+            yield DoneEvent(total_scored=0, hotels=[])
+            return
+
+        if request.pipelined:
+            pipelined_events = _pipelined_events(request, etg_client, hotels, hotel_regions)
+            del hotels
+            async for event in pipelined_events:
+                yield event
             return
 
         # Phase 2: Fetch content
         hotel_ids = [hotel["hid"] for hotel in hotels]
         total_batches = (len(hotel_ids) + CONTENT_BATCH_SIZE - 1) // CONTENT_BATCH_SIZE
-        yield sse_event(sse_message(BatchGetContentStartEvent(
+        yield BatchGetContentStartEvent(
             total_hotels=len(hotel_ids),
             total_batches=total_batches,
-        )))
-        content_map = await batch_get_content(etg_client, hotel_ids, language)
-        yield sse_event(sse_message(BatchGetContentDoneEvent(
+        )
+        async with etg_stage:
+            content_map = await batch_get_content(etg_client, hotel_ids, language)
+        yield BatchGetContentDoneEvent(
             hotels_with_content=len(content_map),
             total_hotels=len(hotel_ids),
-        )))
+        )
 
         # Phase 3: Fetch reviews
         reviews_batch_count = (len(hotel_ids) + REVIEWS_BATCH_SIZE - 1) // REVIEWS_BATCH_SIZE
-        yield sse_event(sse_message(BatchGetReviewsStartEvent(
+        yield BatchGetReviewsStartEvent(
             total_hotels=len(hotel_ids),
             total_batches=reviews_batch_count,
-        )))
-        reviews_payload = await batch_get_reviews(etg_client, hotel_ids, language)
-        reviews_map = filter_reviews(reviews_payload)
-        yield sse_event(sse_message(BatchGetReviewsDoneEvent(
+        )
+        reviews_map = await _fetch_filtered_reviews(etg_client, hotel_ids, language)
+        yield BatchGetReviewsDoneEvent(
             hotels_with_reviews=len(reviews_map),
             total_hotels=len(hotel_ids),
-        )))
+        )
 
         # Phase 4: Presort
-        combined_hotels = combine_hotels_data(hotels, content_map, reviews_map)
-        top_hotels = presort_hotels(combined_hotels, reviews_map, limit=PRESORT_LIMIT)
-
-        yield sse_event(sse_message(PresortDoneEvent(
-            input_hotels=len(combined_hotels),
-            output_hotels=len(top_hotels),
-        )))
+        top_hotels, presort_event = await _presort(
+            request, hotels, content_map, reviews_map, hotel_regions
+        )
+        # Only the presorted hotels are needed from here on
+        del hotels, hotel_ids, content_map, reviews_map
+        yield presort_event
 
         # Phase 5: LLM Scoring
-        scoring_preferences = user_preferences or DEFAULT_PREFERENCES
-        yield sse_event(sse_message(ScoringStartEvent(
+        yield ScoringStartEvent(
             total_hotels=len(top_hotels),
-        )))
-
-        scoring_result = await score_hotels(
-            top_hotels,
-            scoring_preferences,
-            guests=guests,
-            max_reviews=MAX_REVIEWS_PER_HOTEL,
-            review_text_max_length=REVIEW_TEXT_MAX_LENGTH,
-            min_price=min_price_per_night,
-            max_price=max_price_per_night,
-            currency=currency,
-            top_count=top_hotels_count,
         )
 
+        scoring_result = await _score_hotels(request, top_hotels)
+
         if scoring_result["error"]:
-            yield sse_event(sse_message(ErrorEvent(
-                error_type="ScoringError",
+            yield ScoringFallbackEvent(
                 error_message=scoring_result["error"],
-            )))
-            return
+            )
+            scoring_result = _rank_locally(request, top_hotels)
 
-        yield sse_event(sse_message(ScoringDoneEvent(
+        yield ScoringDoneEvent(
             scored_count=len(scoring_result["results"]),
-        )))
+        )
 
         # Finalize and yield results
-        scored_hotels = finalize_scored_hotels(top_hotels, scoring_result["results"])
-        yield sse_event(sse_message(DoneEvent(
-            total_scored=len(scored_hotels),
-            hotels=cast("list[dict[str, Any]]", scored_hotels),
-        )))
+        for event in _result_events(
+            request, top_hotels, scoring_result["results"], scoring_result["rate_aliases"]
+        ):
+            yield event
 
     except ETGAPIError as e:
-        yield sse_event(sse_message(ErrorEvent(
+        yield ErrorEvent(
             error_type="ETGAPIError",
             error_message=str(e),
-        )))
+        )
     except ETGNetworkError as e:
-        yield sse_event(sse_message(ErrorEvent(
+        yield ErrorEvent(
             error_type="ETGNetworkError",
             error_message=str(e),
-        )))
+        )
     except httpx.HTTPError as e:
-        yield sse_event(sse_message(ErrorEvent(
+        yield ErrorEvent(
             error_type="HTTPError",
             error_message=str(e),
-        )))
+        )
     except ValidationError as e:
-        yield sse_event(sse_message(ErrorEvent(
+        yield ErrorEvent(
             error_type="ValidationError",
             error_message=str(e),
-        )))
+        )
+
+
+async def _fetch_pipeline_batch(
+    etg_client: ETGClient,
+    hotels: list[Hotel],
+    language: str,
+    semaphore: asyncio.Semaphore,
+) -> tuple[list[Hotel], dict[int, HotelContent], dict[int, HotelReviews]]:
+    """Fetch content and reviews for one batch concurrently."""
+    hotel_ids = [hotel["hid"] for hotel in hotels]
+    async with semaphore, etg_stage:
+        content_map, raw_reviews = await asyncio.gather(
+            fetch_content_batch(etg_client, hotel_ids, language),
+            fetch_reviews_batch(etg_client, hotel_ids, get_review_languages(language)),
+        )
+    reviews_map = filter_reviews(aggregate_reviews(raw_reviews))
+    return hotels, content_map, reviews_map
+
+
+def _shard_winners(
+    candidates: list[HotelFull],
+    results: list[HotelScoreDict],
+) -> list[HotelFull]:
+    """Return the candidates that made the top of their shard, in presort order."""
+    winner_ids = {result["hotel_id"] for result in results}
+    return [hotel for hotel in candidates if hotel["id"] in winner_ids]
+
+
+async def _rescore_shard_winners(
+    request: HotelSearchRequest,
+    finalists: list[HotelFull],
+) -> ScoringResultDict | None:
+    """Score the winners of all shards in one call, or None if it fails.
+
+    Scores from separate LLM calls are not calibrated against each other,
+    so shard results are not ranked by their raw scores. The final call is
+    small (top_hotels per shard). If it fails, the caller falls back to
+    merging the shard results by score.
+    """
+    final_result = await _score_hotels(request, finalists)
+    if not final_result["results"]:
+        logger.warning(
+            "[pipeline] rescoring %d shard winners failed, merging shards by score: %s",
+            len(finalists),
+            final_result["error"],
+        )
+        return None
+    return final_result
+
+
+async def _pipelined_events(  # noqa: PLR0915
+    request: HotelSearchRequest,
+    etg_client: ETGClient,
+    hotels: list[Hotel],
+    hotel_regions: dict[int, int],
+) -> AsyncIterator[SSEBaseEvent]:
+    """Run phases 2-5 as overlapping stages.
+
+    Content and reviews are fetched in small concurrent batches. Each finished
+    batch is presorted on its own with a proportional share of PRESORT_LIMIT,
+    and its candidates are queued for scoring. A scoring shard starts as soon
+    as SCORING_SHARD_SIZE candidates are queued. Hotels of a failed shard are
+    ranked locally instead, and the winners of all shards are rescored
+    together at the end (see _rescore_shard_winners).
+    """
+    language = request.language or "ru"
+    total_hotels = len(hotels)
+    semaphore = asyncio.Semaphore(PIPELINE_MAX_CONCURRENT_BATCHES)
+    fetch_tasks = [
+        asyncio.create_task(
+            _fetch_pipeline_batch(
+                etg_client, hotels[i : i + PIPELINE_BATCH_SIZE], language, semaphore
+            )
+        )
+        for i in range(0, total_hotels, PIPELINE_BATCH_SIZE)
+    ]
+    total_batches = len(fetch_tasks)
+    # Batches are owned by their fetch tasks from here on
+    del hotels
+    shard_tasks: list[asyncio.Task[ScoringResultDict]] = []
+    shard_hotels: list[list[HotelFull]] = []
+
+    try:
+        candidates: list[HotelFull] = []
+        pending: list[HotelFull] = []
+        input_hotels = 0
+        dropped_hotels = 0
+
+        for batch_number, next_batch in enumerate(asyncio.as_completed(fetch_tasks), start=1):
+            batch_hotels, content_map, reviews_map = await next_batch
+            combined_hotels = combine_hotels_data(batch_hotels, content_map, reviews_map)
+            input_hotels += len(combined_hotels)
+            eligible_hotels = _drop_unmet_requirements(request, combined_hotels, hotel_regions)
+            dropped_hotels += len(combined_hotels) - len(eligible_hotels)
+            # Cumulative quota keeps the total at PRESORT_LIMIT across batches
+            quota = math.ceil(PRESORT_LIMIT * input_hotels / total_hotels) - len(candidates)
+            similarities = await _preference_similarities(request, eligible_hotels)
+            batch_candidates = presort_hotels(
+                eligible_hotels, reviews_map, limit=quota, similarities=similarities
+            )
+            candidates.extend(batch_candidates)
+            pending.extend(batch_candidates)
+
+            yield PipelineBatchDoneEvent(
+                batch=batch_number,
+                total_batches=total_batches,
+                hotels_with_content=len(content_map),
+                hotels_with_reviews=len(reviews_map),
+                candidates=len(candidates),
+            )
+
+            # Rebound by the next batch, but the last one would outlive the loop
+            del batch_hotels, content_map, reviews_map, combined_hotels, eligible_hotels
+
+            is_last_batch = batch_number == total_batches
+            while len(pending) >= SCORING_SHARD_SIZE or (pending and is_last_batch):
+                shard, pending = pending[:SCORING_SHARD_SIZE], pending[SCORING_SHARD_SIZE:]
+                shard_tasks.append(asyncio.create_task(_score_hotels(request, shard)))
+                shard_hotels.append(shard)
+                yield ScoringShardStartEvent(
+                    shard=len(shard_tasks),
+                    total_hotels=len(shard),
+                )
+
+        # Finished tasks keep their batch data as results
+        fetch_tasks.clear()
+        yield PresortDoneEvent(
+            input_hotels=input_hotels,
+            output_hotels=len(candidates),
+            dropped_by_requirements=dropped_hotels,
+        )
+
+        # Collect shard winners; a failed shard is ranked locally
+        results = []
+        rate_aliases: dict[str, dict[str, str]] = {}
+        last_error: str | None = None
+        failed_shards = 0
+        for shard_number, shard_task in enumerate(shard_tasks, start=1):
+            shard_result = await shard_task
+            yield ScoringShardDoneEvent(
+                shard=shard_number,
+                scored_count=len(shard_result["results"]),
+                error_message=shard_result["error"],
+            )
+            if not shard_result["results"] and shard_result["error"]:
+                last_error = shard_result["error"]
+                failed_shards += 1
+                shard_result = _rank_locally(request, shard_hotels[shard_number - 1])
+            results.extend(shard_result["results"])
+            rate_aliases.update(shard_result["rate_aliases"])
+        del shard_hotels
+
+        if last_error and failed_shards == len(shard_tasks):
+            yield ScoringFallbackEvent(
+                error_message=last_error,
+            )
+            results = _rank_locally(request, candidates)["results"]
+        elif len(shard_tasks) > 1:
+            finalists = _shard_winners(candidates, results)
+            yield ScoringStartEvent(
+                total_hotels=len(finalists),
+            )
+            final_result = await _rescore_shard_winners(request, finalists)
+            if final_result is not None:
+                results = final_result["results"]
+                rate_aliases.update(final_result["rate_aliases"])
+
+        results.sort(key=lambda result: result["score"], reverse=True)
+        results = results[: request.top_hotels]
+        yield ScoringDoneEvent(
+            scored_count=len(results),
+        )
+
+        for event in _result_events(request, candidates, results, rate_aliases):
+            yield event
+    finally:
+        for task in (*fetch_tasks, *shard_tasks):
+            task.cancel()
+
+
+async def _memory_traced_events(
+    request: HotelSearchRequest,
+    events: AsyncGenerator[SSEBaseEvent],
+) -> AsyncGenerator[SSEBaseEvent]:
+    """Sample traced memory after each pipeline event and log the request summary."""
+    start_memory_tracing()
+    probe = MemoryProbe(f"search region {request.region_id}")
+    async with contextlib.aclosing(events):
+        try:
+            async for event in events:
+                probe.sample(event.event_type.value)
+                yield event
+        finally:
+            probe.log_summary()
+
+
+def search_events(
+    request: HotelSearchRequest,
+    etg_client: ETGClient,
+) -> AsyncGenerator[SSEBaseEvent]:
+    """Execute the full hotel search pipeline, yielding event payloads.
+
+    With SEARCH_MEMORY_DEBUG the request's memory is sampled by stage.
+    """
+    events = _pipeline_events(request, etg_client)
+    if SEARCH_MEMORY_DEBUG:
+        return _memory_traced_events(request, events)
+    return events
+
+
+async def search_stream(
+    request: HotelSearchRequest,
+    etg_client: ETGClient,
+    admission: AdmissionController | None = None,
+) -> AsyncIterator[bytes]:
+    """Execute the full hotel search pipeline, yielding SSE events.
+
+    With an admission controller the pipeline waits for a free slot first,
+    reporting its queue position.
+    """
+    events = search_events(request, etg_client)
+    payloads = events if admission is None else admitted_events(admission, events)
+    async for payload in payloads:
+        yield encode_event(payload)
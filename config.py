@@ -1,6 +1,7 @@
 """Application configuration loaded from environment variables."""
 
 import os
+from pathlib import Path
 
 from dotenv import load_dotenv
 
@@ -15,6 +16,77 @@ ETG_REQUEST_TIMEOUT: float = float(os.environ.get("ETG_REQUEST_TIMEOUT", "30.0")
 GEMINI_API_KEY: str = os.environ.get("GEMINI_API_KEY", "")
 ANTHROPIC_API_KEY: str = os.environ.get("ANTHROPIC_API_KEY", "")
 SCORING_MODEL: str = os.environ.get("SCORING_MODEL", "gemini-3-flash-preview")
+# Target input cost of one scoring prompt in USD; the prompt token budget is
+# derived from it and the provider's input price. 0 (default) sets no cost
+# target, so hotel data is only trimmed to fit the model's context window
+SCORING_PROMPT_COST_USD: float = float(os.environ.get("SCORING_PROMPT_COST_USD", "0"))
+# Target prompt size in tokens; 0 derives it from SCORING_PROMPT_COST_USD
+SCORING_TOKEN_BUDGET: int = int(os.environ.get("SCORING_TOKEN_BUDGET", "0"))
+# Hotel data encoding in the scoring prompt: "json" or "compact"
+SCORING_PROMPT_ENCODING: str = os.environ.get("SCORING_PROMPT_ENCODING", "json")
+# Hedging: secondary model queried when the primary is slower than its
+# latency quantile (empty to disable); delays are in seconds
+SCORING_HEDGE_MODEL: str = os.environ.get("SCORING_HEDGE_MODEL", "")
+SCORING_HEDGE_QUANTILE: float = float(os.environ.get("SCORING_HEDGE_QUANTILE", "0.9"))
+SCORING_HEDGE_MIN_DELAY: float = float(os.environ.get("SCORING_HEDGE_MIN_DELAY", "5.0"))
+SCORING_HEDGE_DEFAULT_DELAY: float = float(os.environ.get("SCORING_HEDGE_DEFAULT_DELAY", "30.0"))
+
+# Review digests: background LLM summaries of reviews (opt-in, they cost
+# up to REVIEW_DIGEST_MAX_PER_HOUR LLM calls per worker and hour)
+REVIEW_DIGESTS_ENABLED: bool = os.environ.get("REVIEW_DIGESTS_ENABLED", "0") == "1"
+REVIEW_DIGEST_MODEL: str = os.environ.get("REVIEW_DIGEST_MODEL", SCORING_MODEL)
+REVIEW_DIGEST_CACHE_PATH: str = os.environ.get(
+    "REVIEW_DIGEST_CACHE_PATH", ".cache/review_digests.sqlite3"
+)
+# Cap on review digest LLM calls per worker and hour
+REVIEW_DIGEST_MAX_PER_HOUR: int = int(os.environ.get("REVIEW_DIGEST_MAX_PER_HOUR", "200"))
+
+# Embedding pre-ranking of hotels against preferences (needs the
+# "embeddings" extra)
+EMBEDDINGS_ENABLED: bool = os.environ.get("EMBEDDINGS_ENABLED", "0") == "1"
+EMBEDDING_MODEL: str = os.environ.get(
+    "EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+)
+EMBEDDING_CACHE_DIR: str = os.environ.get("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+
+# Local region index imported from the ETG region dump
+REGION_INDEX_PATH: str = os.environ.get("REGION_INDEX_PATH", ".cache/regions.sqlite3")
+
+# Local hotel content store imported from ETG hotel dumps
+CONTENT_STORE_PATH: str = os.environ.get("CONTENT_STORE_PATH", ".cache/hotel_content.sqlite3")
+
+# Admission control: searches running at once per worker, searches waiting
+# for a slot (more are rejected with 503), and process-wide limits on
+# concurrent ETG fetch phases and LLM scoring calls
+MAX_ACTIVE_SEARCHES: int = int(os.environ.get("MAX_ACTIVE_SEARCHES", "8"))
+MAX_QUEUED_SEARCHES: int = int(os.environ.get("MAX_QUEUED_SEARCHES", "32"))
+ETG_STAGE_CONCURRENCY: int = int(os.environ.get("ETG_STAGE_CONCURRENCY", "16"))
+LLM_STAGE_CONCURRENCY: int = int(os.environ.get("LLM_STAGE_CONCURRENCY", "8"))
+
+# Seconds without SSE events before a ": ping" comment is sent; the client
+# connection is checked at each ping and the search cancelled if it is gone
+SSE_HEARTBEAT_INTERVAL: float = float(os.environ.get("SSE_HEARTBEAT_INTERVAL", "10.0"))
+
+# Response compression (SSE frames are flushed individually); smaller
+# non-streaming responses are sent uncompressed
+COMPRESSION_MIN_SIZE: int = int(os.environ.get("COMPRESSION_MIN_SIZE", "500"))
+
+# Cache shared by all uvicorn workers of the host (SQLite on tmpfs when
+# available): content, reviews, SERP and scoring results
+SHARED_CACHE_ENABLED: bool = os.environ.get("SHARED_CACHE_ENABLED", "1") == "1"
+_SHM_DIR = Path("/dev/shm")  # noqa: S108 - tmpfs visible to all workers
+SHARED_CACHE_PATH: str = os.environ.get(
+    "SHARED_CACHE_PATH",
+    str(_SHM_DIR / "frozen" / "shared_cache.sqlite3")
+    if _SHM_DIR.is_dir()
+    else ".cache/shared_cache.sqlite3",
+)
+SHARED_CACHE_MAX_MB: int = int(os.environ.get("SHARED_CACHE_MAX_MB", "512"))
+
+# Debug: trace allocations with tracemalloc and log each search's memory
+# peak by pipeline stage (slows every allocation; meant for one search at
+# a time, since traced memory is process-wide)
+SEARCH_MEMORY_DEBUG: bool = os.environ.get("SEARCH_MEMORY_DEBUG", "0") == "1"
 
 # CORS
 CORS_ORIGINS: list[str] = [
@@ -37,7 +37,7 @@ fi
 gcloud config set project "$GCP_PROJECT" --quiet
 
 # Sync code
-echo -e "${YELLOW}[1/4] Syncing code...${NC}"
+echo -e "${YELLOW}[1/5] Syncing code...${NC}"
 tar czf - --no-xattrs \
   --exclude=".git" \
   --exclude=".venv" \
@@ -45,6 +45,7 @@ tar czf - --no-xattrs \
   --exclude="*.pyc" \
   --exclude=".mypy_cache" \
   --exclude=".ruff_cache" \
+  --exclude=".cache" \
   --exclude=".ipynb_checkpoints" \
   --exclude="*.ipynb" \
   --exclude=".DS_Store" \
@@ -53,21 +54,28 @@ tar czf - --no-xattrs \
   --command="mkdir -p ${DEPLOY_PATH} && cd ${DEPLOY_PATH} && tar xzf -"
 
 # Install deps
-echo -e "${YELLOW}[2/4] Installing dependencies...${NC}"
+echo -e "${YELLOW}[2/5] Installing dependencies...${NC}"
 gcloud compute ssh "${VM_USER}@${VM_NAME}" \
   --zone="$GCP_ZONE" \
   --command="cd ${DEPLOY_PATH} && ~/.local/bin/uv sync --frozen" \
   --quiet
 
+# Gate on worker startup time, before the running service is touched
+echo -e "${YELLOW}[3/5] Checking import time...${NC}"
+gcloud compute ssh "${VM_USER}@${VM_NAME}" \
+  --zone="$GCP_ZONE" \
+  --command="cd ${DEPLOY_PATH} && ~/.local/bin/uv run --frozen python -m utils.importtime api" \
+  --quiet
+
 # Update service
-echo -e "${YELLOW}[3/4] Updating service...${NC}"
+echo -e "${YELLOW}[4/5] Updating service...${NC}"
 gcloud compute ssh "${VM_USER}@${VM_NAME}" \
   --zone="$GCP_ZONE" \
   --command="sudo cp ${DEPLOY_PATH}/frozen-api.service /etc/systemd/system/ && sudo systemctl daemon-reload" \
   --quiet
 
 # Restart
-echo -e "${YELLOW}[4/4] Restarting...${NC}"
+echo -e "${YELLOW}[5/5] Restarting...${NC}"
 gcloud compute ssh "${VM_USER}@${VM_NAME}" \
   --zone="$GCP_ZONE" \
   --command="sudo systemctl restart ${SERVICE_NAME} && sleep 2 && sudo systemctl status ${SERVICE_NAME} --no-pager -l" \
@@ -10,6 +10,7 @@ from .types import (
     HotelRate,
     HotelReviews,
     Region,
+    RegionSearchResults,
     Review,
     SearchResults,
 )
@@ -27,6 +28,7 @@ __all__ = [
     "HotelRate",
     "HotelReviews",
     "Region",
+    "RegionSearchResults",
     "Review",
     "SearchResults",
 ]
@@ -6,8 +6,10 @@ Uses httpx.AsyncClient for HTTP requests with Basic Authentication.
 API Documentation: https://docs.emergingtravel.com/docs/
 """
 
+import asyncio
 import logging
 import time
+from collections.abc import AsyncIterator
 from typing import Any, Self, cast
 
 import httpx
@@ -27,6 +29,7 @@ from .types import (
     HotelContent,
     HotelReviews,
     Region,
+    RegionSearchResults,
     SearchResults,
 )
 
@@ -242,6 +245,71 @@ class ETGClient:
             return {"hotels": [], "total_hotels": 0}
         return cast("SearchResults", data)
 
+    async def iter_search_hotels_by_regions(  # noqa: PLR0913
+        self,
+        region_ids: list[int],
+        *,
+        checkin: str,
+        checkout: str,
+        residency: str,
+        guests: list[GuestRoom],
+        currency: str | None = None,
+        language: str | None = None,
+        hotels_limit: int | None = None,
+    ) -> AsyncIterator[RegionSearchResults]:
+        """Search several regions concurrently, yielding results as they arrive.
+
+        Hotels are deduplicated by hid across regions: each hotel is yielded
+        once, with the first region that returned it, and is counted in that
+        region's total_hotels only. If a region search fails, the remaining
+        searches are cancelled and the error is raised.
+
+        Args:
+            region_ids: Region identifiers.
+            checkin: Check-in date (YYYY-MM-DD).
+            checkout: Check-out date (YYYY-MM-DD).
+            residency: Guest residency country code (ISO 3166-1 alpha-2).
+            guests: List of room configurations with adults/children.
+            currency: Price currency code (ISO 4217).
+            language: Response language code (ISO 639-1).
+            hotels_limit: Maximum number of hotels per region.
+
+        Yields:
+            Results per region in completion order.
+        """
+
+        async def search(region_id: int) -> tuple[int, SearchResults]:
+            results = await self.search_hotels_by_region(
+                region_id=region_id,
+                checkin=checkin,
+                checkout=checkout,
+                residency=residency,
+                guests=guests,
+                currency=currency,
+                language=language,
+                hotels_limit=hotels_limit,
+            )
+            return region_id, results
+
+        tasks = [asyncio.create_task(search(region_id)) for region_id in dict.fromkeys(region_ids)]
+        seen_hids: set[int] = set()
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                region_id, results = await next_result
+                hotels = results.get("hotels", [])
+                new_hotels = [hotel for hotel in hotels if hotel["hid"] not in seen_hids]
+                seen_hids.update(hotel["hid"] for hotel in new_hotels)
+                # Only returned hotels can be matched; ones beyond hotels_limit are not
+                duplicates = len(hotels) - len(new_hotels)
+                yield {
+                    "region_id": region_id,
+                    "hotels": new_hotels,
+                    "total_hotels": results.get("total_hotels", len(hotels)) - duplicates,
+                }
+        finally:
+            for task in tasks:
+                task.cancel()
+
     async def get_hotel_reviews(
         self,
         hotel_ids: list[int],
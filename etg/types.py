@@ -187,6 +187,18 @@ class SearchResults(TypedDict):
     total_hotels: int
 
 
+class RegionSearchResults(TypedDict):
+    """Hotel search results of one region in a multi-region search.
+
+    hotels contains only hotels not returned for previous regions, and
+    total_hotels excludes them too, so totals add up to distinct hotels.
+    """
+
+    region_id: int
+    hotels: list[Hotel]
+    total_hotels: int
+
+
 # =============================================================================
 # Response Types — Reviews
 # =============================================================================
@@ -1,59 +1,246 @@
-"""Business logic services for hotel search."""
-
-from .hotels import (
-    CONTENT_BATCH_SIZE,
-    HotelFull,
-    HotelScored,
-    SampleHotelsResult,
-    batch_get_content,
-    calculate_prescore,
-    combine_hotels_data,
-    filter_hotels_by_price,
-    filter_rates_by_price,
-    finalize_scored_hotels,
-    get_hotel_price_per_night,
-    get_rate_price_per_night,
-    presort_hotels,
-    sample_hotels,
-)
-from .llm_providers import estimate_tokens
-from .reviews import (
-    REVIEWS_BATCH_SIZE,
-    DetailedAverages,
-    HotelReviews,
-    batch_get_reviews,
-    filter_reviews,
-)
-from .scoring import (
-    HotelScoreDict,
-    ScoringResultDict,
-    prepare_hotel_for_llm,
-    score_hotels,
-)
+"""Business logic services for hotel search.
+
+Submodules are imported on first access to one of their names (PEP 562),
+so a worker or CLI that needs one service does not load the LLM provider
+stacks, numpy and SQLite stores behind the others.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .amenity_index import AmenityIndex, get_region_amenity_index
+    from .content_store import ContentStore, get_content_store
+    from .embeddings import EmbeddingStore, PreferenceRanker, get_preference_ranker
+    from .fallback import rank_hotels_locally
+    from .hedging import HedgeStats, get_hedge_stats
+    from .hotels import (
+        CONTENT_BATCH_SIZE,
+        HotelFull,
+        HotelScored,
+        SampleHotelsResult,
+        batch_get_content,
+        calculate_prescore,
+        calculate_sampling_score,
+        combine_hotels_data,
+        fetch_content_batch,
+        filter_hotels_by_price,
+        filter_rates_by_price,
+        finalize_scored_hotels,
+        get_hotel_price_per_night,
+        get_rate_price_per_night,
+        iter_scored_hotels,
+        iter_search_regions_cached,
+        presort_hotels,
+        sample_hotels,
+    )
+    from .llm_providers import close_agents, estimate_tokens, get_agent, get_token_budget
+    from .preferences import AmenityPreference, match_preferences, required_preferences
+    from .prompt_budget import PromptBudgetResult, fit_hotels_to_budget
+    from .prompt_encoding import EncodedHotels, PromptEncoding, encode_hotels
+    from .rating_table import RatingTable, build_rating_rows, get_rating_table
+    from .region_index import RegionIndex, open_region_index
+    from .regions import RegionSuggestCache, RegionTrie, normalize_query
+    from .review_digests import (
+        ReviewDigest,
+        ReviewDigestCache,
+        get_review_digest_cache,
+        is_digest_fresh,
+        load_review_digests,
+        schedule_digest_summaries,
+        summarize_missing_digests,
+    )
+    from .reviews import (
+        REVIEWS_BATCH_SIZE,
+        DetailedAverages,
+        HotelReviews,
+        ReviewRecord,
+        aggregate_reviews,
+        batch_get_reviews,
+        fetch_reviews_batch,
+        filter_reviews,
+        get_review_languages,
+    )
+    from .scoring import (
+        HotelScoreDict,
+        ScoringResultDict,
+        build_review_sample,
+        prepare_hotel_for_llm,
+        score_hotels,
+        warm_up_scoring_agent,
+    )
+    from .shared_cache import (
+        SharedCache,
+        cache_key,
+        get_shared_cache,
+        start_cache_eviction,
+        stop_cache_eviction,
+    )
+
+# Public names of each submodule
+_SUBMODULE_EXPORTS: dict[str, tuple[str, ...]] = {
+    "amenity_index": ("AmenityIndex", "get_region_amenity_index"),
+    "content_store": ("ContentStore", "get_content_store"),
+    "embeddings": ("EmbeddingStore", "PreferenceRanker", "get_preference_ranker"),
+    "fallback": ("rank_hotels_locally",),
+    "hedging": ("HedgeStats", "get_hedge_stats"),
+    "hotels": (
+        "CONTENT_BATCH_SIZE",
+        "HotelFull",
+        "HotelScored",
+        "SampleHotelsResult",
+        "batch_get_content",
+        "calculate_prescore",
+        "calculate_sampling_score",
+        "combine_hotels_data",
+        "fetch_content_batch",
+        "filter_hotels_by_price",
+        "filter_rates_by_price",
+        "finalize_scored_hotels",
+        "get_hotel_price_per_night",
+        "get_rate_price_per_night",
+        "iter_scored_hotels",
+        "iter_search_regions_cached",
+        "presort_hotels",
+        "sample_hotels",
+    ),
+    "llm_providers": ("close_agents", "estimate_tokens", "get_agent", "get_token_budget"),
+    "preferences": ("AmenityPreference", "match_preferences", "required_preferences"),
+    "prompt_budget": ("PromptBudgetResult", "fit_hotels_to_budget"),
+    "prompt_encoding": ("EncodedHotels", "PromptEncoding", "encode_hotels"),
+    "rating_table": ("RatingTable", "build_rating_rows", "get_rating_table"),
+    "region_index": ("RegionIndex", "open_region_index"),
+    "regions": ("RegionSuggestCache", "RegionTrie", "normalize_query"),
+    "review_digests": (
+        "ReviewDigest",
+        "ReviewDigestCache",
+        "get_review_digest_cache",
+        "is_digest_fresh",
+        "load_review_digests",
+        "schedule_digest_summaries",
+        "summarize_missing_digests",
+    ),
+    "reviews": (
+        "REVIEWS_BATCH_SIZE",
+        "DetailedAverages",
+        "HotelReviews",
+        "ReviewRecord",
+        "aggregate_reviews",
+        "batch_get_reviews",
+        "fetch_reviews_batch",
+        "filter_reviews",
+        "get_review_languages",
+    ),
+    "scoring": (
+        "HotelScoreDict",
+        "ScoringResultDict",
+        "build_review_sample",
+        "prepare_hotel_for_llm",
+        "score_hotels",
+        "warm_up_scoring_agent",
+    ),
+    "shared_cache": (
+        "SharedCache",
+        "cache_key",
+        "get_shared_cache",
+        "start_cache_eviction",
+        "stop_cache_eviction",
+    ),
+}
+_EXPORTS = {name: module for module, names in _SUBMODULE_EXPORTS.items() for name in names}
 
 __all__ = [
     "CONTENT_BATCH_SIZE",
     "REVIEWS_BATCH_SIZE",
+    "AmenityIndex",
+    "AmenityPreference",
+    "ContentStore",
     "DetailedAverages",
+    "EmbeddingStore",
+    "EncodedHotels",
+    "HedgeStats",
     "HotelFull",
     "HotelReviews",
     "HotelScoreDict",
     "HotelScored",
+    "PreferenceRanker",
+    "PromptBudgetResult",
+    "PromptEncoding",
+    "RatingTable",
+    "RegionIndex",
+    "RegionSuggestCache",
+    "RegionTrie",
+    "ReviewDigest",
+    "ReviewDigestCache",
+    "ReviewRecord",
     "SampleHotelsResult",
     "ScoringResultDict",
+    "SharedCache",
+    "aggregate_reviews",
     "batch_get_content",
     "batch_get_reviews",
+    "build_rating_rows",
+    "build_review_sample",
+    "cache_key",
     "calculate_prescore",
+    "calculate_sampling_score",
+    "close_agents",
     "combine_hotels_data",
+    "encode_hotels",
     "estimate_tokens",
+    "fetch_content_batch",
+    "fetch_reviews_batch",
     "filter_hotels_by_price",
     "filter_rates_by_price",
     "filter_reviews",
     "finalize_scored_hotels",
+    "fit_hotels_to_budget",
+    "get_agent",
+    "get_content_store",
+    "get_hedge_stats",
     "get_hotel_price_per_night",
+    "get_preference_ranker",
     "get_rate_price_per_night",
+    "get_rating_table",
+    "get_region_amenity_index",
+    "get_review_digest_cache",
+    "get_review_languages",
+    "get_shared_cache",
+    "get_token_budget",
+    "is_digest_fresh",
+    "iter_scored_hotels",
+    "iter_search_regions_cached",
+    "load_review_digests",
+    "match_preferences",
+    "normalize_query",
+    "open_region_index",
     "prepare_hotel_for_llm",
     "presort_hotels",
+    "rank_hotels_locally",
+    "required_preferences",
     "sample_hotels",
+    "schedule_digest_summaries",
     "score_hotels",
+    "start_cache_eviction",
+    "stop_cache_eviction",
+    "summarize_missing_digests",
+    "warm_up_scoring_agent",
 ]
+
+
+def __getattr__(name: str) -> object:
+    """Import the submodule defining name on first access."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """List module attributes including not yet imported public names."""
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,125 @@
+"""Per-region inverted index of hotel amenities for hard-requirement filtering.
+
+Each indexed hotel gets a bit position; every amenity token maps to a
+bitset (a Python int) of the hotels that have it. Tokens are the serp
+filters a hotel satisfies (from serp_filters, metapolicy_struct and
+amenity_groups names, see services.preferences) plus normalized raw
+amenity names. Hotels that certainly lack a required amenity are found
+with a few bitwise operations instead of scanning content per request.
+
+A hotel is indexed once, so a region's index is rebuilt from scratch
+after AMENITY_INDEX_TTL_SECONDS: changed hotel content is picked up and
+hotels no longer found in searches are dropped.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from .preferences import AMENITY_PREFERENCES, hotel_amenity_text, hotel_has_amenity
+
+if TYPE_CHECKING:
+    from .hotels import HotelFull
+    from .preferences import AmenityPreference
+
+MAX_INDEXED_REGIONS = 64
+AMENITY_INDEX_TTL_SECONDS = 3600.0
+
+# Token marking hotels whose amenities are known; hotels without content are
+# never dropped, since missing data does not mean a missing amenity.
+CONTENT_KNOWN = "__known__"
+
+
+def hotel_amenity_tokens(hotel: HotelFull) -> set[str]:
+    """Return amenity tokens of a hotel, or an empty set if it has no content."""
+    amenity_names = [
+        amenity.strip().lower()
+        for group in hotel.get("amenity_groups") or []
+        for amenity in group.get("amenities") or []
+    ]
+    serp_filters = hotel.get("serp_filters") or []
+    if not amenity_names and not serp_filters:
+        return set()
+
+    amenity_text = hotel_amenity_text(hotel)
+    tokens = {CONTENT_KNOWN, *serp_filters, *(f"amenity:{name}" for name in amenity_names)}
+    tokens.update(
+        pref.serp_filter
+        for pref in AMENITY_PREFERENCES
+        if hotel_has_amenity(hotel, pref, amenity_text)
+    )
+    return tokens
+
+
+class AmenityIndex:
+    """Inverted index from amenity tokens to bitsets of hids."""
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self.created_at = time.monotonic()
+        self._bits: dict[int, int] = {}
+        self._postings: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed hotels."""
+        return len(self._bits)
+
+    def add_hotels(self, hotels: list[HotelFull]) -> None:
+        """Index hotels that are not indexed yet."""
+        for hotel in hotels:
+            hid = hotel["hid"]
+            if hid in self._bits:
+                continue
+            bit = 1 << len(self._bits)
+            self._bits[hid] = bit
+            for token in hotel_amenity_tokens(hotel):
+                self._postings[token] = self._postings.get(token, 0) | bit
+
+    def hids_with(self, tokens: list[str]) -> set[int]:
+        """Return indexed hids with known amenities that have all tokens."""
+        mask = self._postings.get(CONTENT_KNOWN, 0)
+        for token in tokens:
+            mask &= self._postings.get(token, 0)
+        return {hid for hid, bit in self._bits.items() if mask & bit}
+
+    def filter_hotels(
+        self,
+        hotels: list[HotelFull],
+        requirements: list[AmenityPreference],
+    ) -> list[HotelFull]:
+        """Drop hotels with known amenities that lack any required one.
+
+        Hotels must have been added with add_hotels first; unknown hotels and
+        hotels without amenity data are kept.
+        """
+        if not requirements:
+            return hotels
+        violating = self._postings.get(CONTENT_KNOWN, 0)
+        satisfying = violating
+        for requirement in requirements:
+            satisfying &= self._postings.get(requirement.serp_filter, 0)
+        violating &= ~satisfying
+        return [hotel for hotel in hotels if not violating & self._bits.get(hotel["hid"], 0)]
+
+
+_region_indexes: OrderedDict[int, AmenityIndex] = OrderedDict()
+
+
+def get_region_amenity_index(region_id: int) -> AmenityIndex:
+    """Return the process-wide amenity index of a region (LRU over regions).
+
+    An index older than AMENITY_INDEX_TTL_SECONDS is replaced by an empty one.
+    """
+    index = _region_indexes.get(region_id)
+    if index is not None and time.monotonic() - index.created_at > AMENITY_INDEX_TTL_SECONDS:
+        del _region_indexes[region_id]
+        index = None
+    if index is None:
+        index = _region_indexes[region_id] = AmenityIndex()
+        if len(_region_indexes) > MAX_INDEXED_REGIONS:
+            _region_indexes.popitem(last=False)
+    else:
+        _region_indexes.move_to_end(region_id)
+    return index
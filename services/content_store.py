@@ -0,0 +1,203 @@
+"""Local hotel content store built from ETG hotel static-data dumps.
+
+Dumps (JSON lines, one hotel per line, one file per language) are streamed
+into SQLite keyed by (hid, language), keeping only HotelContent fields.
+Incremental dumps upsert changed hotels and remove deleted ones. Content
+fetched from the API on a store miss is written back, so batch content
+lookups mostly stay local.
+
+Usage:
+    python -m services.content_store hotel_dump_ru.jsonl.zst --language ru [--full]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+from config import CONTENT_STORE_PATH
+from etg import HotelContent
+from utils.dumps import iter_dump_records
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+BUSY_TIMEOUT_MS = 1000
+
+CONTENT_FIELDS = frozenset(HotelContent.__required_keys__ | HotelContent.__optional_keys__)
+
+
+def _project_content(record: dict[str, Any]) -> dict[str, Any]:
+    """Keep only the HotelContent fields of a dump record."""
+    return {key: value for key, value in record.items() if key in CONTENT_FIELDS}
+
+
+class ContentStore:
+    """SQLite-backed hotel content keyed by (hid, language).
+
+    Methods are blocking; async code calls them through asyncio.to_thread.
+    Lookup and write-back errors are logged and read as misses, so a dump
+    import running in another process never fails a search.
+
+    Args:
+        path: Database file path; parent directories are created.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open (or create) the content database."""
+        db_path = Path(path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hotel_content ("
+            " hid INTEGER NOT NULL,"
+            " language TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (hid, language)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        """Return the number of stored (hid, language) entries."""
+        with self._lock:
+            return int(self._conn.execute("SELECT count(*) FROM hotel_content").fetchone()[0])
+
+    def get_many(self, hotel_ids: list[int], language: str) -> dict[int, HotelContent]:
+        """Return stored content for the hotels that are present."""
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT hid, content FROM hotel_content"
+                    " WHERE language = ? AND hid IN (SELECT value FROM json_each(?))",
+                    (language, json.dumps(hotel_ids)),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("[content_store] read failed: %s", e)
+            return {}
+        return {hid: cast("HotelContent", json.loads(content)) for hid, content in rows}
+
+    def put_many(self, contents: Iterable[HotelContent], language: str) -> None:
+        """Store content fetched from the API, replacing existing entries."""
+        now = time.time()
+        rows = [
+            (content["hid"], language, json.dumps(content, ensure_ascii=False), now)
+            for content in contents
+        ]
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO hotel_content VALUES (?, ?, ?, ?)", rows
+                )
+        except sqlite3.Error as e:
+            logger.warning("[content_store] write failed: %s", e)
+
+    def import_dump(
+        self,
+        records: Iterable[dict[str, Any]],
+        language: str,
+        *,
+        replace: bool = False,
+    ) -> tuple[int, int]:
+        """Upsert hotels from dump records, committing every IMPORT_BATCH_SIZE records.
+
+        Each batch is a short transaction, so searches reading or writing
+        back content are not blocked for the whole import. Readers see a
+        partially imported dump as misses for the hotels not written yet.
+
+        Args:
+            records: Parsed dump lines.
+            language: Language of the dump.
+            replace: Drop stored content of the language first (full dump).
+
+        Returns:
+            Numbers of upserted and deleted hotels.
+        """
+        upserted = deleted = 0
+        now = time.time()
+        if replace:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM hotel_content WHERE language = ?", (language,))
+        rows: list[tuple[int, str, str, float]] = []
+        removed: list[tuple[int, str]] = []
+        for record in records:
+            if record.get("deleted"):
+                removed.append((record["hid"], language))
+                deleted += 1
+            else:
+                content = json.dumps(_project_content(record), ensure_ascii=False)
+                rows.append((record["hid"], language, content, now))
+                upserted += 1
+            if len(rows) + len(removed) >= IMPORT_BATCH_SIZE:
+                self._write_batch(rows, removed)
+                rows, removed = [], []
+        self._write_batch(rows, removed)
+        return upserted, deleted
+
+    def _write_batch(
+        self,
+        rows: list[tuple[int, str, str, float]],
+        removed: list[tuple[int, str]],
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO hotel_content VALUES (?, ?, ?, ?)", rows)
+            self._conn.executemany(
+                "DELETE FROM hotel_content WHERE hid = ? AND language = ?", removed
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_store: ContentStore | None = None
+_store_checked = False
+
+
+def get_content_store() -> ContentStore | None:
+    """Return the process-wide content store, or None if no dump was imported."""
+    global _store, _store_checked  # noqa: PLW0603
+    if not _store_checked:
+        _store_checked = True
+        if Path(CONTENT_STORE_PATH).exists():
+            _store = ContentStore(CONTENT_STORE_PATH)
+    return _store
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Import a hotel content dump file into the local content store."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("dump", type=Path, help="hotel dump (.jsonl, .gz or .zst)")
+    parser.add_argument("--language", default="en", help="language of the dump")
+    parser.add_argument(
+        "--full", action="store_true", help="full dump: drop stored hotels of the language"
+    )
+    parser.add_argument("--db", type=Path, default=Path(CONTENT_STORE_PATH), help="store path")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    store = ContentStore(args.db)
+    try:
+        upserted, deleted = store.import_dump(
+            iter_dump_records(args.dump), args.language, replace=args.full
+        )
+    finally:
+        store.close()
+    logger.info("Upserted %d and deleted %d hotels in %s", upserted, deleted, args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Semantic pre-ranking of hotels against user preferences.
+
+Hotel descriptions and amenities are embedded once with a small local
+model (fastembed, ONNX on CPU) and kept in a memory-mapped NumPy matrix
+keyed by hid, shared by all worker processes. Per request only the
+preference string is embedded; cosine similarity to it is used as an extra
+presort signal.
+
+fastembed is an optional dependency (the "embeddings" extra); without it,
+or with EMBEDDINGS_ENABLED off, pre-ranking is skipped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from config import EMBEDDING_CACHE_DIR, EMBEDDING_MODEL, EMBEDDINGS_ENABLED
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from numpy.typing import NDArray
+
+    from .hotels import HotelFull
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_TEXT_MAX_LENGTH = 1000
+INITIAL_STORE_CAPACITY = 4096
+QUERY_CACHE_SIZE = 256
+
+
+def hotel_embedding_text(hotel: HotelFull) -> str:
+    """Build the text embedded for a hotel: name, kind, amenities, description."""
+    parts = [hotel.get("name", ""), str(hotel.get("kind", ""))]
+    parts.extend(
+        amenity
+        for group in hotel.get("amenity_groups") or []
+        for amenity in group.get("amenities") or []
+    )
+    parts.extend(
+        paragraph
+        for section in hotel.get("description_struct") or []
+        for paragraph in section.get("paragraphs") or []
+    )
+    return ". ".join(part for part in parts if part)[:EMBEDDING_TEXT_MAX_LENGTH]
+
+
+def _normalize_rows(vectors: NDArray[np.float32]) -> NDArray[np.float32]:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized: NDArray[np.float32] = (vectors / np.maximum(norms, np.float32(1e-12))).astype(
+        np.float32, copy=False
+    )
+    return normalized
+
+
+class TextEmbedder:
+    """Local text embedding model producing unit-length float32 vectors.
+
+    Args:
+        model_name: fastembed model name.
+        cache_dir: Directory for downloaded model files.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str | None = None) -> None:
+        """Load the model (downloads it on first use)."""
+        from fastembed import TextEmbedding  # noqa: PLC0415 - optional dependency
+
+        self._model = TextEmbedding(model_name, cache_dir=cache_dir)
+        self.dim: int = self._model.embedding_size
+
+    def embed(self, texts: list[str]) -> NDArray[np.float32]:
+        """Embed documents into a (len(texts), dim) matrix."""
+        vectors = np.asarray(list(self._model.embed(texts)), dtype=np.float32)
+        return _normalize_rows(vectors.reshape(len(texts), self.dim))
+
+    def embed_query(self, text: str) -> NDArray[np.float32]:
+        """Embed a search query into a (dim,) vector."""
+        vectors = np.asarray(list(self._model.query_embed(text)), dtype=np.float32)
+        return _normalize_rows(vectors.reshape(1, self.dim)).reshape(self.dim)
+
+
+class EmbeddingStore:
+    """Append-only memory-mapped matrix of hotel vectors keyed by hid.
+
+    Rows are appended under an exclusive file lock, so several processes
+    can share one store. A process picks up rows added by others when it
+    looks up a hid it does not know yet. Methods block on the file lock and
+    on disk, so async callers run them in a thread.
+
+    Args:
+        directory: Store directory (created if missing).
+        dim: Vector dimension.
+        initial_capacity: Rows allocated when the store is created.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        dim: int,
+        initial_capacity: int = INITIAL_STORE_CAPACITY,
+    ) -> None:
+        """Open (or create) the store files."""
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._dim = dim
+        self._hids_path = self._dir / "hids.i64"
+        self._vectors_path = self._dir / "vectors.f32"
+        self._lock_path = self._dir / ".lock"
+        self._rows: dict[int, int] = {}
+        self._count = 0
+        self._thread_lock = threading.Lock()
+        with self._locked():
+            if not self._hids_path.exists():
+                self._resize_files(initial_capacity)
+            self._map()
+            self._load_new_rows()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._thread_lock, self._lock_path.open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _resize_files(self, capacity: int) -> None:
+        """Grow (or create) both files to capacity rows, zero-filled."""
+        with self._hids_path.open("ab"):
+            pass
+        with self._vectors_path.open("ab"):
+            pass
+        os.truncate(self._hids_path, capacity * np.dtype(np.int64).itemsize)
+        os.truncate(self._vectors_path, capacity * self._dim * np.dtype(np.float32).itemsize)
+
+    def _map(self) -> None:
+        capacity = self._hids_path.stat().st_size // np.dtype(np.int64).itemsize
+        self._hids = np.memmap(self._hids_path, dtype=np.int64, mode="r+", shape=(capacity,))
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self._dim)
+        )
+
+    def _load_new_rows(self) -> None:
+        """Index rows appended since the last load (hid 0 marks free rows)."""
+        if self._hids_path.stat().st_size // np.dtype(np.int64).itemsize != len(self._hids):
+            self._map()
+        free = np.flatnonzero(self._hids[self._count :] == 0)
+        count = self._count + int(free[0]) if free.size else len(self._hids)
+        for row in range(self._count, count):
+            self._rows[int(self._hids[row])] = row
+        self._count = count
+
+    def __len__(self) -> int:
+        """Return the number of stored vectors."""
+        return self._count
+
+    def missing(self, hids: list[int]) -> list[int]:
+        """Return hids without a stored vector."""
+        with self._thread_lock:
+            if any(hid not in self._rows for hid in hids):
+                self._load_new_rows()
+            return [hid for hid in hids if hid not in self._rows]
+
+    def add(self, hids: list[int], vectors: NDArray[np.float32]) -> None:
+        """Append vectors for hids, skipping hids stored meanwhile."""
+        with self._locked():
+            self._load_new_rows()
+            new = [(i, hid) for i, hid in enumerate(hids) if hid not in self._rows]
+            if not new:
+                return
+            if self._count + len(new) > len(self._hids):
+                self._vectors.flush()
+                self._hids.flush()
+                self._resize_files(max(2 * len(self._hids), self._count + len(new)))
+                self._map()
+            rows = np.arange(self._count, self._count + len(new))
+            # Vectors first: a row becomes visible to readers once its hid is set
+            self._vectors[rows] = vectors[[i for i, _ in new]]
+            self._vectors.flush()
+            self._hids[rows] = [hid for _, hid in new]
+            self._hids.flush()
+            self._load_new_rows()
+
+    def similarities(self, hids: list[int], query: NDArray[np.float32]) -> dict[int, float]:
+        """Return cosine similarity to query for stored hids."""
+        with self._thread_lock:
+            known = [hid for hid in hids if hid in self._rows]
+            if not known:
+                return {}
+            scores = self._vectors[[self._rows[hid] for hid in known]] @ query
+        return dict(zip(known, scores.tolist(), strict=True))
+
+
+class PreferenceRanker:
+    """Cosine similarity of hotels to user preferences.
+
+    Args:
+        embedder: Text embedding model.
+        store: Vector store for hotel embeddings.
+    """
+
+    def __init__(self, embedder: TextEmbedder, store: EmbeddingStore) -> None:
+        """Initialize with a model and a store of matching dimension."""
+        self._embedder = embedder
+        self._store = store
+        self._queries: OrderedDict[str, NDArray[np.float32]] = OrderedDict()
+
+    async def _query_vector(self, text: str) -> NDArray[np.float32]:
+        vector = self._queries.get(text)
+        if vector is None:
+            vector = await asyncio.to_thread(self._embedder.embed_query, text)
+            self._queries[text] = vector
+            if len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+        else:
+            self._queries.move_to_end(text)
+        return vector
+
+    async def similarities(self, hotels: list[HotelFull], preferences: str) -> dict[int, float]:
+        """Embed hotels not seen before, then score all against preferences.
+
+        Returns:
+            Mapping of hid to cosine similarity (-1..1).
+        """
+        hotels_by_hid = {hotel["hid"]: hotel for hotel in hotels}
+        hids = list(hotels_by_hid)
+        if missing := await asyncio.to_thread(self._store.missing, hids):
+            texts = [hotel_embedding_text(hotels_by_hid[hid]) for hid in missing]
+            vectors = await asyncio.to_thread(self._embedder.embed, texts)
+            await asyncio.to_thread(self._store.add, missing, vectors)
+        query = await self._query_vector(preferences)
+        return await asyncio.to_thread(self._store.similarities, hids, query)
+
+
+_ranker: PreferenceRanker | None = None
+_ranker_unavailable = False
+_ranker_lock = asyncio.Lock()
+
+
+def _create_ranker() -> PreferenceRanker:
+    embedder = TextEmbedder(EMBEDDING_MODEL, cache_dir=str(Path(EMBEDDING_CACHE_DIR) / "models"))
+    model_dir = EMBEDDING_MODEL.replace("/", "__")
+    store = EmbeddingStore(Path(EMBEDDING_CACHE_DIR) / model_dir, embedder.dim)
+    return PreferenceRanker(embedder, store)
+
+
+async def get_preference_ranker() -> PreferenceRanker | None:
+    """Return the process-wide ranker, or None if embeddings are unavailable."""
+    global _ranker, _ranker_unavailable  # noqa: PLW0603
+    if not EMBEDDINGS_ENABLED or _ranker_unavailable:
+        return None
+    async with _ranker_lock:
+        if _ranker is None and not _ranker_unavailable:
+            try:
+                _ranker = await asyncio.to_thread(_create_ranker)
+            except ImportError:
+                logger.warning("[embeddings] fastembed is not installed, pre-ranking disabled")
+                _ranker_unavailable = True
+    return _ranker
@@ -0,0 +1,171 @@
+"""Deterministic local hotel ranking without LLM.
+
+Used when LLM scoring fails and as a fast mode that skips the LLM. Hotels
+are ranked by the presort prescore, detailed review averages and the share
+of amenities from user preferences they provide. Results have the same
+shape as LLM results, so they go through finalize_scored_hotels unchanged.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, cast
+
+from .hotels import calculate_prescore, filter_rates_by_price, get_rate_price_per_night
+from .preferences import hotel_amenity_text, hotel_has_amenity, match_preferences
+from .scoring import TOP_HOTELS_COUNT, HotelScoreDict
+
+if TYPE_CHECKING:
+    from etg import HotelRate
+
+    from .hotels import HotelFull
+    from .preferences import AmenityPreference
+    from .reviews import DetailedAverages, HotelReviews
+
+# Score weights (0-1) with and without amenities requested in preferences
+PRESCORE_WEIGHT = 0.5
+DETAILED_WEIGHT = 0.2
+PREFERENCES_WEIGHT = 0.3
+NO_PREFERENCES_PRESCORE_WEIGHT = 0.7
+
+HIGH_DETAILED_SCORE = 9.0
+LOW_AVG_RATING = 8.0
+MIN_RELIABLE_REVIEWS = 10
+
+DETAILED_LABELS: dict[str, str] = {
+    "cleanness": "чистота",
+    "location": "расположение",
+    "price": "цена/качество",
+    "services": "сервис",
+    "room": "номер",
+    "meal": "питание",
+    "wifi": "Wi-Fi",
+    "hygiene": "гигиена",
+}
+
+
+def _detailed_values(detailed: DetailedAverages | None) -> dict[str, float]:
+    """Detailed averages that are set, by category name."""
+    averages = cast("dict[str, float | None]", detailed or {})
+    return {name: value for name, value in averages.items() if value is not None}
+
+
+def _detailed_score(detailed: DetailedAverages | None) -> float | None:
+    """Mean of available detailed averages on a 0-100 scale."""
+    values: list[float] = list(_detailed_values(detailed).values())
+    if not values:
+        return None
+    return sum(values) / len(values) * 10
+
+
+def _select_rate(
+    rates: list[HotelRate],
+    min_price: float | None,
+    max_price: float | None,
+) -> str | None:
+    """Pick the cheapest rate within the price range (or overall)."""
+    candidates = filter_rates_by_price(rates, min_price, max_price) or rates
+    priced = [
+        (price, rate.get("match_hash"))
+        for rate in candidates
+        if (price := get_rate_price_per_night(rate)) is not None
+    ]
+    if not priced:
+        return None
+    return min(priced, key=lambda item: item[0])[1]
+
+
+def _review_reasons(reviews: HotelReviews | None) -> tuple[list[str], list[str]]:
+    reasons: list[str] = []
+    penalties: list[str] = []
+    avg_rating = reviews.get("avg_rating") if reviews else None
+    if not reviews or avg_rating is None:
+        penalties.append("Нет оценок гостей")
+        return reasons, penalties
+
+    total = reviews.get("total_reviews", 0)
+    if avg_rating >= LOW_AVG_RATING:
+        reasons.append(f"Рейтинг {avg_rating:.1f} по {total} отзывам")
+    else:
+        penalties.append(f"Низкий рейтинг {avg_rating:.1f}")
+    if total < MIN_RELIABLE_REVIEWS:
+        penalties.append(f"Мало отзывов ({total})")
+
+    strong = [
+        DETAILED_LABELS[name]
+        for name, value in _detailed_values(reviews.get("detailed_averages")).items()
+        if value >= HIGH_DETAILED_SCORE and name in DETAILED_LABELS
+    ]
+    if strong:
+        reasons.append("Высокие оценки: " + ", ".join(strong[:3]))
+    return reasons, penalties
+
+
+def _rank_hotel(
+    hotel: HotelFull,
+    preferences: list[AmenityPreference],
+    min_price: float | None,
+    max_price: float | None,
+) -> HotelScoreDict:
+    reviews = hotel.get("reviews")
+    prescore = calculate_prescore(hotel, reviews)
+    detailed = _detailed_score(reviews.get("detailed_averages") if reviews else None)
+    if detailed is None:
+        detailed = prescore
+
+    reasons, penalties = _review_reasons(reviews)
+    stars = hotel.get("star_rating", 0)
+    if stars:
+        reasons.insert(0, f"{stars}★")
+
+    if preferences:
+        amenity_text = hotel_amenity_text(hotel)
+        matched = [p.label for p in preferences if hotel_has_amenity(hotel, p, amenity_text)]
+        missing = [p.label for p in preferences if p.label not in matched]
+        if matched:
+            reasons.append("Есть: " + ", ".join(matched))
+        if missing:
+            penalties.append("Нет: " + ", ".join(missing))
+        score = (
+            PRESCORE_WEIGHT * prescore
+            + DETAILED_WEIGHT * detailed
+            + PREFERENCES_WEIGHT * 100 * len(matched) / len(preferences)
+        )
+    else:
+        score = (
+            NO_PREFERENCES_PRESCORE_WEIGHT * prescore
+            + (1 - NO_PREFERENCES_PRESCORE_WEIGHT) * detailed
+        )
+
+    return HotelScoreDict(
+        hotel_id=hotel["id"],
+        score=round(min(max(score, 0.0), 100.0)),
+        top_reasons=reasons,
+        score_penalties=penalties,
+        selected_rate_hash=_select_rate(hotel.get("rates", []), min_price, max_price),
+    )
+
+
+def rank_hotels_locally(
+    hotels: list[HotelFull],
+    user_preferences: str | None,
+    *,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    top_count: int = TOP_HOTELS_COUNT,
+) -> list[HotelScoreDict]:
+    """Rank hotels without LLM and return top N as scoring results.
+
+    Args:
+        hotels: Combined hotel data (usually the presorted candidates).
+        user_preferences: Free-text user preferences.
+        min_price: Minimum price per night for rate selection.
+        max_price: Maximum price per night for rate selection.
+        top_count: Number of top hotels to return.
+
+    Returns:
+        Scoring results sorted by score desc, ties broken by hotel_id.
+    """
+    preferences = match_preferences(user_preferences)
+    results = [_rank_hotel(hotel, preferences, min_price, max_price) for hotel in hotels]
+    results.sort(key=lambda result: (-result["score"], result["hotel_id"]))
+    return results[:top_count]
@@ -0,0 +1,178 @@
+"""Hedged LLM calls for cutting tail latency.
+
+A hedged call starts the primary request and, if it has not finished by a
+deadline derived from recent latencies, starts the same request against a
+secondary model. The first successful result wins and the other call is
+cancelled. Fire and win rates are counted to tune the policy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LATENCY_WINDOW = 50
+MIN_LATENCY_SAMPLES = 5
+
+
+@dataclass
+class HedgeStats:
+    """Counters of hedged calls."""
+
+    calls: int = 0
+    hedges_fired: int = 0
+    hedge_wins: int = 0
+
+    @property
+    def fire_rate(self) -> float:
+        """Share of calls where the hedge request was sent."""
+        return self.hedges_fired / self.calls if self.calls else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        """Share of fired hedges that answered first."""
+        return self.hedge_wins / self.hedges_fired if self.hedges_fired else 0.0
+
+
+class LatencyTracker:
+    """Rolling window of call latencies in seconds.
+
+    Args:
+        window: Number of most recent samples kept.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        """Initialize an empty window."""
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample."""
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """Return the q-quantile of the window, or None if too few samples."""
+        if len(self._samples) < MIN_LATENCY_SAMPLES:
+            return None
+        samples = sorted(self._samples)
+        index = min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))
+        return samples[index]
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """When to send the hedge request.
+
+    Attributes:
+        quantile: Latency quantile of the primary model used as the deadline.
+        min_delay: Lower bound of the deadline in seconds.
+        default_delay: Deadline used until enough latencies are recorded.
+    """
+
+    quantile: float = 0.9
+    min_delay: float = 5.0
+    default_delay: float = 30.0
+
+    def deadline(self, tracker: LatencyTracker) -> float:
+        """Return seconds to wait for the primary before hedging."""
+        observed = tracker.quantile(self.quantile)
+        if observed is None:
+            return self.default_delay
+        return max(self.min_delay, observed)
+
+
+_latency_trackers: dict[str, LatencyTracker] = {}
+_hedge_stats = HedgeStats()
+
+
+def get_latency_tracker(key: str) -> LatencyTracker:
+    """Return the process-wide latency tracker for a key (e.g. model name)."""
+    return _latency_trackers.setdefault(key, LatencyTracker())
+
+
+def get_hedge_stats() -> HedgeStats:
+    """Return the process-wide hedge counters."""
+    return _hedge_stats
+
+
+async def run_hedged(
+    primary: Callable[[], Awaitable[T]],
+    hedge: Callable[[], Awaitable[T]],
+    *,
+    delay: float,
+    tracker: LatencyTracker | None = None,
+    stats: HedgeStats | None = None,
+) -> T:
+    """Run primary, and also hedge if primary is slower than delay.
+
+    Args:
+        primary: Factory of the primary call.
+        hedge: Factory of the hedge call, started only after delay.
+        delay: Seconds to wait for primary before starting hedge.
+        tracker: Latency tracker of the primary call.
+        stats: Counters to update (defaults to the process-wide ones).
+
+    Returns:
+        Result of the first call that succeeds.
+
+    Raises:
+        Exception: The primary's error if it fails before the deadline, or
+            the first error if both calls fail.
+    """
+    stats = stats or _hedge_stats
+    stats.calls += 1
+    started = time.monotonic()
+    primary_task: asyncio.Future[T] = asyncio.ensure_future(primary())
+    hedge_task: asyncio.Future[T] | None = None
+    try:
+        primary_done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if primary_done:
+            result = primary_task.result()
+            if tracker is not None:
+                tracker.record(time.monotonic() - started)
+            return result
+
+        stats.hedges_fired += 1
+        hedge_task = asyncio.ensure_future(hedge())
+        pending: set[asyncio.Future[T]] = {primary_task, hedge_task}
+        errors: list[BaseException] = []
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is not None:
+                    errors.append(error)
+                    continue
+                if task is hedge_task:
+                    stats.hedge_wins += 1
+                elif tracker is not None:
+                    tracker.record(time.monotonic() - started)
+                return task.result()
+        raise errors[0]
+    finally:
+        for future in (primary_task, hedge_task):
+            if future is not None and not future.done():
+                future.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await future
+        logger.info(
+            "[hedging] fired %d/%d (%.0f%%), hedge won %d/%d (%.0f%%)",
+            stats.hedges_fired,
+            stats.calls,
+            stats.fire_rate * 100,
+            stats.hedge_wins,
+            stats.hedges_fired,
+            stats.win_rate * 100,
+        )
@@ -2,12 +2,32 @@
 
 from __future__ import annotations
 
+import asyncio
 import random
 from typing import TYPE_CHECKING, Any, TypedDict, cast
 
-from etg import ETGAPIError, ETGClient, Hotel, HotelContent, HotelKind, HotelRate
+import numpy as np
+
+from etg import (
+    ETGAPIError,
+    ETGClient,
+    GuestRoom,
+    Hotel,
+    HotelContent,
+    HotelKind,
+    HotelRate,
+    RegionSearchResults,
+)
+
+from .content_store import get_content_store
+from .rating_table import RatingTable, empty_rating_rows, get_rating_table
+from .shared_cache import cache_key, get_shared_cache
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterator
+
+    from numpy.typing import NDArray
+
     from .reviews import HotelReviews
     from .scoring import HotelScoreDict
 
@@ -38,6 +58,9 @@ HOTEL_KIND_TIERS: dict[HotelKind, int] = {
     "Unspecified": 4,
 }
 DEFAULT_KIND_TIER = 4
+
+# Max prescore points for similarity to user preferences
+SIMILARITY_PRESCORE_WEIGHT = 25
 MIN_RATING_THRESHOLD = 3.0
 
 
@@ -261,7 +284,21 @@ def filter_rates_by_price(
     return filtered
 
 
-MAX_HOTELS_FOR_ANALYSIS = 500
+MAX_HOTELS_FOR_ANALYSIS = 400
+
+# Share of sampled hotels picked at random from the rest, so hotels with
+# weak SERP signals and no rating history still get a chance.
+SAMPLING_EXPLORATION_SHARE = 0.2
+
+# Sampling score weights (points)
+SAMPLING_RATES_WEIGHT = 20
+SAMPLING_RATES_CAP = 10
+SAMPLING_PRICE_WEIGHT = 20
+SAMPLING_BREAKFAST_WEIGHT = 10
+SAMPLING_CANCELLATION_WEIGHT = 10
+SAMPLING_RATING_WEIGHT = 40
+# Rating assumed for hotels not seen before
+DEFAULT_HISTORICAL_RATING = 8.0
 
 
 class SampleHotelsResult(TypedDict):
@@ -271,15 +308,86 @@ class SampleHotelsResult(TypedDict):
     sampled: int | None
 
 
-def sample_hotels(
+def _has_free_cancellation(rate: HotelRate) -> bool:
+    rate_data = cast("dict[str, Any]", rate)
+    payment_types: list[dict[str, Any]] = rate_data.get("payment_options", {}).get(
+        "payment_types", []
+    )
+    return any(
+        (payment.get("cancellation_penalties") or {}).get("free_cancellation_before")
+        for payment in payment_types
+    )
+
+
+def _price_position_score(price: float | None, low: float, high: float) -> float:
+    """Score 0-1 for a price, highest in the middle of [low, high]."""
+    if price is None:
+        return 0.0
+    if high <= low:
+        return 1.0
+    position = (price - low) / (high - low)
+    return max(0.0, 1 - abs(position - 0.5) * 2)
+
+
+def calculate_sampling_score(
+    hotel: Hotel,
+    price_range: tuple[float, float],
+    historical_rating: float,
+) -> float:
+    """Score a hotel from SERP data before content and reviews are known.
+
+    Score components (0-100):
+    - Rates count: 0-20 points (more options, capped at 10 rates)
+    - Price position: 0-20 points (middle of the budget scores highest)
+    - Breakfast: 10 points if any rate includes it
+    - Free cancellation: 10 points if any rate has it
+    - Historical rating: 0-40 points (rating / 10 * 40)
+
+    Args:
+        hotel: Hotel from search results.
+        price_range: Budget (or observed) price per night range.
+        historical_rating: Last known (or default) average rating.
+
+    Returns:
+        Sampling score.
+    """
+    rates = hotel.get("rates", [])
+    score = min(len(rates), SAMPLING_RATES_CAP) / SAMPLING_RATES_CAP * SAMPLING_RATES_WEIGHT
+    score += SAMPLING_PRICE_WEIGHT * _price_position_score(
+        get_hotel_price_per_night(hotel), *price_range
+    )
+    if any(rate.get("meal_data", {}).get("has_breakfast") for rate in rates):
+        score += SAMPLING_BREAKFAST_WEIGHT
+    if any(_has_free_cancellation(rate) for rate in rates):
+        score += SAMPLING_CANCELLATION_WEIGHT
+    score += historical_rating / 10 * SAMPLING_RATING_WEIGHT
+    return score
+
+
+def sample_hotels(  # noqa: PLR0913
     hotels: list[Hotel],
     max_count: int = MAX_HOTELS_FOR_ANALYSIS,
+    *,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    rating_table: RatingTable | None = None,
+    seed: int | None = None,
 ) -> SampleHotelsResult:
-    """Sample hotels if there are too many.
+    """Keep the most promising hotels if there are too many.
+
+    Hotels are ranked by calculate_sampling_score; the top share is kept
+    as is and the rest of max_count (SAMPLING_EXPLORATION_SHARE) is drawn
+    at random from the remaining hotels. Ties and the random draw are
+    reproducible with seed.
 
     Args:
         hotels: List of hotels to sample.
         max_count: Maximum number of hotels to keep.
+        min_price: Minimum price per night of the budget (or None).
+        max_price: Maximum price per night of the budget (or None).
+        rating_table: Review aggregates of hotels seen in earlier searches
+            (defaults to the process-wide table).
+        seed: Random seed for reproducible sampling.
 
     Returns:
         SampleHotelsResult with sampled hotels and count.
@@ -287,18 +395,86 @@ def sample_hotels(
     if len(hotels) <= max_count:
         return {"hotels": hotels, "sampled": None}
 
+    table = rating_table if rating_table is not None else get_rating_table()
+    rows, _ = table.lookup([h["hid"] for h in hotels])
+    historical_ratings = np.nan_to_num(rows["avg_rating"], nan=DEFAULT_HISTORICAL_RATING)
+
+    prices = [p for h in hotels if (p := get_hotel_price_per_night(h)) is not None]
+    price_range = (
+        min_price if min_price is not None else min(prices, default=0.0),
+        max_price if max_price is not None else max(prices, default=0.0),
+    )
+
+    rng = random.Random(seed)  # noqa: S311 - sampling, not cryptography
+    order = list(range(len(hotels)))
+    rng.shuffle(order)  # random tie-breaking
+    scores = [
+        calculate_sampling_score(h, price_range, rating)
+        for h, rating in zip(hotels, historical_ratings.tolist(), strict=True)
+    ]
+    order.sort(key=lambda i: scores[i], reverse=True)
+
+    top_count = max_count - int(max_count * SAMPLING_EXPLORATION_SHARE)
+    chosen = order[:top_count] + rng.sample(order[top_count:], max_count - top_count)
+    chosen.sort(key=lambda i: scores[i], reverse=True)
+
     return {
-        "hotels": random.sample(hotels, max_count),
+        "hotels": [hotels[i] for i in chosen],
         "sampled": max_count,
     }
 
 
+async def iter_search_regions_cached(  # noqa: PLR0913
+    client: ETGClient,
+    region_ids: list[int],
+    *,
+    checkin: str,
+    checkout: str,
+    residency: str,
+    guests: list[GuestRoom],
+    currency: str | None = None,
+    language: str | None = None,
+    hotels_limit: int | None = None,
+) -> AsyncIterator[RegionSearchResults]:
+    """Search regions like ETGClient.iter_search_hotels_by_regions, via the shared cache.
+
+    A completed search is cached for a few minutes as a whole, so the same
+    search repeated from any worker replays the per-region results
+    instead of calling ETG.
+    """
+    cache = get_shared_cache()
+    key = cache_key(
+        region_ids, checkin, checkout, residency, guests, currency, language, hotels_limit
+    )
+    cached = await asyncio.to_thread(cache.get_many, "serp", [key]) if cache is not None else {}
+    if (cached_results := cached.get(key)) is not None:
+        for region_results in cached_results:
+            yield region_results
+        return
+
+    collected: list[RegionSearchResults] = []
+    async for region_results in client.iter_search_hotels_by_regions(
+        region_ids=region_ids,
+        checkin=checkin,
+        checkout=checkout,
+        residency=residency,
+        guests=guests,
+        currency=currency,
+        language=language,
+        hotels_limit=hotels_limit,
+    ):
+        collected.append(region_results)
+        yield region_results
+    if cache is not None:
+        await asyncio.to_thread(cache.set, "serp", key, collected)
+
+
 async def batch_get_content(
     client: ETGClient,
     hotel_ids: list[int],
     language: str,
 ) -> dict[int, HotelContent]:
-    """Fetch hotel content in batches.
+    """Fetch hotel content, from the local content store first, API batches for misses.
 
     Args:
         client: ETG API client.
@@ -308,36 +484,105 @@ async def batch_get_content(
     Returns:
         Mapping of hotel ID to hotel content.
     """
-    content_map: dict[int, HotelContent] = {}
+    content_map, missing_ids = await _load_stored_content(hotel_ids, language)
 
-    for i in range(0, len(hotel_ids), CONTENT_BATCH_SIZE):
-        hotel_id_batch = hotel_ids[i : i + CONTENT_BATCH_SIZE]
-        try:
-            content = await client.get_hotel_content(hotel_ids=hotel_id_batch, language=language)
-            for hotel in content:
-                content_map[hotel["hid"]] = hotel
-        except ETGAPIError:
-            continue
+    for i in range(0, len(missing_ids), CONTENT_BATCH_SIZE):
+        hotel_id_batch = missing_ids[i : i + CONTENT_BATCH_SIZE]
+        content_map.update(await _fetch_remote_content(client, hotel_id_batch, language))
+
+    return content_map
+
+
+async def fetch_content_batch(
+    client: ETGClient,
+    hotel_ids: list[int],
+    language: str,
+) -> dict[int, HotelContent]:
+    """Fetch content for one batch of hotels, returning an empty map on API errors.
+
+    Hotels in the local content store are not requested from the API.
+
+    Args:
+        client: ETG API client.
+        hotel_ids: Hotel IDs of a single batch (up to CONTENT_BATCH_SIZE).
+        language: Response language code.
 
+    Returns:
+        Mapping of hotel ID to hotel content.
+    """
+    content_map, missing_ids = await _load_stored_content(hotel_ids, language)
+    if missing_ids:
+        content_map.update(await _fetch_remote_content(client, missing_ids, language))
     return content_map
 
 
+async def _load_stored_content(
+    hotel_ids: list[int],
+    language: str,
+) -> tuple[dict[int, HotelContent], list[int]]:
+    """Return stored content and the hotel IDs missing from the content store.
+
+    Without an imported content store, the shared cache is used instead.
+    """
+    store = get_content_store()
+    if store is not None:
+        content_map = await asyncio.to_thread(store.get_many, hotel_ids, language)
+    elif (cache := get_shared_cache()) is not None:
+        cached = await asyncio.to_thread(
+            cache.get_many, "content", [f"{hid}:{language}" for hid in hotel_ids]
+        )
+        content_map = {content["hid"]: content for content in cached.values()}
+    else:
+        return {}, hotel_ids
+    return content_map, [hid for hid in hotel_ids if hid not in content_map]
+
+
+async def _fetch_remote_content(
+    client: ETGClient,
+    hotel_ids: list[int],
+    language: str,
+) -> dict[int, HotelContent]:
+    """Request content from the API and write it back to the store or shared cache."""
+    try:
+        content = await client.get_hotel_content(hotel_ids=hotel_ids, language=language)
+    except ETGAPIError:
+        return {}
+    store = get_content_store()
+    if store is not None and content:
+        await asyncio.to_thread(store.put_many, content, language)
+    elif (cache := get_shared_cache()) is not None:
+        await asyncio.to_thread(
+            cache.set_many,
+            "content",
+            {f"{hotel['hid']}:{language}": hotel for hotel in content},
+        )
+    return {hotel["hid"]: hotel for hotel in content}
+
+
 def calculate_prescore(
-    hotel: HotelFull, reviews_data: HotelReviews | None = None,
+    hotel: HotelFull,
+    reviews_data: HotelReviews | None = None,
+    similarity: float | None = None,
 ) -> float:
     """Calculate quick pre-score for sorting before LLM.
 
-    Score components (0-100):
+    Score components (0-100, plus up to 25 with similarity):
     - Stars: 0-25 points (star_rating * 5)
     - Avg rating: 0-50 points (avg_rating / 10 * 50)
     - Reviews count: 0-25 points (min(total, 25))
+    - Preference similarity: 0-25 points (similarity * 25)
+
+    Review aggregates come from reviews_data, fetched for this search; the
+    process-wide rating table is only read for hotels without it.
 
     Args:
         hotel: Combined hotel data.
         reviews_data: Filtered reviews data.
+        similarity: Cosine similarity to user preferences clipped to 0-1, if
+            known.
 
     Returns:
-        Pre-score value (0-100).
+        Pre-score value.
     """
     score = 0.0
 
@@ -347,15 +592,70 @@ def calculate_prescore(
     if reviews_data:
         total = reviews_data.get("total_reviews", 0)
         avg_rating = reviews_data.get("avg_rating")
+    elif (row := get_rating_table().get(hotel["hid"])) is not None:
+        total = int(row["count"])
+        avg_rating = None if np.isnan(row["avg_rating"]) else float(row["avg_rating"])
+    else:
+        total, avg_rating = 0, None
+
+    if avg_rating is not None:
+        score += (avg_rating / 10) * 50
 
-        if avg_rating is not None:
-            score += (avg_rating / 10) * 50
+    score += min(total, 25)
 
-        score += min(total, 25)
+    if similarity is not None:
+        score += similarity * SIMILARITY_PRESCORE_WEIGHT
 
     return score
 
 
+def _rating_rows(
+    hotels: list[HotelFull],
+    reviews_map: dict[int, HotelReviews],
+) -> NDArray[np.void]:
+    """Rating rows of hotels from reviews_map, from the rating table for hotels not in it.
+
+    reviews_map holds this search's reviews; the process-wide table may have
+    been updated by other searches since, so it only fills gaps.
+    """
+    hids = [hotel["hid"] for hotel in hotels]
+    rows = empty_rating_rows(hids)
+    missing = np.ones(len(hids), dtype=np.bool_)
+    for i, hid in enumerate(hids):
+        reviews_data = reviews_map.get(hid)
+        if reviews_data:
+            avg_rating = reviews_data.get("avg_rating")
+            rows["count"][i] = reviews_data.get("total_reviews", 0)
+            rows["avg_rating"][i] = np.nan if avg_rating is None else avg_rating
+            missing[i] = False
+    if missing.any():
+        rows[missing] = get_rating_table().lookup(np.asarray(hids)[missing].tolist())[0]
+    return rows
+
+
+def _prescores(
+    hotels: list[HotelFull],
+    rows: NDArray[np.void],
+    similarities: dict[int, float],
+) -> NDArray[np.float64]:
+    """Vectorized calculate_prescore over hotels and their rating rows."""
+    stars = np.fromiter(
+        (hotel.get("star_rating", 0) for hotel in hotels), dtype=np.float64, count=len(hotels)
+    )
+    similarity = np.fromiter(
+        (similarities.get(hotel["hid"], np.nan) for hotel in hotels),
+        dtype=np.float64,
+        count=len(hotels),
+    )
+    avg_rating = rows["avg_rating"]
+    # Same terms, added in the same order, as calculate_prescore
+    scores = stars * 5
+    scores += np.where(np.isnan(avg_rating), 0.0, (avg_rating / 10) * 50)
+    scores += np.minimum(rows["count"], 25)
+    scores += np.where(np.isnan(similarity), 0.0, similarity * SIMILARITY_PRESCORE_WEIGHT)
+    return scores
+
+
 def _get_hotel_tier(hotel: HotelFull) -> int:
     """Get priority tier for a hotel based on its kind."""
     kind = hotel.get("kind", "Unspecified")
@@ -370,36 +670,46 @@ class _ScoredHotel(TypedDict):
     tier: int
 
 
+def _scale_similarities(similarities: dict[int, float]) -> dict[int, float]:
+    """Clip cosine similarities to 0-1.
+
+    The scale is fixed rather than relative to the hotel set, so a
+    similarity is worth the same prescore in every presort call (e.g. in
+    every batch of the pipelined search).
+    """
+    return {hid: min(max(value, 0.0), 1.0) for hid, value in similarities.items()}
+
+
 def presort_hotels(
     hotels: list[HotelFull],
     reviews_map: dict[int, HotelReviews],
     limit: int = 100,
+    similarities: dict[int, float] | None = None,
 ) -> list[HotelFull]:
     """Sort hotels by kind tier and pre-score, return top N.
 
     Hotels are grouped into 4 tiers by property type (premium first).
     Within each tier, hotels are sorted by prescore. If a higher tier
     has enough hotels to fill the limit, lower tiers are not included.
+    Similarities to user preferences (cosine, by hid), if given, are
+    clipped to 0-1 and added to the prescore.
     """
-    # Calculate prescore and tier for each hotel
-    scored: list[_ScoredHotel] = []
-    for hotel in hotels:
-        hotel_hid = hotel.get("hid")
-        reviews_data = reviews_map.get(hotel_hid) if hotel_hid else None
-        prescore = calculate_prescore(hotel, reviews_data)
-        tier = _get_hotel_tier(hotel)
-        scored.append({"hotel": hotel, "prescore": prescore, "tier": tier})
+    scaled = _scale_similarities(similarities or {})
+
+    # Calculate prescore and tier for each hotel, reading review aggregates
+    # from reviews_map and, for hotels without reviews there, the rating table
+    rows = _rating_rows(hotels, reviews_map)
+    prescores: list[float] = _prescores(hotels, rows, scaled).tolist()
+    scored: list[_ScoredHotel] = [
+        {"hotel": hotel, "prescore": prescore, "tier": _get_hotel_tier(hotel)}
+        for hotel, prescore in zip(hotels, prescores, strict=True)
+    ]
 
     # If over limit, drop hotels with low rating first
     if len(scored) > limit:
-        filtered: list[_ScoredHotel] = []
-        for item in scored:
-            hid = item["hotel"].get("hid", 0)
-            reviews_data = reviews_map.get(hid)
-            avg_rating = reviews_data.get("avg_rating") if reviews_data else None
-            if avg_rating is None or avg_rating >= MIN_RATING_THRESHOLD:
-                filtered.append(item)
-        scored = filtered
+        avg_rating = rows["avg_rating"]
+        keep = np.isnan(avg_rating) | (avg_rating >= MIN_RATING_THRESHOLD)
+        scored = [item for item, kept in zip(scored, keep.tolist(), strict=True) if kept]
 
     # Group by tier
     tiers: dict[int, list[_ScoredHotel]] = {1: [], 2: [], 3: [], 4: []}
@@ -446,13 +756,14 @@ def _get_valid_rate_hash(hotel: HotelFull, selected_hash: str | None) -> str | N
     return None
 
 
-def finalize_scored_hotels(
+def iter_scored_hotels(
     hotels: list[HotelFull],
     scoring_results: list[HotelScoreDict],
-) -> list[HotelScored]:
-    """Merge hotel data with scoring results in score order.
+    rate_aliases: dict[str, dict[str, str]] | None = None,
+) -> Iterator[HotelScored]:
+    """Merge hotel data with scoring results lazily, in score order.
 
-    Returns hotels in the order from scoring_results (sorted by score desc),
+    Yields hotels in the order from scoring_results (sorted by score desc),
     with hotel data merged from hotels list.
 
     Validates selected_rate_hash against hotel's available rates.
@@ -461,21 +772,26 @@ def finalize_scored_hotels(
     Args:
         hotels: List of hotel data with content and reviews.
         scoring_results: List of LLM scoring results sorted by score.
+        rate_aliases: Map of hotel_id to {alias: match_hash} from the compact
+            prompt encoding, used to resolve aliased selected_rate_hash.
 
-    Returns:
-        List of scored hotels in score order.
+    Yields:
+        Scored hotels in score order.
     """
     hotels_map: dict[str, HotelFull] = {h["id"]: h for h in hotels}
 
-    result: list[HotelScored] = []
     for score_data in scoring_results:
         hotel_id = score_data["hotel_id"]
         hotel = hotels_map.get(hotel_id)
         if hotel is None:
             continue
 
+        selected_hash = score_data["selected_rate_hash"]
+        if rate_aliases and selected_hash is not None:
+            selected_hash = rate_aliases.get(hotel_id, {}).get(selected_hash, selected_hash)
+
         # Validate and potentially fix the rate hash
-        valid_hash = _get_valid_rate_hash(hotel, score_data["selected_rate_hash"])
+        valid_hash = _get_valid_rate_hash(hotel, selected_hash)
 
         scored_hotel: dict[str, Any] = {
             **hotel,
@@ -484,6 +800,19 @@ def finalize_scored_hotels(
             "score_penalties": score_data["score_penalties"],
             "selected_rate_hash": valid_hash,
         }
-        result.append(cast("HotelScored", scored_hotel))
+        yield cast("HotelScored", scored_hotel)
 
-    return result
+
+def finalize_scored_hotels(
+    hotels: list[HotelFull],
+    scoring_results: list[HotelScoreDict],
+    rate_aliases: dict[str, dict[str, str]] | None = None,
+) -> list[HotelScored]:
+    """Merge hotel data with scoring results in score order.
+
+    Same as iter_scored_hotels, collected into a list.
+
+    Returns:
+        List of scored hotels in score order.
+    """
+    return list(iter_scored_hotels(hotels, scoring_results, rate_aliases))
@@ -1,16 +1,23 @@
-"""LLM provider interface and registry for scoring workflows."""
+"""LLM provider interface and registry for scoring workflows.
+
+Provider SDKs (the Anthropic and Google model stacks of pydantic-ai) are
+imported on first agent creation for a matching model, so a worker only
+loads the stack it actually uses.
+"""
 
 from __future__ import annotations
 
+import asyncio
 from collections.abc import Callable
+from contextlib import AsyncExitStack
 from dataclasses import dataclass
-from typing import Protocol, TypeVar
+from typing import TYPE_CHECKING, Any, Protocol, TypeVar, cast
 
-from google.genai.types import ThinkingLevel
 from pydantic import BaseModel
-from pydantic_ai import Agent
-from pydantic_ai.models.anthropic import AnthropicModel, AnthropicModelSettings
-from pydantic_ai.models.google import GoogleModel, GoogleModelSettings
+
+if TYPE_CHECKING:
+    from pydantic_ai import Agent
+    from pydantic_ai.agent import AgentRunResult
 
 OutputT = TypeVar("OutputT", bound=BaseModel)
 
@@ -26,6 +33,9 @@ class LLMProvider(Protocol):
     def estimate_tokens(self, text: str, model_name: str) -> int:
         """Estimate token count for the given text and model."""
 
+    def token_budget(self, cost_target_usd: float) -> int:
+        """Return the prompt size in tokens whose input cost is cost_target_usd."""
+
     def create_agent(self, model_name: str, output_type: type[OutputT]) -> Agent[None, OutputT]:
         """Create a configured pydantic-ai Agent for the model."""
 
@@ -38,6 +48,10 @@ class ProviderConfig:
     matcher: Callable[[str], bool]
     token_estimator: Callable[[str, str], int]
     agent_factory: Callable[[str, type[OutputT]], Agent[None, OutputT]]
+    # Input price of the provider's default scoring models, USD per million tokens
+    input_usd_per_mtok: float
+    # Largest prompt that leaves room for the response in the context window
+    max_prompt_tokens: int
 
     def matches(self, model_name: str) -> bool:
         return self.matcher(model_name)
@@ -45,6 +59,13 @@ class ProviderConfig:
     def estimate_tokens(self, text: str, model_name: str) -> int:
         return self.token_estimator(text, model_name)
 
+    def token_budget(self, cost_target_usd: float) -> int:
+        """Return the prompt size for the cost target, capped by max_prompt_tokens."""
+        if cost_target_usd <= 0:
+            return self.max_prompt_tokens
+        tokens = int(cost_target_usd / self.input_usd_per_mtok * 1_000_000)
+        return min(tokens, self.max_prompt_tokens)
+
     def create_agent(self, model_name: str, output_type: type[OutputT]) -> Agent[None, OutputT]:
         return self.agent_factory(model_name, output_type)
 
@@ -60,12 +81,22 @@ def _estimate_google_tokens(text: str, _model_name: str) -> int:
 
 
 def _create_anthropic_agent(model_name: str, output_type: type[OutputT]) -> Agent[None, OutputT]:
+    from pydantic_ai import Agent  # noqa: PLC0415
+    from pydantic_ai.models.anthropic import (  # noqa: PLC0415
+        AnthropicModel,
+        AnthropicModelSettings,
+    )
+
     settings = AnthropicModelSettings(temperature=0.2, timeout=300.0)
     model = AnthropicModel(model_name)
     return Agent(model, output_type=output_type, model_settings=settings)
 
 
 def _create_google_agent(model_name: str, output_type: type[OutputT]) -> Agent[None, OutputT]:
+    from google.genai.types import ThinkingLevel  # noqa: PLC0415
+    from pydantic_ai import Agent  # noqa: PLC0415
+    from pydantic_ai.models.google import GoogleModel, GoogleModelSettings  # noqa: PLC0415
+
     settings = GoogleModelSettings(
         temperature=0.2,
         google_thinking_config={"thinking_level": ThinkingLevel.MEDIUM},
@@ -80,12 +111,18 @@ _PROVIDERS: tuple[ProviderConfig, ...] = (
         matcher=lambda model_name: model_name.startswith("claude-"),
         token_estimator=_estimate_anthropic_tokens,
         agent_factory=_create_anthropic_agent,
+        # Claude Sonnet pricing; 200k context window
+        input_usd_per_mtok=3.0,
+        max_prompt_tokens=150_000,
     ),
     ProviderConfig(
         name="google",
         matcher=lambda _model_name: True,
         token_estimator=_estimate_google_tokens,
         agent_factory=_create_google_agent,
+        # Gemini Flash pricing; 1M context window
+        input_usd_per_mtok=0.5,
+        max_prompt_tokens=250_000,
     ),
 )
 
@@ -103,6 +140,84 @@ def estimate_tokens(text: str, model_name: str) -> int:
     return resolve_provider(model_name).estimate_tokens(text, model_name)
 
 
+def get_token_budget(model_name: str, cost_target_usd: float) -> int:
+    """Return the prompt size in tokens that costs about cost_target_usd.
+
+    Smaller prompts are also answered faster, so the cost target bounds
+    scoring latency too. The budget never exceeds what fits the model's
+    context window; a cost target of 0 or less means no cost target.
+    """
+    return resolve_provider(model_name).token_budget(cost_target_usd)
+
+
 def create_agent(model_name: str, output_type: type[OutputT]) -> Agent[None, OutputT]:
     """Create a provider-backed agent for the given model name."""
     return resolve_provider(model_name).create_agent(model_name, output_type)
+
+
+class AgentRegistry:
+    """Per-process cache of agents keyed by model name and output type.
+
+    Agents (and the provider HTTP clients behind them) are created once and
+    reused across requests, so connections to the LLM APIs stay warm.
+    Each agent is entered as an async context so close() releases its
+    provider resources.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._agents: dict[tuple[str, type[BaseModel]], Agent[None, Any]] = {}
+        self._exit_stack = AsyncExitStack()
+        self._lock = asyncio.Lock()
+
+    async def get(self, model_name: str, output_type: type[OutputT]) -> Agent[None, OutputT]:
+        """Return the cached agent, creating it on first use."""
+        key = (model_name, output_type)
+        agent = self._agents.get(key)
+        if agent is None:
+            async with self._lock:
+                agent = self._agents.get(key)
+                if agent is None:
+                    agent = create_agent(model_name, output_type)
+                    await self._exit_stack.enter_async_context(agent)
+                    self._agents[key] = agent
+        return cast("Agent[None, OutputT]", agent)
+
+    async def close(self) -> None:
+        """Release all agents and their provider clients."""
+        async with self._lock:
+            self._agents.clear()
+            exit_stack, self._exit_stack = self._exit_stack, AsyncExitStack()
+        await exit_stack.aclose()
+
+
+_agent_registry = AgentRegistry()
+
+
+async def get_agent(model_name: str, output_type: type[OutputT]) -> Agent[None, OutputT]:
+    """Return a shared provider-backed agent for the given model name."""
+    return await _agent_registry.get(model_name, output_type)
+
+
+async def close_agents() -> None:
+    """Release all shared agents (call on application shutdown)."""
+    await _agent_registry.close()
+
+
+class ModelBehaviorError(Exception):
+    """The model broke the expected protocol (pydantic-ai UnexpectedModelBehavior)."""
+
+
+async def run_agent(agent: Agent[None, OutputT], prompt: str) -> AgentRunResult[OutputT]:
+    """Run an agent on a prompt.
+
+    Raises:
+        ModelBehaviorError: The model's response could not be used, so
+            callers catch it without importing pydantic-ai themselves.
+    """
+    from pydantic_ai.exceptions import UnexpectedModelBehavior  # noqa: PLC0415
+
+    try:
+        return await agent.run(prompt)
+    except UnexpectedModelBehavior as e:
+        raise ModelBehaviorError(str(e)) from e
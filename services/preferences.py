@@ -0,0 +1,242 @@
+"""Keyword matching of free-text user preferences to hotel amenities.
+
+Preferences are matched against a fixed dictionary of amenities. Each
+amenity has the ETG serp filter that marks it in search and content data
+and words (Russian and English) that identify it both in the user's text
+and in amenity_groups names; some are also implied by metapolicy sections
+(a parking policy means there is parking). Mentions of an amenity are a
+ranking signal; only explicit, non-negated phrases make it a requirement
+that drops hotels.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import cache
+from typing import TYPE_CHECKING, Any, cast
+
+if TYPE_CHECKING:
+    from .hotels import HotelFull
+
+
+@dataclass(frozen=True)
+class AmenityPreference:
+    """Amenity that can be requested in user preferences.
+
+    Attributes:
+        serp_filter: ETG serp filter value for the amenity.
+        label: Human-readable name used in reasons.
+        stems: Lowercase words matched in preferences and amenity names, as
+            a ranking signal; a trailing "*" matches any word starting with
+            the stem, other entries match whole words only.
+        required_phrases: Regular expressions of explicit whole-word phrases
+            that make the amenity a hard requirement (a pool), so that hotels
+            without it are dropped. Amenities without them (Wi-Fi) only
+            score lower.
+    """
+
+    serp_filter: str
+    label: str
+    stems: tuple[str, ...]
+    required_phrases: tuple[str, ...] = ()
+
+
+AMENITY_PREFERENCES: tuple[AmenityPreference, ...] = (
+    AmenityPreference(
+        "has_parking",
+        "парковка",
+        ("парков*", "паркинг*", "parking", "автомобил*"),
+        (r"парковк\w*", r"паркинг\w*", r"parking"),
+    ),
+    AmenityPreference(
+        "has_pool", "бассейн", ("бассейн*", "pool", "pools"), (r"бассейн\w*", r"(swimming )?pool")
+    ),
+    AmenityPreference(
+        "has_pets",
+        "можно с животными",
+        ("животн*", "собак*", "кошк*", "питом*", "pet", "pets", "dog", "dogs", "cat", "cats"),
+        (
+            r"с (животн|собак|кошк|питом)\w*",
+            r"pets?([- ]friendly)?",
+            r"with (a |my |our )?(dog|cat)s?",
+        ),
+    ),
+    AmenityPreference("has_kids", "для детей", ("детск*", "детей", "ребен*", "ребён*", "kids")),
+    AmenityPreference("has_internet", "интернет", ("wi-fi", "wifi", "интернет*", "internet")),
+    AmenityPreference(
+        "has_fitness",
+        "фитнес",
+        ("фитнес*", "спортзал*", "тренаж*", "gym", "fitness"),
+        (r"фитнес\w*", r"спортзал\w*", r"тренаж[её]рн\w* зал\w*", r"gym", r"fitness"),
+    ),
+    AmenityPreference(
+        "has_spa",
+        "спа",
+        ("спа", "spa", "саун*", "sauna", "массаж*"),
+        (r"спа", r"spa", r"саун\w*", r"sauna"),
+    ),
+    AmenityPreference(
+        "has_jacuzzi",
+        "джакузи",
+        ("джакузи", "jacuzzi", "гидромассаж*"),
+        (r"джакузи", r"jacuzzi", r"гидромассажн\w* ванн\w*"),
+    ),
+    AmenityPreference("has_meal", "питание", ("завтрак*", "питани*", "ресторан*", "breakfast")),
+    AmenityPreference(
+        "has_airport_transfer",
+        "трансфер",
+        ("трансфер*", "аэропорт*", "transfer", "airport"),
+        (r"трансфер\w*", r"(airport )?(transfer|shuttle)"),
+    ),
+    AmenityPreference(
+        "has_disabled_support",
+        "доступная среда",
+        ("инвалид*", "коляс*", "accessible", "accessibility", "wheelchair"),
+        (r"для инвалидов", r"инвалидн\w* коляс\w*", r"доступн\w* сред\w*", r"wheelchair"),
+    ),
+    AmenityPreference("has_smoking", "можно курить", ("курен*", "курит*", "smoking")),
+    AmenityPreference("has_ski", "лыжи", ("лыж*", "горнолыж*", "ski")),
+    AmenityPreference(
+        "kitchen",
+        "кухня",
+        ("кухн*", "kitchen", "kitchenette", "готовить"),
+        (r"кухн\w*", r"kitchen(ette)?"),
+    ),
+    AmenityPreference(
+        "air_conditioning",
+        "кондиционер",
+        ("кондиционер*", "air conditioning"),
+        (r"кондиционер\w*", r"air[- ]conditioning"),
+    ),
+    AmenityPreference("beach", "пляж", ("пляж*", "beach", "море")),
+)
+
+# Metapolicy sections whose presence means the hotel offers the amenity
+METAPOLICY_FILTERS: dict[str, str] = {
+    "parking": "has_parking",
+    "pets": "has_pets",
+    "internet": "has_internet",
+    "shuttle": "has_airport_transfer",
+    "meal": "has_meal",
+}
+
+# Words that negate an amenity mentioned up to NEGATION_WINDOW words later,
+# as in "без животных" or "no pool"
+NEGATION_WORDS = frozenset({"без", "не", "нет", "no", "not", "without", "sans", "pas", "ohne"})
+NEGATION_WINDOW = 3
+# Negation following the amenity ("парковка не нужна", "pool is not needed")
+_NEGATION_AFTER = re.compile(
+    r"^\s+(?:\w+\s+)?(?:не|not|no)\s+(?:нуж|обязат|важ|надо|требу|need|requir|necessar|important)"
+)
+_CLAUSE_BOUNDARY = re.compile(r"[.,;:!?()\n|]+")
+_WORD_BOUNDARY = re.compile(r"[^\w\-]+")
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and collapse punctuation so words match on their boundaries."""
+    return " " + _WORD_BOUNDARY.sub(" ", text.lower()) + " "
+
+
+def _clauses(text: str) -> list[str]:
+    """Split text into normalized clauses, so negation does not cross them."""
+    return [_normalize(clause) for clause in _CLAUSE_BOUNDARY.split(text)]
+
+
+@cache
+def _stem_pattern(stems: tuple[str, ...]) -> re.Pattern[str]:
+    words = [
+        re.escape(stem[:-1]) + r"[\w\-]*" if stem.endswith("*") else re.escape(stem)
+        for stem in stems
+    ]
+    return re.compile(r"(?<!\w)(?:" + "|".join(words) + r")(?!\w)")
+
+
+@cache
+def _phrase_pattern(phrases: tuple[str, ...]) -> re.Pattern[str]:
+    return re.compile(r"(?<!\w)(?:" + "|".join(phrases) + r")(?!\w)")
+
+
+def _contains_stem(text: str, stems: tuple[str, ...]) -> bool:
+    return _stem_pattern(stems).search(text) is not None
+
+
+def _is_negated(clause: str, start: int, end: int) -> bool:
+    """Check whether the mention at clause[start:end] is negated."""
+    before = clause[:start].split()[-NEGATION_WINDOW:]
+    return any(word in NEGATION_WORDS for word in before) or bool(
+        _NEGATION_AFTER.match(clause[end:])
+    )
+
+
+def _mentioned(clauses: list[str], pattern: re.Pattern[str]) -> bool:
+    """Check whether any clause mentions the pattern without negating it."""
+    return any(
+        not _is_negated(clause, match.start(), match.end())
+        for clause in clauses
+        for match in pattern.finditer(clause)
+    )
+
+
+def match_preferences(user_preferences: str | None) -> list[AmenityPreference]:
+    """Return amenities wanted in free-text preferences, in dictionary order.
+
+    Negated mentions ("без животных", "парковка не нужна") do not count.
+    """
+    if not user_preferences:
+        return []
+    clauses = _clauses(user_preferences)
+    return [pref for pref in AMENITY_PREFERENCES if _mentioned(clauses, _stem_pattern(pref.stems))]
+
+
+def required_preferences(user_preferences: str | None) -> list[AmenityPreference]:
+    """Return amenities that preferences explicitly require.
+
+    Only explicit phrases count, and only in clauses without any negation
+    word; anything less certain is left to ranking.
+    """
+    if not user_preferences:
+        return []
+    clauses = [
+        clause for clause in _clauses(user_preferences) if NEGATION_WORDS.isdisjoint(clause.split())
+    ]
+    return [
+        pref
+        for pref in AMENITY_PREFERENCES
+        if pref.required_phrases and _mentioned(clauses, _phrase_pattern(pref.required_phrases))
+    ]
+
+
+def hotel_amenity_text(hotel: HotelFull) -> str:
+    """Return normalized amenity names of a hotel for stem matching."""
+    names = [
+        amenity
+        for group in hotel.get("amenity_groups") or []
+        for amenity in group.get("amenities") or []
+    ]
+    return _normalize(" | ".join(names))
+
+
+def hotel_has_amenity(
+    hotel: HotelFull,
+    preference: AmenityPreference,
+    amenity_text: str | None = None,
+) -> bool:
+    """Check serp filters, metapolicy and amenity names of a hotel for an amenity.
+
+    Args:
+        hotel: Combined hotel data.
+        preference: Amenity to look for.
+        amenity_text: Precomputed hotel_amenity_text(hotel), if available.
+    """
+    if preference.serp_filter in (hotel.get("serp_filters") or []):
+        return True
+    metapolicy = cast("dict[str, Any]", hotel.get("metapolicy_struct") or {})
+    if any(
+        metapolicy.get(section)
+        for section, serp_filter in METAPOLICY_FILTERS.items()
+        if serp_filter == preference.serp_filter
+    ):
+        return True
+    text = amenity_text if amenity_text is not None else hotel_amenity_text(hotel)
+    return _contains_stem(text, preference.stems)
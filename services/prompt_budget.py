@@ -0,0 +1,119 @@
+"""Fit LLM-ready hotel data into a prompt token budget."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, TypedDict
+
+from .llm_providers import estimate_tokens
+from .prompt_encoding import PromptEncoding, encode_hotel_text
+
+
+@dataclass(frozen=True)
+class BudgetStep:
+    """One reduction step; each field caps the corresponding content if set."""
+
+    max_reviews: int | None = None
+    review_text_max_length: int | None = None
+    max_rates: int | None = None
+
+
+# Reduction ladder, cheapest loss of information first. Caps only tighten
+# from step to step, so applying them in order never restores content.
+BUDGET_STEPS: tuple[BudgetStep, ...] = (
+    BudgetStep(review_text_max_length=256),
+    BudgetStep(max_reviews=15),
+    BudgetStep(max_rates=10),
+    BudgetStep(review_text_max_length=128),
+    BudgetStep(max_reviews=5),
+    BudgetStep(max_rates=3),
+    BudgetStep(max_reviews=0),
+)
+
+
+class PromptBudgetResult(TypedDict):
+    """Result of fit_hotels_to_budget function."""
+
+    hotels: list[dict[str, Any]]
+    estimated_tokens: int
+    reduced_hotels: int
+    dropped_hotels: int
+
+
+def _estimate_hotel_tokens(
+    hotel: dict[str, Any],
+    model_name: str,
+    encoding: PromptEncoding,
+) -> int:
+    return estimate_tokens(encode_hotel_text(hotel, encoding), model_name)
+
+
+def _apply_step(hotel: dict[str, Any], step: BudgetStep) -> None:
+    """Apply a reduction step to a hotel prepared by prepare_hotel_for_llm."""
+    reviews: list[dict[str, Any]] = hotel.get("reviews", {}).get("reviews", [])
+    if step.max_reviews is not None:
+        del reviews[step.max_reviews :]
+    if step.review_text_max_length is not None:
+        for review in reviews:
+            review["plus"] = review["plus"][: step.review_text_max_length]
+            review["minus"] = review["minus"][: step.review_text_max_length]
+    if step.max_rates is not None:
+        del hotel["rates"][step.max_rates :]
+
+
+def fit_hotels_to_budget(  # noqa: PLR0913
+    hotels_data: list[dict[str, Any]],
+    *,
+    token_budget: int,
+    base_tokens: int,
+    model_name: str,
+    encoding: PromptEncoding = "json",
+    min_hotels: int = 1,
+) -> PromptBudgetResult:
+    """Reduce hotel data in place until the prompt fits the token budget.
+
+    Hotels are expected in rank order (best first), so content is removed
+    from the tail of the list first. Each step of BUDGET_STEPS is applied
+    hotel by hotel, starting from the lowest-ranked one, until the estimate
+    fits. If all steps are exhausted, lowest-ranked hotels are dropped,
+    keeping at least min_hotels.
+
+    Args:
+        hotels_data: Hotels prepared by prepare_hotel_for_llm, best first.
+        token_budget: Target prompt size in tokens.
+        base_tokens: Estimated tokens of the prompt without hotel data.
+        model_name: Model name used for token estimation.
+        encoding: Encoding the hotels are sent in; sizes are estimated on it.
+        min_hotels: Minimum number of hotels to keep.
+
+    Returns:
+        PromptBudgetResult with the fitted hotels and the new estimate.
+    """
+    hotel_tokens = [_estimate_hotel_tokens(hotel, model_name, encoding) for hotel in hotels_data]
+    total = base_tokens + sum(hotel_tokens)
+    reduced: set[int] = set()
+
+    for step in BUDGET_STEPS:
+        if total <= token_budget:
+            break
+        for index in reversed(range(len(hotels_data))):
+            if total <= token_budget:
+                break
+            _apply_step(hotels_data[index], step)
+            new_tokens = _estimate_hotel_tokens(hotels_data[index], model_name, encoding)
+            if new_tokens < hotel_tokens[index]:
+                reduced.add(index)
+            total += new_tokens - hotel_tokens[index]
+            hotel_tokens[index] = new_tokens
+
+    keep = len(hotels_data)
+    while total > token_budget and keep > min_hotels:
+        keep -= 1
+        total -= hotel_tokens[keep]
+
+    return {
+        "hotels": hotels_data[:keep],
+        "estimated_tokens": total,
+        "reduced_hotels": sum(1 for index in reduced if index < keep),
+        "dropped_hotels": len(hotels_data) - keep,
+    }
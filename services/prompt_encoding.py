@@ -0,0 +1,197 @@
+"""Encodings of LLM-ready hotel data for the scoring prompt.
+
+The "json" encoding embeds hotels as a plain JSON list. The "compact"
+encoding replaces repeated keys with a header of field names plus
+positional rows, moves repeated strings (kinds, meal types, room names,
+amenities, serp filters) into a shared string table and replaces rate
+match hashes with short per-hotel aliases.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Literal, TypedDict
+
+PromptEncoding = Literal["json", "compact"]
+PROMPT_ENCODINGS: tuple[PromptEncoding, ...] = ("json", "compact")
+
+HOTEL_FIELDS = (
+    "hotel_id",
+    "name",
+    "stars",
+    "kind",
+    "hotel_chain",
+    "address",
+    "check_in_time",
+    "check_out_time",
+    "metapolicy_struct",
+    "facts_summary",
+    "serp_filters",
+    "rates",
+    "reviews",
+)
+FACTS_FIELDS = ("year_built", "year_renovated")
+RATE_FIELDS = (
+    "rate_id",
+    "daily_prices",
+    "meal_data.value",
+    "meal_data.has_breakfast",
+    "room_name",
+    "amenities_data",
+    "deposit",
+)
+REVIEWS_FIELDS = ("total_reviews", "avg_rating", "detailed_averages", "reviews", "digest")
+DETAILED_FIELDS = (
+    "cleanness",
+    "location",
+    "price",
+    "services",
+    "room",
+    "meal",
+    "wifi",
+    "hygiene",
+)
+REVIEW_FIELDS = ("rating", "created", "plus", "minus")
+
+
+class EncodedHotels(TypedDict):
+    """Hotels encoded for the prompt.
+
+    rate_aliases maps hotel_id to {alias: match_hash} for encodings that
+    shorten rate hashes; it is empty for the plain JSON encoding.
+    """
+
+    payload: str
+    rate_aliases: dict[str, dict[str, str]]
+
+
+class _StringTable:
+    """Deduplicated string table referenced by integer index."""
+
+    def __init__(self) -> None:
+        self._index: dict[str, int] = {}
+
+    def ref(self, value: str | None) -> int | None:
+        if value is None:
+            return None
+        return self._index.setdefault(value, len(self._index))
+
+    def refs(self, values: list[str] | None) -> list[int | None]:
+        return [self.ref(value) for value in values or []]
+
+    def to_list(self) -> list[str]:
+        return list(self._index)
+
+
+def _encode_rate(rate: dict[str, Any], alias: str, strings: _StringTable) -> list[Any]:
+    meal_data = rate.get("meal_data") or {}
+    return [
+        alias,
+        rate.get("daily_prices", []),
+        strings.ref(meal_data.get("value")),
+        meal_data.get("has_breakfast"),
+        strings.ref(rate.get("room_name")),
+        strings.refs(rate.get("amenities_data")),
+        rate.get("deposit"),
+    ]
+
+
+def _encode_reviews(reviews_data: dict[str, Any]) -> list[Any]:
+    detailed = reviews_data.get("detailed_averages") or {}
+    return [
+        reviews_data.get("total_reviews", 0),
+        reviews_data.get("avg_rating"),
+        [detailed.get(field) for field in DETAILED_FIELDS],
+        [
+            [review.get(field) for field in REVIEW_FIELDS]
+            for review in reviews_data.get("reviews", [])
+        ],
+        reviews_data.get("digest"),
+    ]
+
+
+def _encode_hotel(
+    hotel: dict[str, Any],
+    strings: _StringTable,
+) -> tuple[list[Any], dict[str, str]]:
+    """Encode one hotel as a positional row; also return its rate aliases."""
+    aliases: dict[str, str] = {}
+    rate_rows: list[list[Any]] = []
+    for number, rate in enumerate(hotel.get("rates", []), start=1):
+        alias = f"r{number}"
+        aliases[alias] = rate.get("match_hash", "")
+        rate_rows.append(_encode_rate(rate, alias, strings))
+
+    facts = hotel.get("facts_summary") or {}
+    row = [
+        hotel.get("hotel_id", ""),
+        hotel.get("name", ""),
+        hotel.get("stars", 0),
+        strings.ref(hotel.get("kind")),
+        strings.ref(hotel.get("hotel_chain")),
+        hotel.get("address", ""),
+        hotel.get("check_in_time"),
+        hotel.get("check_out_time"),
+        hotel.get("metapolicy_struct") or {},
+        [facts.get(field) for field in FACTS_FIELDS],
+        strings.refs(hotel.get("serp_filters")),
+        rate_rows,
+        _encode_reviews(hotel.get("reviews", {})),
+    ]
+    return row, aliases
+
+
+def encode_hotels_compact(hotels_data: list[dict[str, Any]]) -> EncodedHotels:
+    """Encode hotels prepared by prepare_hotel_for_llm as positional rows."""
+    strings = _StringTable()
+    rate_aliases: dict[str, dict[str, str]] = {}
+    rows: list[list[Any]] = []
+
+    for hotel in hotels_data:
+        row, aliases = _encode_hotel(hotel, strings)
+        rate_aliases[hotel.get("hotel_id", "")] = aliases
+        rows.append(row)
+
+    payload = {
+        "strings": strings.to_list(),
+        "fields": {
+            "hotel": HOTEL_FIELDS,
+            "facts_summary": FACTS_FIELDS,
+            "rate": RATE_FIELDS,
+            "reviews": REVIEWS_FIELDS,
+            "detailed_averages": DETAILED_FIELDS,
+            "review": REVIEW_FIELDS,
+        },
+        "hotels": rows,
+    }
+    return {
+        "payload": json.dumps(payload, ensure_ascii=False, separators=(",", ":")),
+        "rate_aliases": rate_aliases,
+    }
+
+
+def encode_hotel_text(hotel: dict[str, Any], encoding: PromptEncoding = "json") -> str:
+    """Return the text one hotel adds to the payload, for token estimates.
+
+    For the compact encoding this is the hotel's row plus the strings it
+    references; strings shared with other hotels are counted for each of
+    them, so estimates stay on the safe side.
+    """
+    if encoding == "compact":
+        strings = _StringTable()
+        row, _aliases = _encode_hotel(hotel, strings)
+        return json.dumps([strings.to_list(), row], ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(hotel, ensure_ascii=False)
+
+
+def encode_hotels(
+    hotels_data: list[dict[str, Any]],
+    encoding: PromptEncoding = "json",
+) -> EncodedHotels:
+    """Encode hotels for the scoring prompt with the selected encoding."""
+    if encoding == "compact":
+        return encode_hotels_compact(hotels_data)
+    return {
+        "payload": json.dumps(hotels_data, ensure_ascii=False),
+        "rate_aliases": {},
+    }
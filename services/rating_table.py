@@ -0,0 +1,222 @@
+"""Per-hotel review aggregates as a NumPy structured array.
+
+Review aggregation flattens the ratings and detailed scores of a batch of
+hotels into arrays and reduces them per hotel with np.bincount, instead of
+looping over reviews in Python for every hotel. The rows (one per hotel:
+review count, average rating and the eight detailed averages, NaN where
+unknown) are kept in a process-wide table indexed by hid, which presort
+reads directly. Notebooks can view the table as a pandas DataFrame.
+"""
+
+from __future__ import annotations
+
+from itertools import chain
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from numpy.typing import NDArray
+
+    from .reviews import ReviewRecord
+
+# Detailed review categories, in the order of ReviewRecord.detailed_scores
+DETAILED_FIELDS = (
+    "cleanness",
+    "location",
+    "price",
+    "services",
+    "room",
+    "meal",
+    "wifi",
+    "hygiene",
+)
+AVERAGE_FIELDS = ("avg_rating", *DETAILED_FIELDS)
+
+RATING_DTYPE = np.dtype(
+    [
+        ("hid", np.int64),
+        ("count", np.int32),
+        *((field, np.float64) for field in AVERAGE_FIELDS),
+    ]
+)
+
+RATING_TABLE_SIZE = 100_000
+MIN_TABLE_CAPACITY = 1024
+
+_NO_SCORES = (None,) * len(DETAILED_FIELDS)
+
+
+def _grouped_means(
+    owner: NDArray[np.intp],
+    values: NDArray[np.float64],
+    groups: int,
+) -> NDArray[np.float64]:
+    """Per-group means of each row's non-NaN values, rounded to 0.1.
+
+    values holds one row per averaged field and one column per review;
+    the result has one row per group and one column per field. Groups
+    without values for a field get NaN. The whole array is rounded at once
+    with np.round, which scales by 10 and rounds half to even, so a mean
+    halfway between two tenths (e.g. 1/20) may differ by 0.1 from the
+    built-in round().
+    """
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    means = np.full((len(values), groups), np.nan)
+    for field, mean in enumerate(means):
+        # bincount adds weights in order, like a Python sum()
+        sums = np.bincount(owner, weights=filled[field], minlength=groups)
+        counts = np.bincount(owner, weights=valid[field], minlength=groups)
+        np.divide(sums, counts, out=mean, where=counts > 0)
+    return np.round(means, 1).T
+
+
+def build_rating_rows(reviews_map: dict[int, list[ReviewRecord]]) -> NDArray[np.void]:
+    """Aggregate each hotel's reviews into one row, in reviews_map order."""
+    groups = len(reviews_map)
+    rows = np.zeros(groups, dtype=RATING_DTYPE)
+    rows["hid"] = np.fromiter(reviews_map, dtype=np.int64, count=groups)
+    counts = np.fromiter(
+        (len(reviews) for reviews in reviews_map.values()), dtype=np.int32, count=groups
+    )
+    rows["count"] = counts
+
+    # Flat arrays over all reviews; owner maps each review to its hotel's row
+    owner = np.repeat(np.arange(groups), counts)
+    reviews = [review for hotel_reviews in reviews_map.values() for review in hotel_reviews]
+    # Object arrays cast None to NaN, much faster than float arrays built from
+    # sequences containing None
+    scores = np.fromiter(
+        chain.from_iterable(review.detailed_scores or _NO_SCORES for review in reviews),
+        dtype=object,
+        count=len(reviews) * len(DETAILED_FIELDS),
+    ).reshape(len(reviews), len(DETAILED_FIELDS))
+    # One row per averaged field, so each field is contiguous for bincount
+    values = np.empty((len(AVERAGE_FIELDS), len(reviews)))
+    values[0] = np.array([review.rating for review in reviews], dtype=object)
+    values[1:] = scores.T
+
+    means = _grouped_means(owner, values, groups)
+    for column, field in enumerate(AVERAGE_FIELDS):
+        rows[field] = means[:, column]
+    return rows
+
+
+def empty_rating_rows(hids: list[int]) -> NDArray[np.void]:
+    """Return rows for hotels without reviews: zero count, NaN averages."""
+    rows = np.zeros(len(hids), dtype=RATING_DTYPE)
+    rows["hid"] = hids
+    for field in AVERAGE_FIELDS:
+        rows[field] = np.nan
+    return rows
+
+
+class RatingTable:
+    """Review aggregates of recently seen hotels, as rows indexed by hid.
+
+    Args:
+        max_size: Maximum number of hotels kept; when full, the least
+            recently updated half is dropped.
+    """
+
+    def __init__(self, max_size: int = RATING_TABLE_SIZE) -> None:
+        """Initialize an empty table."""
+        self._max_size = max_size
+        self._rows = np.zeros(0, dtype=RATING_DTYPE)
+        # Update number of each row, for eviction
+        self._updated = np.zeros(0, dtype=np.int64)
+        self._updates = 0
+        self._size = 0
+        self._index: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        """Return the number of hotels in the table."""
+        return self._size
+
+    def update(self, rows: NDArray[np.void]) -> None:
+        """Insert rows, replacing existing rows of the same hotels."""
+        hids: list[int] = rows["hid"].tolist()
+        new_hotels = sum(hid not in self._index for hid in hids)
+        if self._size + new_hotels > self._max_size:
+            self._evict(self._max_size // 2)
+        self._ensure_capacity(self._size + len(hids))
+
+        slots = np.empty(len(hids), dtype=np.intp)
+        for i, hid in enumerate(hids):
+            slot = self._index.get(hid)
+            if slot is None:
+                slot = self._index[hid] = self._size
+                self._size += 1
+            slots[i] = slot
+        self._rows[slots] = rows
+        self._updates += 1
+        self._updated[slots] = self._updates
+
+    def get(self, hid: int) -> np.void | None:
+        """Return a copy of the hotel's row, or None if it is not in the table."""
+        slot = self._index.get(hid)
+        return None if slot is None else self._rows[slot].copy()
+
+    def lookup(self, hids: list[int]) -> tuple[NDArray[np.void], NDArray[np.bool_]]:
+        """Return rows for hids and a mask of hotels found in the table.
+
+        Rows of hotels not in the table have zero count and NaN averages.
+        """
+        slots = np.fromiter(
+            (self._index.get(hid, -1) for hid in hids), dtype=np.intp, count=len(hids)
+        )
+        found = slots >= 0
+        rows = empty_rating_rows(hids)
+        rows[found] = self._rows[slots[found]]
+        return rows, found
+
+    def rows(self) -> NDArray[np.void]:
+        """Return a view of the table rows."""
+        return self._rows[: self._size]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Return the table as a DataFrame indexed by hid.
+
+        Columns are views of the table's memory where pandas allows it,
+        so they change when the table is updated; copy the frame to keep
+        a snapshot.
+        """
+        import pandas as pd  # noqa: PLC0415 - only needed in notebooks
+
+        rows = self.rows()
+        return pd.DataFrame(
+            {field: rows[field] for field in ("count", *AVERAGE_FIELDS)},
+            index=pd.Index(rows["hid"], name="hid"),
+            copy=False,
+        )
+
+    def _ensure_capacity(self, size: int) -> None:
+        if size <= len(self._rows):
+            return
+        capacity = max(size, 2 * len(self._rows), MIN_TABLE_CAPACITY)
+        rows = np.zeros(capacity, dtype=RATING_DTYPE)
+        rows[: self._size] = self._rows[: self._size]
+        updated = np.zeros(capacity, dtype=np.int64)
+        updated[: self._size] = self._updated[: self._size]
+        self._rows, self._updated = rows, updated
+
+    def _evict(self, keep: int) -> None:
+        """Keep only the keep most recently updated rows."""
+        newest = np.sort(np.argsort(self._updated[: self._size], kind="stable")[-keep:])
+        if not keep:
+            newest = newest[:0]
+        self._rows[: len(newest)] = self._rows[newest]
+        self._updated[: len(newest)] = self._updated[newest]
+        self._size = len(newest)
+        hids: list[int] = self._rows["hid"][: self._size].tolist()
+        self._index = {hid: slot for slot, hid in enumerate(hids)}
+
+
+_rating_table = RatingTable()
+
+
+def get_rating_table() -> RatingTable:
+    """Return the process-wide rating table."""
+    return _rating_table
@@ -0,0 +1,215 @@
+"""Local full-text region index built from the ETG region dump.
+
+The dump (JSON lines, one region per line with names in several languages)
+is imported into SQLite with an FTS5 table over all names, so region
+autocomplete works at local latency without calling ETG multicomplete.
+
+Usage:
+    python -m services.region_index region_dump.jsonl.zst [--db PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+from config import REGION_INDEX_PATH
+from utils.dumps import iter_dump_records
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from etg import Region
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 10_000
+DEFAULT_SUGGEST_LIMIT = 10
+BUSY_TIMEOUT_MS = 1000
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _fts_query(query: str) -> str | None:
+    """Build an FTS5 query matching every query word as a prefix."""
+    tokens = _TOKEN.findall(query.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class RegionIndex:
+    """SQLite FTS5 index of regions with multilingual names.
+
+    Args:
+        path: Database file path; parent directories are created.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open (or create) the index database."""
+        db_path = Path(path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS regions ("
+            " id INTEGER PRIMARY KEY,"
+            " type TEXT NOT NULL,"
+            " country_code TEXT NOT NULL,"
+            " hotels INTEGER NOT NULL,"
+            " names TEXT NOT NULL);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS region_names USING fts5("
+            " name, region_id UNINDEXED,"
+            " tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4');"
+        )
+
+    def __len__(self) -> int:
+        """Return the number of indexed regions."""
+        with self._lock:
+            return int(self._conn.execute("SELECT count(*) FROM regions").fetchone()[0])
+
+    def import_regions(self, records: Iterable[dict[str, Any]]) -> int:
+        """Replace the index contents with regions from dump records.
+
+        Returns:
+            Number of imported regions.
+        """
+        count = 0
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM regions")
+            self._conn.execute("DELETE FROM region_names")
+            regions: list[tuple[int, str, str, int, str]] = []
+            names: list[tuple[str, int]] = []
+            for record in records:
+                region_names = {
+                    language: name for language, name in (record.get("name") or {}).items() if name
+                }
+                if not region_names:
+                    continue
+                regions.append(
+                    (
+                        record["id"],
+                        record.get("type") or "",
+                        record.get("country_code") or "",
+                        len(record.get("hids") or []),
+                        json.dumps(region_names, ensure_ascii=False),
+                    )
+                )
+                names.extend((name, record["id"]) for name in set(region_names.values()))
+                count += 1
+                if len(regions) >= IMPORT_BATCH_SIZE:
+                    self._insert(regions, names)
+                    regions, names = [], []
+            self._insert(regions, names)
+        return count
+
+    def _insert(
+        self,
+        regions: list[tuple[int, str, str, int, str]],
+        names: list[tuple[str, int]],
+    ) -> None:
+        self._conn.executemany("INSERT OR REPLACE INTO regions VALUES (?, ?, ?, ?, ?)", regions)
+        self._conn.executemany("INSERT INTO region_names VALUES (?, ?)", names)
+
+    def search(
+        self,
+        query: str,
+        language: str = "en",
+        *,
+        country_code: str | None = None,
+        limit: int = DEFAULT_SUGGEST_LIMIT,
+    ) -> list[Region]:
+        """Find regions with a name in any language matching query words.
+
+        Regions with more hotels come first. Names are returned in the
+        requested language, falling back to English.
+
+        Args:
+            query: Search query string.
+            language: Language of returned names (ISO 639-1).
+            country_code: Restrict to a country (ISO 3166-1 alpha-2).
+            limit: Maximum number of regions.
+
+        Returns:
+            Matching regions in the same shape as ETG multicomplete; empty
+            if the database cannot be read.
+        """
+        fts_query = _fts_query(query)
+        if fts_query is None:
+            return []
+        sql = (
+            "SELECT r.id, r.type, r.country_code, r.names FROM regions r"
+            " WHERE r.id IN (SELECT region_id FROM region_names WHERE region_names MATCH ?)"
+        )
+        params: list[Any] = [fts_query]
+        if country_code:
+            sql += " AND r.country_code = ?"
+            params.append(country_code.upper())
+        sql += " ORDER BY r.hotels DESC, r.id LIMIT ?"
+        params.append(limit)
+
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("[region_index] search failed: %s", e)
+            return []
+        regions: list[Region] = []
+        for region_id, region_type, region_country, names_json in rows:
+            names: dict[str, str] = json.loads(names_json)
+            name = names.get(language) or names.get("en") or next(iter(names.values()))
+            regions.append(
+                cast(
+                    "Region",
+                    {
+                        "id": region_id,
+                        "name": name,
+                        "type": region_type,
+                        "country_code": region_country,
+                    },
+                )
+            )
+        return regions
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+def open_region_index(path: str | Path = REGION_INDEX_PATH) -> RegionIndex | None:
+    """Open the region index if it has been imported, else return None."""
+    if not Path(path).exists():
+        return None
+    index = RegionIndex(path)
+    if not len(index):
+        index.close()
+        return None
+    return index
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Import a region dump file into the local region index."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("dump", type=Path, help="region dump (.jsonl, .gz or .zst)")
+    parser.add_argument("--db", type=Path, default=Path(REGION_INDEX_PATH), help="index path")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    index = RegionIndex(args.db)
+    try:
+        count = index.import_regions(iter_dump_records(args.dump))
+    finally:
+        index.close()
+    logger.info("Imported %d regions into %s", count, args.db)
+
+
+if __name__ == "__main__":
+    main()
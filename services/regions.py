@@ -0,0 +1,174 @@
+"""Cached region autocomplete on top of ETG multicomplete.
+
+Suggestions are cached per (normalized query, language) with LRU eviction
+and a TTL. Regions returned by ETG are also added to a per-language prefix
+trie, so a query that extends an already answered, complete prefix
+("моск" -> "москв") is answered locally. If a local region index imported
+from the ETG region dump is available, it is searched before ETG.
+Concurrent identical queries share one ETG request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from etg import ETGClient, Region
+
+    from .region_index import RegionIndex
+
+SUGGEST_CACHE_SIZE = 4096
+SUGGEST_CACHE_TTL_SECONDS = 6 * 3600.0
+# ETG does not document how many regions multicomplete returns at most, so
+# only short result lists are trusted to contain every match of a prefix.
+COMPLETE_RESULT_MAX_REGIONS = 4
+MAX_TRIE_REGIONS = 50_000
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, unify ё/е and collapse whitespace."""
+    return _SPACES.sub(" ", query.strip().lower().replace("ё", "е"))
+
+
+@dataclass
+class _TrieNode:
+    children: dict[str, _TrieNode] = field(default_factory=dict)
+    region_ids: set[int] = field(default_factory=set)
+
+
+class RegionTrie:
+    """Prefix trie over region names; each name is indexed from every word."""
+
+    def __init__(self) -> None:
+        """Initialize an empty trie."""
+        self._root = _TrieNode()
+        self._regions: dict[int, Region] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed regions."""
+        return len(self._regions)
+
+    def add(self, region: Region) -> None:
+        """Index a region by its name and by each word suffix of the name."""
+        if region["id"] in self._regions:
+            return
+        self._regions[region["id"]] = region
+        words = normalize_query(region["name"]).split(" ")
+        for start in range(len(words)):
+            node = self._root
+            for char in " ".join(words[start:]):
+                node = node.children.setdefault(char, _TrieNode())
+                node.region_ids.add(region["id"])
+
+    def search(self, prefix: str) -> set[int]:
+        """Return ids of regions with a name word sequence starting with prefix."""
+        node = self._root
+        for char in prefix:
+            next_node = node.children.get(char)
+            if next_node is None:
+                return set()
+            node = next_node
+        return node.region_ids
+
+
+class RegionSuggestCache:
+    """Region autocomplete with caching, local prefix answers and coalescing.
+
+    Args:
+        client: ETG client used on cache misses.
+        index: Local region index searched before ETG, if imported.
+        max_size: Maximum number of cached queries.
+        ttl: Seconds a cached answer stays valid.
+    """
+
+    def __init__(
+        self,
+        client: ETGClient,
+        *,
+        index: RegionIndex | None = None,
+        max_size: int = SUGGEST_CACHE_SIZE,
+        ttl: float = SUGGEST_CACHE_TTL_SECONDS,
+    ) -> None:
+        """Initialize an empty cache."""
+        self._client = client
+        self._index = index
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], tuple[float, list[Region]]] = OrderedDict()
+        self._tries: dict[str, RegionTrie] = {}
+        self._inflight: dict[tuple[str, str], asyncio.Future[list[Region]]] = {}
+
+    def _get(self, key: tuple[str, str]) -> list[Region] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, regions = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return regions
+
+    def _put(self, key: tuple[str, str], regions: list[Region]) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, regions)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+        trie = self._tries.get(key[1])
+        if trie is None or len(trie) > MAX_TRIE_REGIONS:
+            trie = self._tries[key[1]] = RegionTrie()
+        for region in regions:
+            trie.add(region)
+
+    def _answer_locally(self, query: str, language: str) -> list[Region] | None:
+        """Answer from the longest cached complete prefix of query, if any."""
+        trie = self._tries.get(language)
+        if trie is None:
+            return None
+        for length in range(len(query) - 1, 0, -1):
+            regions = self._get((query[:length], language))
+            if regions is None:
+                continue
+            if len(regions) > COMPLETE_RESULT_MAX_REGIONS:
+                return None
+            matches = trie.search(query)
+            local = [region for region in regions if region["id"] in matches]
+            return local or None
+        return None
+
+    async def suggest(self, query: str, language: str = "en") -> list[Region]:
+        """Return regions matching query, calling ETG only when needed."""
+        key = (normalize_query(query), language)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+        if self._index is not None and (
+            indexed := await asyncio.to_thread(self._index.search, query, language)
+        ):
+            self._put(key, indexed)
+            return indexed
+        local = self._answer_locally(*key)
+        if local is not None:
+            self._put(key, local)
+            return local
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key, query, language))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded, so a disconnecting client does not cancel the shared request
+        return await asyncio.shield(future)
+
+    async def _fetch(self, key: tuple[str, str], query: str, language: str) -> list[Region]:
+        regions = await self._client.suggest_region(query, language)
+        self._put(key, regions)
+        return regions
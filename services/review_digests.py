@@ -0,0 +1,311 @@
+"""Cached per-hotel review digests used in place of raw reviews in prompts.
+
+A digest is a short list of pros and cons summarized by an LLM from a
+hotel's recent reviews. Digests are keyed by hid and stored in a local
+SQLite cache, so a hotel seen in an earlier search is scored from its
+digest instead of dozens of raw reviews. A digest stays in use until it
+expires or the hotel's number of reviews with text drifts too far from
+the number it was built from, so a few new reviews do not trigger a new
+summary. Missing digests are summarized in the background after a search
+and are picked up by the next one; summaries share a process-wide
+concurrency limit and an hourly cap on LLM calls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypedDict
+
+import httpx
+from pydantic import BaseModel, ValidationError
+
+from config import (
+    REVIEW_DIGEST_CACHE_PATH,
+    REVIEW_DIGEST_MAX_PER_HOUR,
+    REVIEW_DIGEST_MODEL,
+)
+from services.llm_providers import ModelBehaviorError, get_agent, run_agent
+
+from .scoring import build_review_sample
+
+if TYPE_CHECKING:
+    from .hotels import HotelFull
+    from .reviews import ReviewRecord
+
+logger = logging.getLogger(__name__)
+
+MAX_DIGEST_REVIEWS = 100
+DIGEST_REVIEW_TEXT_MAX_LENGTH = 512
+MAX_DIGEST_POINTS = 6
+# Summaries running at once per process, across all searches
+DIGEST_CONCURRENCY = 4
+# Summaries queued or running per process; hotels over it are left for
+# later searches
+MAX_PENDING_DIGESTS = 100
+DIGEST_TTL_SECONDS = 30 * 24 * 3600.0
+# A digest is rebuilt once the number of reviews with text differs from
+# the number it was built from by more than this many reviews, or this
+# fraction of them, whichever is larger
+DIGEST_REFRESH_MIN_REVIEWS = 20
+DIGEST_REFRESH_FRACTION = 0.2
+
+
+class ReviewDigest(TypedDict):
+    """Summarized pros and cons of a hotel's reviews."""
+
+    pros: list[str]
+    cons: list[str]
+    review_count: int
+
+
+class ReviewDigestResponse(BaseModel):
+    """LLM response with summarized review points."""
+
+    pros: list[str]
+    cons: list[str]
+
+
+@cache
+def get_digest_prompt_template() -> str:
+    """Return the review digest prompt template, read on first use."""
+    prompt_path = Path(__file__).parent.parent / "prompts" / "review_digest.md"
+    return prompt_path.read_text(encoding="utf-8")
+
+
+def _reviews_with_text(reviews: list[ReviewRecord]) -> list[ReviewRecord]:
+    return [r for r in reviews if r.has_text()]
+
+
+def _hotel_reviews(hotel: HotelFull) -> list[ReviewRecord]:
+    hr = hotel.get("reviews", {})
+    return hr.get("reviews", []) if isinstance(hr, dict) else []
+
+
+def is_digest_fresh(source_reviews: int, created_at: float, review_count: int) -> bool:
+    """Return True if a digest still represents the hotel's reviews.
+
+    Args:
+        source_reviews: Reviews with text the digest was built from.
+        created_at: Digest creation time (Unix timestamp).
+        review_count: Reviews with text the hotel has now.
+    """
+    if time.time() - created_at > DIGEST_TTL_SECONDS:
+        return False
+    allowed = max(DIGEST_REFRESH_MIN_REVIEWS, DIGEST_REFRESH_FRACTION * source_reviews)
+    return abs(review_count - source_reviews) <= allowed
+
+
+class ReviewDigestCache:
+    """SQLite-backed digest store keyed by hid.
+
+    Methods are blocking; async code calls them through asyncio.to_thread.
+    Database errors are logged and read as misses.
+
+    Args:
+        path: Database file path; parent directories are created.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open (or create) the digest database."""
+        db_path = Path(path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hotel_review_digests ("
+            " hid INTEGER PRIMARY KEY,"
+            " digest TEXT NOT NULL,"
+            " source_reviews INTEGER NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, review_counts: dict[int, int]) -> dict[int, ReviewDigest]:
+        """Return fresh digests for {hid: number of reviews with text}."""
+        if not review_counts:
+            return {}
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT hid, digest, source_reviews, created_at FROM hotel_review_digests"
+                    " WHERE hid IN (SELECT value FROM json_each(?))",
+                    (json.dumps(list(review_counts)),),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("[digests] read failed: %s", e)
+            return {}
+        return {
+            hid: json.loads(digest)
+            for hid, digest, source_reviews, created_at in rows
+            if is_digest_fresh(source_reviews, created_at, review_counts[hid])
+        }
+
+    def put(self, hid: int, digest: ReviewDigest, source_reviews: int) -> None:
+        """Store a digest built from source_reviews reviews with text."""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO hotel_review_digests VALUES (?, ?, ?, ?)",
+                    (hid, json.dumps(digest, ensure_ascii=False), source_reviews, time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning("[digests] write failed for hid=%d: %s", hid, e)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_cache: ReviewDigestCache | None = None
+# hids being summarized, across all searches of the process
+_in_flight: set[int] = set()
+_summary_slots = asyncio.Semaphore(DIGEST_CONCURRENCY)
+# Start times of summaries within the last hour, for REVIEW_DIGEST_MAX_PER_HOUR
+_recent_summaries: deque[float] = deque()
+_background_tasks: set[asyncio.Task[int]] = set()
+
+
+def get_review_digest_cache() -> ReviewDigestCache:
+    """Return the process-wide digest cache at REVIEW_DIGEST_CACHE_PATH."""
+    global _cache  # noqa: PLW0603
+    if _cache is None:
+        _cache = ReviewDigestCache(REVIEW_DIGEST_CACHE_PATH)
+    return _cache
+
+
+def _text_review_counts(hotels: list[HotelFull]) -> dict[int, int]:
+    """Return {hid: number of reviews with text} for hotels that have any."""
+    counts: dict[int, int] = {}
+    for hotel in hotels:
+        count = len(_reviews_with_text(_hotel_reviews(hotel)))
+        if count:
+            counts[hotel["hid"]] = count
+    return counts
+
+
+async def load_review_digests(
+    hotels: list[HotelFull],
+    cache: ReviewDigestCache | None = None,
+) -> dict[int, ReviewDigest]:
+    """Look up fresh cached digests for hotels.
+
+    Returns:
+        Mapping of hid to digest for hotels that have one.
+    """
+    digest_cache = cache or get_review_digest_cache()
+    return await asyncio.to_thread(digest_cache.get_many, _text_review_counts(hotels))
+
+
+async def summarize_reviews(
+    reviews: list[ReviewRecord],
+    model_name: str | None = None,
+) -> ReviewDigest:
+    """Summarize reviews into a digest with a single LLM call."""
+    sample = build_review_sample(reviews, MAX_DIGEST_REVIEWS, DIGEST_REVIEW_TEXT_MAX_LENGTH)
+    prompt = get_digest_prompt_template().format(
+        max_points=MAX_DIGEST_POINTS,
+        reviews_json=json.dumps(sample, ensure_ascii=False),
+    )
+    agent = await get_agent(model_name or REVIEW_DIGEST_MODEL, ReviewDigestResponse)
+    response = await run_agent(agent, prompt)
+    return {
+        "pros": response.output.pros[:MAX_DIGEST_POINTS],
+        "cons": response.output.cons[:MAX_DIGEST_POINTS],
+        "review_count": len(sample),
+    }
+
+
+def _take_hourly_slot() -> bool:
+    """Count a summary against the hourly cap; False if the cap is reached."""
+    now = time.monotonic()
+    while _recent_summaries and now - _recent_summaries[0] > 3600.0:  # noqa: PLR2004
+        _recent_summaries.popleft()
+    if len(_recent_summaries) >= REVIEW_DIGEST_MAX_PER_HOUR:
+        return False
+    _recent_summaries.append(now)
+    return True
+
+
+async def summarize_missing_digests(
+    hotels: list[HotelFull],
+    cache: ReviewDigestCache | None = None,
+    model_name: str | None = None,
+) -> int:
+    """Summarize and cache digests for hotels without a fresh one.
+
+    Hotels already being summarized for another search are skipped, and
+    at most MAX_PENDING_DIGESTS summaries are queued per process; hotels
+    are taken in the given order. Summaries over the hourly cap are
+    skipped.
+
+    Returns:
+        Number of digests created.
+    """
+    digest_cache = cache or get_review_digest_cache()
+    review_counts = _text_review_counts(hotels)
+    cached = await asyncio.to_thread(digest_cache.get_many, review_counts)
+    capacity = MAX_PENDING_DIGESTS - len(_in_flight)
+    missing = [hid for hid in review_counts if hid not in cached and hid not in _in_flight]
+    missing = missing[: max(capacity, 0)]
+    _in_flight.update(missing)
+    reviews_by_hid = {hotel["hid"]: _hotel_reviews(hotel) for hotel in hotels}
+    created = 0
+
+    async def summarize(hid: int) -> None:
+        nonlocal created
+        try:
+            async with _summary_slots:
+                if not _take_hourly_slot():
+                    return
+                digest = await summarize_reviews(reviews_by_hid[hid], model_name)
+            await asyncio.to_thread(digest_cache.put, hid, digest, review_counts[hid])
+            created += 1
+        except (
+            ValidationError,
+            ValueError,
+            httpx.HTTPError,
+            ModelBehaviorError,
+            RuntimeError,
+            OSError,
+        ) as e:
+            logger.warning("[digests] hid=%d: %s: %s", hid, type(e).__name__, e)
+        finally:
+            _in_flight.discard(hid)
+
+    await asyncio.gather(*(summarize(hid) for hid in missing))
+    return created
+
+
+def schedule_digest_summaries(hotels: list[HotelFull]) -> None:
+    """Summarize missing digests in a background task, without waiting."""
+    task = asyncio.create_task(summarize_missing_digests(_shrink_hotels(hotels)))
+    _background_tasks.add(task)
+    task.add_done_callback(_on_summaries_done)
+
+
+def _shrink_hotels(hotels: list[HotelFull]) -> list[HotelFull]:
+    """Keep only what the summarizer reads, so the search data can be freed."""
+    shrunk: list[Any] = [
+        {"hid": hotel["hid"], "reviews": {"reviews": _hotel_reviews(hotel)}} for hotel in hotels
+    ]
+    return shrunk
+
+
+def _on_summaries_done(task: asyncio.Task[int]) -> None:
+    _background_tasks.discard(task)
+    if task.cancelled():
+        return
+    if (error := task.exception()) is not None:
+        logger.error("[digests] background summarization failed: %s", error)
+    elif task.result():
+        logger.info("[digests] created %d review digests", task.result())
@@ -1,18 +1,30 @@
 """Review fetching, filtering, and aggregation."""
 
+from __future__ import annotations
+
+import asyncio
+import math
+import sys
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
-from typing import Any, TypedDict, cast
+from typing import TYPE_CHECKING, Any, TypedDict, cast
 
 from etg import ETGAPIError, ETGClient
 
-# Type alias for review dict (API data + custom fields)
-ReviewDict = dict[str, Any]
+from .rating_table import DETAILED_FIELDS, build_rating_rows, get_rating_table
+from .shared_cache import get_shared_cache
+
+if TYPE_CHECKING:
+    from etg import Review
 
 REVIEWS_BATCH_SIZE = 100
 BASE_REVIEW_LANGUAGES = ["ru", "en"]
 
 DEFAULT_MAX_AGE_YEARS = 5
 DEFAULT_MAX_REVIEWS = 500
+# Shared cache namespace of ReviewRecord.to_row lists; renamed when the row
+# layout changes, so rows cached by an older version are not read
+REVIEW_RECORDS_NAMESPACE = "review_records_v2"
 
 # Mapping for string values in detailed_review
 WIFI_SCORES: dict[str, float] = {
@@ -32,6 +44,171 @@ HYGIENE_SCORES: dict[str, float] = {
 }
 
 
+# Detailed categories with numeric values (wifi and hygiene are strings)
+NUMERIC_DETAILED_FIELDS = ("cleanness", "location", "price", "services", "room", "meal")
+_WIFI_LABELS = {score: label for label, score in WIFI_SCORES.items()}
+_HYGIENE_LABELS = {score: label for label, score in HYGIENE_SCORES.items()}
+
+
+def _detailed_scores(detailed: dict[str, Any]) -> tuple[float | None, ...] | None:
+    """Map detailed review values to scores; 0 and unknown values are unrated."""
+    scores: list[float | None] = []
+    for field in NUMERIC_DETAILED_FIELDS:
+        value = detailed.get(field)
+        scores.append(value if isinstance(value, int | float) and value > 0 else None)
+    scores.append(WIFI_SCORES.get(detailed.get("wifi") or ""))
+    scores.append(HYGIENE_SCORES.get(detailed.get("hygiene") or ""))
+    return tuple(scores) if any(score is not None for score in scores) else None
+
+
+def _detailed_review(scores: tuple[float | None, ...]) -> dict[str, Any]:
+    """Map detailed scores back to ETG detailed_review values; unrated are 0 or null."""
+    *numeric, wifi, hygiene = scores
+    detailed: dict[str, Any] = {
+        field: score or 0 for field, score in zip(NUMERIC_DETAILED_FIELDS, numeric, strict=True)
+    }
+    detailed["wifi"] = _WIFI_LABELS.get(wifi) if wifi is not None else None
+    detailed["hygiene"] = _HYGIENE_LABELS.get(hygiene) if hygiene is not None else None
+    return detailed
+
+
+@dataclass(slots=True)
+class ReviewRecord:
+    """Review fields used by ranking, scoring and digests, and sent to clients.
+
+    Built from ETG reviews at fetch time. Language codes, room names,
+    traveller and trip types are interned, so reviews share one string per
+    value.
+    """
+
+    id: int
+    rating: float | None
+    created: str
+    plus: str
+    minus: str
+    language: str
+    detailed_scores: tuple[float | None, ...] | None = None
+    # Only passed through to API clients
+    author: str = ""
+    adults: int = 0
+    children: int = 0
+    room_name: str = ""
+    nights: int = 0
+    images: tuple[str, ...] | None = None
+    traveller_type: str = ""
+    trip_type: str = ""
+
+    @classmethod
+    def from_review(cls, review: Review, language: str) -> ReviewRecord:
+        """Build a record from an ETG review in the given language."""
+        detailed = review.get("detailed_review")
+        images = review.get("images")
+        return cls(
+            id=review["id"],
+            rating=review.get("rating"),
+            created=review.get("created") or "",
+            plus=review.get("review_plus") or "",
+            minus=review.get("review_minus") or "",
+            language=sys.intern(language),
+            detailed_scores=_detailed_scores(dict(detailed)) if detailed else None,
+            author=review.get("author") or "",
+            adults=review.get("adults") or 0,
+            children=review.get("children") or 0,
+            room_name=sys.intern(review.get("room_name") or ""),
+            nights=review.get("nights") or 0,
+            images=tuple(images) if images is not None else None,
+            traveller_type=sys.intern(review.get("traveller_type") or ""),
+            trip_type=sys.intern(review.get("trip_type") or ""),
+        )
+
+    @classmethod
+    def from_row(cls, row: list[Any]) -> ReviewRecord:
+        """Build a record from its to_row form."""
+        (
+            review_id,
+            rating,
+            created,
+            plus,
+            minus,
+            language,
+            detailed_scores,
+            author,
+            adults,
+            children,
+            room_name,
+            nights,
+            images,
+            traveller_type,
+            trip_type,
+        ) = row
+        return cls(
+            id=review_id,
+            rating=rating,
+            created=created,
+            plus=plus,
+            minus=minus,
+            language=sys.intern(language),
+            detailed_scores=tuple(detailed_scores) if detailed_scores else None,
+            author=author,
+            adults=adults,
+            children=children,
+            room_name=sys.intern(room_name),
+            nights=nights,
+            images=tuple(images) if images is not None else None,
+            traveller_type=sys.intern(traveller_type),
+            trip_type=sys.intern(trip_type),
+        )
+
+    def to_row(self) -> list[Any]:
+        """Return the fields as a JSON-serializable list."""
+        return [
+            self.id,
+            self.rating,
+            self.created,
+            self.plus,
+            self.minus,
+            self.language,
+            self.detailed_scores,
+            self.author,
+            self.adults,
+            self.children,
+            self.room_name,
+            self.nights,
+            self.images,
+            self.traveller_type,
+            self.trip_type,
+        ]
+
+    def to_review(self) -> dict[str, Any]:
+        """Return the record in the ETG review shape sent to API clients.
+
+        "_lang" is the review language.
+        """
+        review: dict[str, Any] = {
+            "id": self.id,
+            "review_plus": self.plus or None,
+            "review_minus": self.minus or None,
+            "created": self.created,
+            "author": self.author,
+            "adults": self.adults,
+            "children": self.children,
+            "room_name": self.room_name,
+            "nights": self.nights,
+            "images": list(self.images) if self.images is not None else None,
+            "traveller_type": self.traveller_type,
+            "trip_type": self.trip_type,
+            "rating": self.rating,
+            "_lang": self.language,
+        }
+        if self.detailed_scores is not None:
+            review["detailed_review"] = _detailed_review(self.detailed_scores)
+        return review
+
+    def has_text(self) -> bool:
+        """Return True if the review has non-blank plus or minus text."""
+        return bool(self.plus.strip() or self.minus.strip())
+
+
 class DetailedAverages(TypedDict):
     """Average scores for detailed review categories."""
 
@@ -52,136 +229,133 @@ class HotelReviews(TypedDict):
     from ALL reviews, plus review list (filtered or unfiltered).
     """
 
-    reviews: list[ReviewDict]
+    reviews: list[ReviewRecord]
     total_reviews: int
     avg_rating: float | None
     detailed_averages: DetailedAverages
 
 
-async def batch_get_reviews(
-    client: ETGClient,
-    hotel_ids: list[int],
-    language: str,
-) -> dict[int, HotelReviews]:
-    """Fetch reviews for hotels in multiple languages and compute aggregated ratings.
-
-    Returns reviews with avg_rating and detailed_averages computed from ALL reviews.
-    """
+def get_review_languages(language: str) -> list[str]:
+    """Return review languages to fetch: base languages plus the requested one."""
     languages = BASE_REVIEW_LANGUAGES.copy()
     if language not in languages:
         languages.append(language)
+    return languages
 
-    reviews_map: dict[int, list[ReviewDict]] = {}
+
+async def fetch_reviews_batch(
+    client: ETGClient,
+    hotel_ids: list[int],
+    languages: list[str],
+) -> dict[int, list[ReviewRecord]]:
+    """Fetch raw reviews for one batch of hotels in several languages.
+
+    Reviews per (hotel, language) found in the shared cache are not
+    requested again. Languages that fail with an API error are skipped.
+    """
+    reviews_map: dict[int, list[ReviewRecord]] = {}
 
     for language_code in languages:
-        try:
-            for i in range(0, len(hotel_ids), REVIEWS_BATCH_SIZE):
-                hotel_id_batch = hotel_ids[i : i + REVIEWS_BATCH_SIZE]
-                hotel_reviews_batch = await client.get_hotel_reviews(
-                    hotel_ids=hotel_id_batch,
-                    language=language_code,
-                )
-
-                for hotel_data in hotel_reviews_batch:
-                    hid = hotel_data["hid"]
-                    reviews_list = cast("list[ReviewDict]", hotel_data["reviews"])
-
-                    for review in reviews_list:
-                        review["_lang"] = language_code
-
-                    if hid not in reviews_map:
-                        reviews_map[hid] = []
-                    reviews_map[hid].extend(reviews_list)
-        except ETGAPIError:
-            continue
-
-    # Compute ratings for each hotel
-    result: dict[int, HotelReviews] = {}
-    for hid, reviews in reviews_map.items():
-        avg_rating, detailed_averages = _compute_ratings(reviews)
+        by_hid = await _fetch_language_reviews(client, hotel_ids, language_code)
+        for hid, reviews_list in by_hid.items():
+            if reviews_list:
+                reviews_map.setdefault(hid, []).extend(reviews_list)
+
+    return reviews_map
+
+
+async def _fetch_language_reviews(
+    client: ETGClient,
+    hotel_ids: list[int],
+    language_code: str,
+) -> dict[int, list[ReviewRecord]]:
+    """Fetch reviews in one language, from the shared cache where possible."""
+    cache = get_shared_cache()
+    by_hid: dict[int, list[ReviewRecord]] = {}
+    if cache is not None:
+        cached = await asyncio.to_thread(
+            cache.get_many,
+            REVIEW_RECORDS_NAMESPACE,
+            [f"{hid}:{language_code}" for hid in hotel_ids],
+        )
+        by_hid = {
+            int(key.partition(":")[0]): [ReviewRecord.from_row(row) for row in rows]
+            for key, rows in cached.items()
+        }
+    missing_ids = [hid for hid in hotel_ids if hid not in by_hid]
+    if not missing_ids:
+        return by_hid
+
+    try:
+        hotel_reviews_batch = await client.get_hotel_reviews(
+            hotel_ids=missing_ids,
+            language=language_code,
+        )
+    except ETGAPIError:
+        return by_hid
+
+    # Hotels absent from the response have no reviews in this language
+    fetched: dict[int, list[ReviewRecord]] = {hid: [] for hid in missing_ids}
+    for hotel_data in hotel_reviews_batch:
+        fetched.setdefault(hotel_data["hid"], []).extend(
+            ReviewRecord.from_review(review, language_code) for review in hotel_data["reviews"]
+        )
+    if cache is not None:
+        await asyncio.to_thread(
+            cache.set_many,
+            REVIEW_RECORDS_NAMESPACE,
+            {
+                f"{hid}:{language_code}": [record.to_row() for record in records]
+                for hid, records in fetched.items()
+            },
+        )
+    by_hid.update(fetched)
+    return by_hid
+
+
+def aggregate_reviews(reviews_map: dict[int, list[ReviewRecord]]) -> dict[int, HotelReviews]:
+    """Compute avg_rating and detailed_averages for each hotel's reviews.
+
+    Aggregates of all hotels are computed at once as rating table rows,
+    which are also stored in the process-wide rating table for presort.
+    """
+    rows = build_rating_rows(reviews_map)
+    get_rating_table().update(rows)
 
+    result: dict[int, HotelReviews] = {}
+    for (hid, count, *averages), reviews in zip(rows.tolist(), reviews_map.values(), strict=True):
+        avg_rating, *detailed = [None if math.isnan(value) else value for value in averages]
         result[hid] = {
             "reviews": reviews,
-            "total_reviews": len(reviews),
+            "total_reviews": count,
             "avg_rating": avg_rating,
-            "detailed_averages": detailed_averages,
+            "detailed_averages": cast(
+                "DetailedAverages", dict(zip(DETAILED_FIELDS, detailed, strict=True))
+            ),
         }
 
     return result
 
 
-def _avg(total: float, count: int) -> float | None:
-    """Calculate average or return None if no data."""
-    return round(total / count, 1) if count else None
-
+async def batch_get_reviews(
+    client: ETGClient,
+    hotel_ids: list[int],
+    language: str,
+) -> dict[int, HotelReviews]:
+    """Fetch reviews for hotels in multiple languages and compute aggregated ratings.
 
-def _compute_ratings(reviews: list[ReviewDict]) -> tuple[float | None, DetailedAverages]:
-    """Compute avg_rating and detailed_averages from reviews.
+    Returns reviews with avg_rating and detailed_averages computed from ALL reviews.
+    """
+    languages = get_review_languages(language)
+    reviews_map: dict[int, list[ReviewRecord]] = {}
 
-    Args:
-        reviews: List of review dictionaries.
+    for i in range(0, len(hotel_ids), REVIEWS_BATCH_SIZE):
+        hotel_id_batch = hotel_ids[i : i + REVIEWS_BATCH_SIZE]
+        batch_reviews = await fetch_reviews_batch(client, hotel_id_batch, languages)
+        for hid, reviews in batch_reviews.items():
+            reviews_map.setdefault(hid, []).extend(reviews)
 
-    Returns:
-        Tuple of (avg_rating, detailed_averages).
-    """
-    avg_rating = None
-    if reviews:
-        ratings = [r["rating"] for r in reviews if r.get("rating") is not None]
-        if ratings:
-            avg_rating = round(sum(ratings) / len(ratings), 1)
-
-    detailed_averages = _compute_detailed_averages(reviews)
-    return avg_rating, detailed_averages
-
-
-def _compute_detailed_averages(reviews: list[ReviewDict]) -> DetailedAverages:
-    """Compute average scores for detailed review categories."""
-    rating_fields = (
-        "cleanness",
-        "location",
-        "price",
-        "services",
-        "room",
-        "meal",
-        "wifi",
-        "hygiene",
-    )
-    rating_sums: dict[str, float] = dict.fromkeys(rating_fields, 0.0)
-    rating_counts: dict[str, int] = dict.fromkeys(rating_fields, 0)
-
-    for review in reviews:
-        detailed = review.get("detailed_review")
-        if not detailed:
-            continue
-
-        # Numeric fields (0 means not rated)
-        for field in ("cleanness", "location", "price", "services", "room", "meal"):
-            value = detailed.get(field)
-            if isinstance(value, int | float) and value > 0:
-                rating_sums[field] += float(value)
-                rating_counts[field] += 1
-
-        # String fields
-        wifi_str = detailed.get("wifi")
-        if wifi_str and wifi_str in WIFI_SCORES:
-            rating_sums["wifi"] += WIFI_SCORES[wifi_str]
-            rating_counts["wifi"] += 1
-
-        hygiene_str = detailed.get("hygiene")
-        if hygiene_str and hygiene_str in HYGIENE_SCORES:
-            rating_sums["hygiene"] += HYGIENE_SCORES[hygiene_str]
-            rating_counts["hygiene"] += 1
-
-    return {
-        "cleanness": _avg(rating_sums["cleanness"], rating_counts["cleanness"]),
-        "location": _avg(rating_sums["location"], rating_counts["location"]),
-        "price": _avg(rating_sums["price"], rating_counts["price"]),
-        "services": _avg(rating_sums["services"], rating_counts["services"]),
-        "room": _avg(rating_sums["room"], rating_counts["room"]),
-        "meal": _avg(rating_sums["meal"], rating_counts["meal"]),
-        "wifi": _avg(rating_sums["wifi"], rating_counts["wifi"]),
-        "hygiene": _avg(rating_sums["hygiene"], rating_counts["hygiene"]),
-    }
+    return aggregate_reviews(reviews_map)
 
 
 def filter_reviews(
@@ -204,10 +378,10 @@ def filter_reviews(
 
         # Filter by age
         cutoff_date = (datetime.now(tz=UTC) - timedelta(days=max_age_years * 365)).isoformat()
-        recent_reviews = [r for r in reviews if r["created"] >= cutoff_date]
+        recent_reviews = [r for r in reviews if r.created >= cutoff_date]
 
         # Sort by date and limit
-        recent_reviews.sort(key=lambda x: x["created"], reverse=True)
+        recent_reviews.sort(key=lambda x: x.created, reverse=True)
         recent_reviews = recent_reviews[:max_reviews]
 
         filtered_map[hid] = {
@@ -0,0 +1,176 @@
+"""Memory benchmark of review records against raw ETG review dicts.
+
+Builds synthetic review payloads shaped like the ETG reviews endpoint
+(parsed from JSON, so every string is a separate object as in production),
+then measures with tracemalloc the memory held by the raw dicts with a
+language key added, as reviews were kept before, and by ReviewRecord
+lists built from them.
+
+Usage:
+    python -m services.reviews_benchmark [--hotels 500] [--languages 3] [--reviews 100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from typing import TYPE_CHECKING, Any
+
+from .reviews import ReviewRecord
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+LANGUAGES = ("ru", "en", "de", "fr", "es", "it")
+TRAVELLER_TYPES = ("couple", "family", "solo", "business", "friends")
+TRIP_TYPES = ("leisure", "business")
+WIFI_VALUES = ("perfect", "good", "average", "poor", "bad", "unspecified")
+WORDS = (
+    "clean",
+    "quiet",
+    "friendly",
+    "staff",
+    "breakfast",
+    "location",
+    "metro",
+    "room",
+    "small",
+    "noisy",
+    "view",
+    "bed",
+    "shower",
+    "parking",
+    "helpful",
+    "центр",
+    "уютно",
+    "чисто",
+    "персонал",
+    "завтрак",
+    "шумно",
+    "тесно",
+    "рядом",
+    "вид",
+)
+
+MIB = 1024 * 1024
+
+
+def _text(rng: random.Random, max_words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(0, max_words)))
+
+
+def _review(rng: random.Random, review_id: int) -> dict[str, Any]:
+    """Return a synthetic review in the shape of the ETG reviews endpoint."""
+    return {
+        "id": review_id,
+        "review_plus": _text(rng, 40),
+        "review_minus": _text(rng, 25),
+        "created": f"20{rng.randint(19, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        f"T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+        "author": f"Guest {review_id}",
+        "adults": rng.randint(1, 4),
+        "children": rng.randint(0, 2),
+        "room_name": f"Standard Double Room {rng.randint(1, 20)}",
+        "nights": rng.randint(1, 14),
+        "images": [
+            f"https://cdn.example.com/{review_id}/{i}.jpg" for i in range(rng.randint(0, 3))
+        ],
+        "detailed_review": {
+            "cleanness": rng.randint(0, 10),
+            "location": rng.randint(0, 10),
+            "price": rng.randint(0, 10),
+            "services": rng.randint(0, 10),
+            "room": rng.randint(0, 10),
+            "meal": rng.randint(0, 10),
+            "wifi": rng.choice(WIFI_VALUES),
+            "hygiene": rng.choice(WIFI_VALUES),
+        },
+        "traveller_type": rng.choice(TRAVELLER_TYPES),
+        "trip_type": rng.choice(TRIP_TYPES),
+        "rating": round(rng.uniform(2, 10), 1),
+    }
+
+
+def build_payloads(
+    hotels: int,
+    languages: int,
+    reviews_per_language: int,
+    seed: int = 0,
+) -> list[tuple[str, str]]:
+    """Return (language, JSON payload) pairs, one per hotel and language."""
+    rng = random.Random(seed)  # noqa: S311 - synthetic data
+    payloads: list[tuple[str, str]] = []
+    review_id = 0
+    for _hotel in range(hotels):
+        for language in LANGUAGES[:languages]:
+            reviews = []
+            for _ in range(reviews_per_language):
+                review_id += 1
+                reviews.append(_review(rng, review_id))
+            payloads.append((language, json.dumps(reviews, ensure_ascii=False)))
+    return payloads
+
+
+def _held_bytes(build: Callable[[], object]) -> int:
+    """Return the traced memory held by the result of build()."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    del result
+    return held
+
+
+def _raw_reviews(payloads: list[tuple[str, str]]) -> list[list[dict[str, Any]]]:
+    hotels: list[list[dict[str, Any]]] = []
+    for language, payload in payloads:
+        reviews = json.loads(payload)
+        for review in reviews:
+            review["_lang"] = language
+        hotels.append(reviews)
+    return hotels
+
+
+def _review_records(payloads: list[tuple[str, str]]) -> list[list[ReviewRecord]]:
+    return [
+        [ReviewRecord.from_review(review, language) for review in json.loads(payload)]
+        for language, payload in payloads
+    ]
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Compare memory held by raw review dicts and review records."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--hotels", type=int, default=500, help="number of hotels")
+    parser.add_argument(
+        "--languages",
+        type=int,
+        default=3,
+        choices=range(1, len(LANGUAGES) + 1),
+        help="review languages per hotel",
+    )
+    parser.add_argument("--reviews", type=int, default=100, help="reviews per hotel and language")
+    args = parser.parse_args(argv)
+
+    payloads = build_payloads(args.hotels, args.languages, args.reviews)
+    total = args.hotels * args.languages * args.reviews
+    tracemalloc.start()
+    raw_bytes = _held_bytes(lambda: _raw_reviews(payloads))
+    record_bytes = _held_bytes(lambda: _review_records(payloads))
+    tracemalloc.stop()
+
+    print(  # noqa: T201
+        f"{total} reviews ({args.hotels} hotels x {args.languages} languages"
+        f" x {args.reviews}):\n"
+        f"  dicts:   {raw_bytes / MIB:8.1f} MiB  {raw_bytes / total:6.0f} B/review\n"
+        f"  records: {record_bytes / MIB:8.1f} MiB  {record_bytes / total:6.0f} B/review\n"
+        f"  saved:   {(1 - record_bytes / raw_bytes) * 100:8.0f} %"
+    )
+
+
+if __name__ == "__main__":
+    main()
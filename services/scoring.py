@@ -2,26 +2,50 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
+from functools import cache, partial
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, TypedDict
 
 import httpx
 from pydantic import BaseModel, ValidationError
-from pydantic_ai.exceptions import UnexpectedModelBehavior
-
-from config import SCORING_MODEL
-from services.llm_providers import create_agent, estimate_tokens
 
+from config import (
+    SCORING_HEDGE_DEFAULT_DELAY,
+    SCORING_HEDGE_MIN_DELAY,
+    SCORING_HEDGE_MODEL,
+    SCORING_HEDGE_QUANTILE,
+    SCORING_MODEL,
+    SCORING_PROMPT_COST_USD,
+    SCORING_PROMPT_ENCODING,
+    SCORING_TOKEN_BUDGET,
+)
+from services.llm_providers import (
+    ModelBehaviorError,
+    estimate_tokens,
+    get_agent,
+    get_token_budget,
+    run_agent,
+)
+
+from .hedging import HedgePolicy, get_latency_tracker, run_hedged
 from .hotels import filter_rates_by_price
+from .prompt_budget import fit_hotels_to_budget
+from .prompt_encoding import PROMPT_ENCODINGS, PromptEncoding, encode_hotels
+from .shared_cache import cache_key, get_shared_cache
 
 if TYPE_CHECKING:
     from pydantic_ai import Agent
+    from pydantic_ai.agent import AgentRunResult
 
     from etg import GuestRoom, HotelRate
 
     from .hotels import HotelFull
+    from .review_digests import ReviewDigest
+    from .reviews import ReviewRecord
 
+logger = logging.getLogger(__name__)
 
 # =============================================================================
 # Types
@@ -60,23 +84,43 @@ class ScoringResultDict(TypedDict):
     results: list[HotelScoreDict]
     error: str | None
     estimated_tokens: int
+    rate_aliases: dict[str, dict[str, str]]
 
 
 # =============================================================================
 # Configuration
 # =============================================================================
 
-def _load_scoring_prompt() -> str:
+
+def _load_scoring_prompt(filename: str = "hotel_scoring.md") -> str:
     """Load scoring prompt from markdown file."""
-    prompt_path = Path(__file__).parent.parent / "prompts" / "hotel_scoring.md"
+    prompt_path = Path(__file__).parent.parent / "prompts" / filename
     return prompt_path.read_text(encoding="utf-8")
 
-SCORING_PROMPT_TEMPLATE = _load_scoring_prompt()
+
+# Prompt file paired with each hotel data encoding
+SCORING_PROMPT_FILES: dict[PromptEncoding, str] = {
+    "json": "hotel_scoring.md",
+    "compact": "hotel_scoring_compact.md",
+}
+
+
+@cache
+def get_scoring_prompt_template(encoding: PromptEncoding = "json") -> str:
+    """Return the prompt template for a hotel data encoding, read on first use."""
+    return _load_scoring_prompt(SCORING_PROMPT_FILES[encoding])
+
 
 TOP_HOTELS_COUNT = 10
 MAX_TOP_HOTELS_COUNT = 12
 DEFAULT_RETRIES = 3
 
+HEDGE_POLICY = HedgePolicy(
+    quantile=SCORING_HEDGE_QUANTILE,
+    min_delay=SCORING_HEDGE_MIN_DELAY,
+    default_delay=SCORING_HEDGE_DEFAULT_DELAY,
+)
+
 
 # =============================================================================
 # Helpers
@@ -88,9 +132,63 @@ def _get_default_model() -> str:
     return SCORING_MODEL
 
 
-def _create_agent(model_name: str | None = None) -> Agent[None, ScoringResponse]:
-    """Create scoring agent with specified model."""
-    return create_agent(model_name or _get_default_model(), ScoringResponse)
+def _get_default_encoding() -> PromptEncoding:
+    """Get the prompt encoding from configuration, defaulting to plain JSON."""
+    if SCORING_PROMPT_ENCODING in PROMPT_ENCODINGS:
+        return SCORING_PROMPT_ENCODING
+    return "json"
+
+
+def _get_hedge_model(model_name: str) -> str | None:
+    """Get the hedge model from configuration, or None if hedging is off."""
+    if not SCORING_HEDGE_MODEL or model_name == SCORING_HEDGE_MODEL:
+        return None
+    return SCORING_HEDGE_MODEL
+
+
+def _get_token_budget(model_name: str, hedge_model: str | None = None) -> int:
+    """Get the prompt token budget from configuration or the prompt cost target.
+
+    With a hedge model the prompt must fit both models, so the smaller
+    provider budget is used.
+    """
+    if SCORING_TOKEN_BUDGET:
+        return SCORING_TOKEN_BUDGET
+    budget = get_token_budget(model_name, SCORING_PROMPT_COST_USD)
+    if hedge_model is not None:
+        budget = min(budget, get_token_budget(hedge_model, SCORING_PROMPT_COST_USD))
+    return budget
+
+
+async def _get_agent(model_name: str | None = None) -> Agent[None, ScoringResponse]:
+    """Get the shared scoring agent for the specified model."""
+    return await get_agent(model_name or _get_default_model(), ScoringResponse)
+
+
+async def warm_up_scoring_agent() -> None:
+    """Create the default (and hedge) scoring agents ahead of the first request."""
+    model_name = _get_default_model()
+    await _get_agent(model_name)
+    if (hedge_model := _get_hedge_model(model_name)) is not None:
+        await _get_agent(hedge_model)
+
+
+async def _run_scoring_agent(
+    agent: Agent[None, ScoringResponse],
+    hedge_agent: Agent[None, ScoringResponse] | None,
+    prompt: str,
+    model_name: str,
+) -> AgentRunResult[ScoringResponse]:
+    """Run the scoring prompt, hedged with hedge_agent if it is set."""
+    if hedge_agent is None:
+        return await run_agent(agent, prompt)
+    tracker = get_latency_tracker(model_name)
+    return await run_hedged(
+        partial(run_agent, agent, prompt),
+        partial(run_agent, hedge_agent, prompt),
+        delay=HEDGE_POLICY.deadline(tracker),
+        tracker=tracker,
+    )
 
 
 def _build_rate(rate: HotelRate) -> dict[str, Any]:
@@ -113,48 +211,37 @@ def _build_facts(facts: dict[str, Any]) -> dict[str, Any]:
     }
 
 
-def _review_date_key(review: dict[str, Any]) -> str:
-    created = review.get("created")
-    if isinstance(created, str):
-        return created[:10]
-    return ""
-
-
-def _build_review_sample(
-    raw_reviews: list[dict[str, Any]],
+def build_review_sample(
+    raw_reviews: list[ReviewRecord],
     max_reviews: int,
     review_text_max_length: int,
 ) -> list[dict[str, Any]]:
+    """Pick the newest reviews with text, trimmed to the fields the LLM uses."""
     # Filter reviews that have non-empty plus or minus text
-    filtered: list[dict[str, Any]] = []
-
-    for r in raw_reviews:
-        plus = (r.get("review_plus") or "").strip()
-        minus = (r.get("review_minus") or "").strip()
-        if plus or minus:
-            filtered.append(r)
+    filtered = [r for r in raw_reviews if r.has_text()]
 
     # Sort by date, newest first
-    filtered.sort(key=_review_date_key, reverse=True)
+    filtered.sort(key=lambda r: r.created[:10], reverse=True)
 
     # Take top max_reviews reviews
     return [
         {
-            "rating": r.get("rating"),
-            "created": (r.get("created") or "")[:10],
-            "plus": (r.get("review_plus") or "")[:review_text_max_length],
-            "minus": (r.get("review_minus") or "")[:review_text_max_length],
+            "rating": r.rating,
+            "created": r.created[:10],
+            "plus": r.plus[:review_text_max_length],
+            "minus": r.minus[:review_text_max_length],
         }
         for r in filtered[:max_reviews]
     ]
 
 
-def prepare_hotel_for_llm(
+def prepare_hotel_for_llm(  # noqa: PLR0913
     hotel: HotelFull,
     min_price: float | None,
     max_price: float | None,
     max_reviews: int,
     review_text_max_length: int,
+    digest: ReviewDigest | None = None,
 ) -> dict[str, Any]:
     """Prepare hotel data for LLM scoring.
 
@@ -164,6 +251,7 @@ def prepare_hotel_for_llm(
         max_price: Maximum price per night filter (or None).
         max_reviews: Maximum number of reviews to include.
         review_text_max_length: Maximum length of review text.
+        digest: Cached review digest; replaces raw reviews when given.
 
     Returns:
         Hotel data formatted for LLM.
@@ -177,14 +265,19 @@ def prepare_hotel_for_llm(
 
     hr = hotel.get("reviews", {})
     raw_reviews = hr.get("reviews", []) if isinstance(hr, dict) else []
-    reviews_sample = _build_review_sample(raw_reviews, max_reviews, review_text_max_length)
+    if digest is not None:
+        reviews_sample = []
+    else:
+        reviews_sample = build_review_sample(raw_reviews, max_reviews, review_text_max_length)
 
-    reviews_data = {
+    reviews_data: dict[str, Any] = {
         "total_reviews": hr.get("total_reviews", 0) if isinstance(hr, dict) else 0,
         "avg_rating": hr.get("avg_rating") if isinstance(hr, dict) else None,
         "detailed_averages": hr.get("detailed_averages", {}) if isinstance(hr, dict) else {},
         "reviews": reviews_sample,
     }
+    if digest is not None:
+        reviews_data["digest"] = {"pros": digest["pros"], "cons": digest["cons"]}
 
     return {
         "hotel_id": hotel.get("id", ""),
@@ -232,21 +325,23 @@ def _format_price_range(
 
 
 def _build_prompt(  # noqa: PLR0913
-    hotels_data: list[dict[str, Any]],
+    hotels_json: str,
+    total_hotels: int,
     user_preferences: str,
     guests: list[GuestRoom],
     min_price: float | None,
     max_price: float | None,
     currency: str | None,
     top_count: int,
+    encoding: PromptEncoding = "json",
 ) -> str:
-    """Build scoring prompt for hotels."""
-    return SCORING_PROMPT_TEMPLATE.format(
+    """Build scoring prompt for encoded hotels."""
+    return get_scoring_prompt_template(encoding).format(
         guests_info=_format_guests_info(guests),
         price_range=_format_price_range(min_price, max_price, currency),
         user_preferences=user_preferences,
-        total_hotels=len(hotels_data),
-        hotels_json=json.dumps(hotels_data, ensure_ascii=False),
+        total_hotels=total_hotels,
+        hotels_json=hotels_json,
         top_count=top_count,
     )
 
@@ -268,6 +363,9 @@ async def score_hotels(  # noqa: PLR0913
     model_name: str | None = None,
     retries: int = DEFAULT_RETRIES,
     top_count: int = TOP_HOTELS_COUNT,
+    token_budget: int | None = None,
+    prompt_encoding: PromptEncoding | None = None,
+    review_digests: dict[int, ReviewDigest] | None = None,
 ) -> ScoringResultDict:
     """Score hotels and return top N.
 
@@ -286,33 +384,109 @@ async def score_hotels(  # noqa: PLR0913
         model_name: Optional model name override.
         retries: Number of retry attempts on failure.
         top_count: Number of top hotels to return from LLM.
+        token_budget: Target prompt size in tokens; hotel data is reduced
+            to fit (defaults to the configured or provider budget).
+        prompt_encoding: Hotel data encoding and paired prompt variant
+            (defaults to SCORING_PROMPT_ENCODING).
+        review_digests: Cached review digests by hid, used instead of raw
+            reviews for the hotels they cover.
 
     Returns:
-        ScoringResultDict with results, error, and token estimate.
+        ScoringResultDict with results, error, token estimate and rate
+        aliases to resolve selected_rate_hash in finalize_scored_hotels.
     """
     # Resolve model name for tokenizer and agent
     resolved_model = model_name or _get_default_model()
-    agent = _create_agent(resolved_model)
+    agent = await _get_agent(resolved_model)
+    hedge_model = _get_hedge_model(resolved_model)
+    hedge_agent = await _get_agent(hedge_model) if hedge_model is not None else None
     top_count = min(top_count, len(hotels), MAX_TOP_HOTELS_COUNT)
 
+    digests = review_digests or {}
     hotels_for_llm = [
-        prepare_hotel_for_llm(h, min_price, max_price, max_reviews, review_text_max_length)
+        prepare_hotel_for_llm(
+            h, min_price, max_price, max_reviews, review_text_max_length, digests.get(h["hid"])
+        )
         for h in hotels
     ]
+    encoding = prompt_encoding or _get_default_encoding()
+    base_prompt = _build_prompt(
+        encode_hotels([], encoding)["payload"],
+        0,
+        user_preferences,
+        guests,
+        min_price,
+        max_price,
+        currency,
+        top_count,
+        encoding,
+    )
+    token_budget = token_budget or _get_token_budget(resolved_model, hedge_model)
+    budget = fit_hotels_to_budget(
+        hotels_for_llm,
+        token_budget=token_budget,
+        base_tokens=estimate_tokens(base_prompt, resolved_model),
+        model_name=resolved_model,
+        encoding=encoding,
+        min_hotels=top_count,
+    )
+    if budget["dropped_hotels"]:
+        logger.warning(
+            "[scoring] prompt budget of %d tokens cut %d of %d hotels",
+            token_budget,
+            budget["dropped_hotels"],
+            len(hotels_for_llm),
+        )
+    if budget["reduced_hotels"] or budget["dropped_hotels"]:
+        logger.info(
+            "[scoring] prompt fitted to budget: %d hotels reduced, %d dropped, ~%d tokens",
+            budget["reduced_hotels"],
+            budget["dropped_hotels"],
+            budget["estimated_tokens"],
+        )
+
+    encoded = encode_hotels(budget["hotels"], encoding)
     prompt = _build_prompt(
-        hotels_for_llm, user_preferences, guests, min_price, max_price, currency, top_count
+        encoded["payload"],
+        len(budget["hotels"]),
+        user_preferences,
+        guests,
+        min_price,
+        max_price,
+        currency,
+        top_count,
+        encoding,
     )
     estimated_tokens = estimate_tokens(prompt, resolved_model)
+    rate_aliases = encoded["rate_aliases"]
+    logger.info("[scoring] %s encoding: ~%d tokens", encoding, estimated_tokens)
+
+    # Same prompt, same answer: share scoring results across workers and searches
+    cache = get_shared_cache()
+    result_key = cache_key(resolved_model, hedge_model, prompt)
+    cached = (
+        await asyncio.to_thread(cache.get_many, "scoring", [result_key])
+        if cache is not None
+        else {}
+    )
+    if cached_results := cached.get(result_key):
+        logger.info("[scoring] shared cache hit")
+        return {
+            "results": cached_results,
+            "error": None,
+            "estimated_tokens": estimated_tokens,
+            "rate_aliases": rate_aliases,
+        }
 
     last_error: str | None = None
 
     for _attempt in range(retries):
         try:
-            response = await agent.run(prompt)
+            response = await _run_scoring_agent(agent, hedge_agent, prompt, resolved_model)
         except (ValidationError, ValueError) as e:
             last_error = f"Validation error: {e}"
             continue
-        except (httpx.HTTPError, UnexpectedModelBehavior, RuntimeError, OSError) as e:
+        except (httpx.HTTPError, ModelBehaviorError, RuntimeError, OSError) as e:
             last_error = f"{type(e).__name__}: {e}"
             break
         else:
@@ -326,14 +500,18 @@ async def score_hotels(  # noqa: PLR0913
                 )
                 for h in response.output.results[:top_count]
             ]
+            if cache is not None:
+                await asyncio.to_thread(cache.set, "scoring", result_key, results)
             return {
                 "results": results,
                 "error": None,
                 "estimated_tokens": estimated_tokens,
+                "rate_aliases": rate_aliases,
             }
 
     return {
         "results": [],
         "error": last_error,
         "estimated_tokens": estimated_tokens,
+        "rate_aliases": rate_aliases,
     }
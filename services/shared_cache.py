@@ -0,0 +1,213 @@
+"""Cache shared by all worker processes of the host.
+
+The service runs under uvicorn with several workers, so in-process caches
+are duplicated and split between them. Entries here live in one SQLite
+database in WAL mode (readers never block the writer) on a tmpfs path by
+default, so every worker sees the others' entries at memory speed.
+Entries are grouped in namespaces with their own TTLs; once the database
+outgrows its size limit, least recently used entries are evicted by a
+periodic background task, off the request path.
+
+The cache never fails a search: a locked or broken database reads as a
+miss and skips writes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from config import SHARED_CACHE_ENABLED, SHARED_CACHE_MAX_MB, SHARED_CACHE_PATH
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+# Seconds an entry stays valid, per namespace
+NAMESPACE_TTLS: dict[str, float] = {
+    "content": 24 * 3600.0,
+    "review_records_v2": 6 * 3600.0,
+    "serp": 300.0,
+    "scoring": 3600.0,
+    # Matches api.jobs.JOB_TTL_SECONDS; refreshed on every event of a job
+    "search_jobs": 600.0,
+}
+DEFAULT_TTL_SECONDS = 3600.0
+# Reads refresh an entry's LRU timestamp at most this often, to keep
+# cache hits from turning into writes
+ACCESS_RESOLUTION_SECONDS = 60.0
+EVICTION_INTERVAL_SECONDS = 60.0
+BUSY_TIMEOUT_MS = 200
+
+
+def cache_key(*parts: object) -> str:
+    """Hash JSON-serializable parts into a compact cache key."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+class SharedCache:
+    """SQLite-backed key-value cache with namespaces, TTLs and LRU eviction.
+
+    Methods are blocking; async code calls them through asyncio.to_thread.
+
+    Args:
+        path: Database file path; parent directories are created.
+        max_bytes: Total size of stored values to evict down to.
+    """
+
+    def __init__(self, path: str | Path, *, max_bytes: int) -> None:
+        """Open (or create) the cache database."""
+        db_path = Path(path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key));"
+            "CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);"
+        )
+        self._conn.commit()
+
+    def get_many(self, namespace: str, keys: list[str]) -> dict[str, Any]:
+        """Return the cached values of keys that are present and not expired."""
+        if not keys:
+            return {}
+        now = time.time()
+        try:
+            with self._lock, self._conn:
+                rows = self._conn.execute(
+                    "SELECT key, value FROM entries WHERE namespace = ? AND expires_at > ?"
+                    " AND key IN (SELECT value FROM json_each(?))",
+                    (namespace, now, json.dumps(keys)),
+                ).fetchall()
+                if rows:
+                    self._conn.execute(
+                        "UPDATE entries SET accessed_at = ? WHERE namespace = ?"
+                        " AND accessed_at < ? AND key IN (SELECT value FROM json_each(?))",
+                        (now, namespace, now - ACCESS_RESOLUTION_SECONDS, json.dumps(keys)),
+                    )
+        except sqlite3.Error as e:
+            logger.debug("[shared_cache] read failed: %s", e)
+            return {}
+        return {key: json.loads(value) for key, value in rows}
+
+    def set(self, namespace: str, key: str, value: object, ttl: float | None = None) -> None:
+        """Store a JSON-serializable value."""
+        self.set_many(namespace, {key: value}, ttl)
+
+    def set_many(
+        self,
+        namespace: str,
+        items: Mapping[str, object],
+        ttl: float | None = None,
+    ) -> None:
+        """Store JSON-serializable values, with the namespace TTL by default."""
+        if not items:
+            return
+        now = time.time()
+        if ttl is None:
+            ttl = NAMESPACE_TTLS.get(namespace, DEFAULT_TTL_SECONDS)
+        expires_at = now + ttl
+        rows = []
+        for key, value in items.items():
+            encoded = json.dumps(value, ensure_ascii=False)
+            rows.append((namespace, key, encoded, len(encoded), expires_at, now))
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+        except sqlite3.Error as e:
+            logger.debug("[shared_cache] write failed: %s", e)
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones over the size limit.
+
+        Returns:
+            Number of evicted entries.
+        """
+        with self._lock, self._conn:
+            evicted = self._conn.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            total = self._conn.execute("SELECT coalesce(sum(size), 0) FROM entries").fetchone()[0]
+            if total > self._max_bytes:
+                # Oldest entries whose cumulative size covers the excess
+                evicted += self._conn.execute(
+                    "DELETE FROM entries WHERE rowid IN ("
+                    " SELECT rowid FROM ("
+                    "  SELECT rowid, sum(size) OVER (ORDER BY accessed_at, rowid) - size AS before"
+                    "  FROM entries)"
+                    " WHERE before < ?)",
+                    (total - self._max_bytes,),
+                ).rowcount
+        return evicted
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_cache: SharedCache | None = None
+_eviction_task: asyncio.Task[None] | None = None
+
+
+def get_shared_cache() -> SharedCache | None:
+    """Return the process-wide handle to the shared cache, or None if disabled."""
+    global _cache  # noqa: PLW0603
+    if _cache is None and SHARED_CACHE_ENABLED:
+        try:
+            _cache = SharedCache(SHARED_CACHE_PATH, max_bytes=SHARED_CACHE_MAX_MB * 1024 * 1024)
+        except sqlite3.Error:
+            # e.g. another worker holds the lock while creating the database
+            logger.warning("[shared_cache] failed to open %s", SHARED_CACHE_PATH, exc_info=True)
+    return _cache
+
+
+async def _evict_periodically(cache: SharedCache, interval: float) -> None:
+    """Run cache eviction in a worker thread every interval seconds, until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            evicted = await asyncio.to_thread(cache.evict)
+        except sqlite3.Error as e:
+            logger.debug("[shared_cache] eviction failed: %s", e)
+        else:
+            if evicted:
+                logger.debug("[shared_cache] evicted %d entries", evicted)
+
+
+async def start_cache_eviction(interval: float = EVICTION_INTERVAL_SECONDS) -> None:
+    """Start evicting the shared cache in the background, if it is enabled."""
+    global _eviction_task  # noqa: PLW0603
+    cache = get_shared_cache()
+    if cache is not None and _eviction_task is None:
+        _eviction_task = asyncio.create_task(_evict_periodically(cache, interval))
+
+
+def stop_cache_eviction() -> None:
+    """Cancel background eviction started by start_cache_eviction."""
+    global _eviction_task  # noqa: PLW0603
+    if _eviction_task is not None:
+        _eviction_task.cancel()
+        _eviction_task = None
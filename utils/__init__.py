@@ -1,6 +1,19 @@
 """Utility functions."""
 
-from .sse import SSEMessage, sse_event
+from .dumps import iter_dump_lines, iter_dump_records
+from .memory import MemoryProbe, start_memory_tracing
+from .sse import SSE_PING, SSEMessage, sse_event, sse_prefix, with_heartbeat
 from .urls import ostrovok_url
 
-__all__ = ["ostrovok_url", "sse_event", "SSEMessage"]
+__all__ = [
+    "SSE_PING",
+    "MemoryProbe",
+    "SSEMessage",
+    "iter_dump_lines",
+    "iter_dump_records",
+    "ostrovok_url",
+    "sse_event",
+    "sse_prefix",
+    "start_memory_tracing",
+    "with_heartbeat",
+]
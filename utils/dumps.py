@@ -0,0 +1,42 @@
+"""Reading of ETG JSON-lines dump files."""
+
+import gzip
+import io
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+
+def iter_dump_lines(path: str | Path) -> Iterator[str]:
+    """Yield lines of a dump file, decompressing .gz and .zst on the fly.
+
+    Reading .zst dumps (the format ETG publishes) requires the optional
+    zstandard package (the "dumps" extra).
+
+    Raises:
+        RuntimeError: If a .zst dump is given and zstandard is not installed.
+    """
+    dump_path = Path(path)
+    if dump_path.suffix == ".gz":
+        with gzip.open(dump_path, "rt", encoding="utf-8") as lines:
+            yield from lines
+    elif dump_path.suffix == ".zst":
+        try:
+            import zstandard  # noqa: PLC0415 - optional dependency
+        except ImportError as e:
+            msg = "Reading .zst dumps requires the zstandard package"
+            raise RuntimeError(msg) from e
+        with dump_path.open("rb") as raw:
+            reader = zstandard.ZstdDecompressor().stream_reader(raw)
+            yield from io.TextIOWrapper(reader, encoding="utf-8")
+    else:
+        with dump_path.open(encoding="utf-8") as lines:
+            yield from lines
+
+
+def iter_dump_records(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield JSON objects from a JSON-lines dump, skipping blank lines."""
+    for line in iter_dump_lines(path):
+        if line.strip():
+            yield json.loads(line)
@@ -0,0 +1,110 @@
+"""Import-time budget check for worker startup.
+
+Imports a module in a fresh interpreter under ``python -X importtime``,
+reports the slowest imports and fails when the total exceeds the budget or
+when a module meant to be loaded lazily (pydantic-ai and the LLM provider
+SDKs) was imported eagerly. deploy.sh runs it on the server and does not
+restart the service if it fails.
+
+Usage:
+    python -m utils.importtime api [--budget 2.0] [--top 15]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import subprocess
+import sys
+from typing import TypedDict
+
+DEFAULT_BUDGET_SECONDS = 2.0
+DEFAULT_TOP_COUNT = 15
+# pydantic-ai and the provider SDKs must only be imported on first agent
+# creation for a matching model
+LAZY_MODULES = ("pydantic_ai", "anthropic", "google.genai")
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+class ImportTiming(TypedDict):
+    """Timing of one imported module, in microseconds."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """Parse ``-X importtime`` stderr output, skipping unrelated lines."""
+    timings: list[ImportTiming] = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            timings.append(
+                ImportTiming(
+                    module=module,
+                    self_us=int(self_us),
+                    cumulative_us=int(cumulative_us),
+                    depth=(len(indent) - 1) // 2,
+                )
+            )
+    return timings
+
+
+def measure_import_time(module: str) -> list[ImportTiming]:
+    """Import a module in a fresh interpreter and return per-module timings.
+
+    Raises:
+        subprocess.CalledProcessError: If the import fails.
+    """
+    result = subprocess.run(  # noqa: S603 - fixed interpreter, module name as data
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def eager_lazy_modules(timings: list[ImportTiming]) -> list[str]:
+    """Return the LAZY_MODULES that were imported."""
+    imported = {timing["module"] for timing in timings}
+    return [module for module in LAZY_MODULES if module in imported]
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Check the import time of a module against a budget."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("module", nargs="?", default="api", help="module to import")
+    parser.add_argument(
+        "--budget", type=float, default=DEFAULT_BUDGET_SECONDS, help="budget in seconds"
+    )
+    parser.add_argument(
+        "--top", type=int, default=DEFAULT_TOP_COUNT, help="number of slowest imports to list"
+    )
+    args = parser.parse_args(argv)
+
+    timings = measure_import_time(args.module)
+    total = sum(timing["cumulative_us"] for timing in timings if timing["depth"] == 0) / 1e6
+    slowest = sorted(timings, key=lambda timing: timing["self_us"], reverse=True)[: args.top]
+    width = max((len(timing["module"]) for timing in slowest), default=0)
+    for timing in slowest:
+        print(  # noqa: T201
+            f"{timing['module']:<{width}}  self {timing['self_us'] / 1000:8.1f} ms"
+            f"  cumulative {timing['cumulative_us'] / 1000:8.1f} ms"
+        )
+    print(f"import {args.module}: {total:.2f} s (budget {args.budget:.2f} s)")  # noqa: T201
+
+    failures: list[str] = []
+    if total > args.budget:
+        failures.append(f"import time {total:.2f} s exceeds budget {args.budget:.2f} s")
+    failures.extend(f"{module} is imported eagerly" for module in eager_lazy_modules(timings))
+    if failures:
+        sys.exit("; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
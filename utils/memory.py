@@ -0,0 +1,62 @@
+"""Per-request memory tracking with tracemalloc, for debug mode.
+
+tracemalloc slows down every allocation, so tracing is only started when
+memory debugging is enabled. Traced memory is process-wide: the numbers of
+a request include allocations of requests running at the same time.
+"""
+
+import logging
+import resource
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+MIB = 1024 * 1024
+
+
+def start_memory_tracing() -> None:
+    """Start tracing allocations, if not already started."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+class MemoryProbe:
+    """Memory of one request above its starting point, sampled by stage.
+
+    Resets the tracemalloc peak on creation, so peak covers allocations
+    between samples too, not only the memory held at sample time.
+
+    Args:
+        label: Request description for the summary log line.
+    """
+
+    def __init__(self, label: str) -> None:
+        """Record the baseline of traced memory."""
+        self.label = label
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        self.peak = 0
+        self.peak_stage = ""
+        self.stages: dict[str, int] = {}
+
+    def sample(self, stage: str) -> None:
+        """Record memory held at the end of a stage and the peak so far."""
+        current, peak = tracemalloc.get_traced_memory()
+        self.stages[stage] = current - self._baseline
+        if peak - self._baseline > self.peak:
+            self.peak = peak - self._baseline
+            self.peak_stage = stage
+
+    def log_summary(self) -> None:
+        """Log the peak, memory held by stage and the process max RSS."""
+        # ru_maxrss is in KiB on Linux
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        stages = ", ".join(f"{stage} {size / MIB:+.1f}" for stage, size in self.stages.items())
+        logger.info(
+            "[memory] %s: peak %+.1f MiB (by %s), process max RSS %.0f MiB; MiB held by stage: %s",
+            self.label,
+            self.peak / MIB,
+            self.peak_stage or "start",
+            max_rss / MIB,
+            stages,
+        )
@@ -1,10 +1,19 @@
 """Server-Sent Events (SSE) formatting utilities."""
 
+import asyncio
+import contextlib
 import json
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Any
 
 from pydantic import BaseModel, ConfigDict
 
+logger = logging.getLogger(__name__)
+
+# SSE comment line: ignored by clients, keeps proxies from closing idle streams
+SSE_PING = b": ping\n\n"
+
 
 class SSEMessage(BaseModel):
     """Structured SSE message payload."""
@@ -13,16 +22,71 @@ class SSEMessage(BaseModel):
 
     event: str
     data: BaseModel | dict[str, Any]
+    id: str | None = None
 
 
-def sse_event(message: SSEMessage) -> str:
-    """Format data as Server-Sent Event."""
-    event_type = message.event.strip()
+def sse_prefix(event: str) -> str:
+    """Return the start of an SSE frame up to its data, for precomputing per event name."""
+    event_type = event.strip()
     if not event_type:
         raise ValueError("SSE event requires a non-empty 'event' name.")
+    return f"event: {event_type}\ndata: "
+
+
+def sse_event(message: SSEMessage) -> str:
+    """Format data as Server-Sent Event."""
+    prefix = sse_prefix(message.event)
     data = message.data
     if isinstance(data, BaseModel):
         json_str = data.model_dump_json()
     else:
         json_str = json.dumps(data, ensure_ascii=False)
-    return f"event: {event_type}\ndata: {json_str}\n\n"
+    if message.id is not None:
+        return f"id: {message.id}\n{prefix}{json_str}\n\n"
+    return f"{prefix}{json_str}\n\n"
+
+
+async def with_heartbeat(
+    frames: AsyncIterator[bytes],
+    interval: float,
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+) -> AsyncIterator[bytes]:
+    """Interleave SSE frames with ping comments while the source is idle.
+
+    The source is advanced in a separate task, so a ping is sent every
+    interval seconds without a frame. At each ping the client connection is
+    checked with is_disconnected; if the client is gone, or this iterator
+    is closed or cancelled, the pending step of the source is cancelled and
+    the source is closed, stopping the work behind it.
+
+    Args:
+        frames: Source of encoded SSE frames.
+        interval: Seconds without a frame before a ping is sent.
+        is_disconnected: Coroutine function reporting a closed client connection.
+    """
+    step: asyncio.Future[bytes] | None = None
+    try:
+        while True:
+            if step is None:
+                step = asyncio.ensure_future(anext(frames))
+            done, _ = await asyncio.wait({step}, timeout=interval)
+            if not done:
+                if is_disconnected is not None and await is_disconnected():
+                    logger.info("[sse] client disconnected, cancelling stream")
+                    return
+                yield SSE_PING
+                continue
+            finished, step = step, None
+            try:
+                frame = finished.result()
+            except StopAsyncIteration:
+                return
+            yield frame
+    finally:
+        if step is not None:
+            step.cancel()
+            with contextlib.suppress(asyncio.CancelledError, StopAsyncIteration):
+                await step
+        aclose = getattr(frames, "aclose", None)
+        if aclose is not None:
+            await aclose()